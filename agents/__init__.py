@@ -1 +1,3 @@
 # Agents package
+# Importing the built-in agents registers them in agents.registry.AGENT_REGISTRY
+from . import security, performance, style
@@ -1,9 +1,30 @@
+from services.tracing import span
 from .state import ReviewState
 
+def tag_with_line_range(issues, line_range):
+    if not line_range:
+        return list(issues)
+    start, end = line_range
+    return [f"[Lines {start}-{end}] {issue}" for issue in issues]
+
+def weighted_score(scores, weights):
+    if not scores:
+        return 8
+    if len(weights) != len(scores) or not sum(weights):
+        return sum(scores) // len(scores)
+    return int(sum(score * weight for score, weight in zip(scores, weights)) / sum(weights))
+
 def aggregator_node(state: ReviewState):
     """Compiles all agent findings into a single final response"""
-    all_issues = state["security_issues"] + state["performance_issues"] + state["style_issues"]
-    avg_score = sum(state["scores"]) // len(state["scores"]) if state["scores"] else 8
+    with span("aggregator"):
+        return _aggregate(state)
+
+def _aggregate(state: ReviewState):
+    all_issues = tag_with_line_range(
+        state["security_issues"] + state["performance_issues"] + state["style_issues"],
+        state.get("line_range")
+    )
+    avg_score = weighted_score(state["scores"], state.get("score_weights", []))
     
     reasoning = (
         f"Security analysis found {len(state['security_issues'])} issues. "
@@ -20,3 +41,42 @@ def aggregator_node(state: ReviewState):
             "language": state["language"]
         }
     }
+
+def merge_chunk_results(chunk_states, language):
+    """
+    Merges the final states of per-chunk reviews of one file. Issues keep their
+    line-range tags, the score is weighted by chunk length and duplicate
+    suggestions are dropped.
+    """
+    issues, suggestions = [], []
+    security_count = performance_count = style_count = 0
+    weighted_score, total_lines = 0, 0
+
+    for chunk_state in chunk_states:
+        result = chunk_state["final_result"]
+        start, end = chunk_state["line_range"]
+        lines = end - start + 1
+        weighted_score += result["score"] * lines
+        total_lines += lines
+        issues.extend(result["issues"])
+        for suggestion in result["suggestions"]:
+            if suggestion not in suggestions:
+                suggestions.append(suggestion)
+        security_count += len(chunk_state["security_issues"])
+        performance_count += len(chunk_state["performance_issues"])
+        style_count += len(chunk_state["style_issues"])
+
+    reasoning = (
+        f"Reviewed in {len(chunk_states)} chunks covering {total_lines} lines. "
+        f"Security analysis found {security_count} issues. "
+        f"Performance analysis flagged {performance_count} optimization points. "
+        f"Clean code review identified {style_count} style improvements."
+    )
+
+    return {
+        "score": round(weighted_score / total_lines) if total_lines else 8,
+        "issues": issues,
+        "suggestions": suggestions,
+        "reasoning": reasoning,
+        "language": language
+    }
@@ -0,0 +1,101 @@
+import json
+import time
+from typing import Dict, Iterator, List, Tuple
+from langchain_core.prompts import ChatPromptTemplate
+from services.metrics import AGENT_SECONDS
+from services.tracing import span
+from services.code_diff import number_lines
+from .registry import AgentSpec, enabled_agents, format_hints
+from .state import ReviewState
+
+# Graph node (and routing task) of the single-call review engine
+COMBINED_REVIEWER = "combined_reviewer"
+
+# One prompt covering every enabled agent; {areas} and {format} are built from their specs
+COMBINED_PROMPT = (
+    "You are a Senior Code Reviewer. Analyze this {language} code once, covering each area below.\n"
+    "{areas}\n\n"
+    "Code (each line starts with its line number and a |):\n```{language}\n{code}\n```\n\n"
+    "{hints}"
+    "CRITICAL: You MUST respond with ONLY a valid JSON object. No markdown, no explanation, no text before or after.\n"
+    "JSON format, one key per area: {format}\n"
+    "Start every issue with the line it refers to, as \"Line 12: ...\" or \"Lines 12-15: ...\".\n"
+    "Score each area 1-10 (10 = no problems in that area). If an area has no issues, return empty arrays for it."
+)
+
+def build_combined_chain(llm, parser):
+    return ChatPromptTemplate.from_template(COMBINED_PROMPT) | llm | parser
+
+def _response_format(specs: List[AgentSpec]) -> str:
+    example = {}
+    for spec in specs:
+        example[spec.name] = {"issues": ["Line 12: issue1"], "score": 8}
+        if spec.emits_suggestions:
+            example[spec.name]["suggestions"] = ["suggestion1"]
+    return json.dumps(example)
+
+def _chain_input(state: ReviewState, specs: List[AgentSpec]) -> Dict:
+    static_hints = state.get("static_hints") or {}
+    first_line = state["line_range"][0] if state.get("line_range") else 1
+    return {
+        "code": number_lines(state["code"], first_line),
+        "language": state["language"],
+        "areas": "\n".join(f"- {spec.name}: {spec.focus}" for spec in specs),
+        "format": _response_format(specs),
+        "hints": format_hints([hint for spec in specs for hint in static_hints.get(spec.issues_key, [])])
+    }
+
+def split_response(res: Dict, specs: List[AgentSpec]) -> Dict:
+    """
+    The state update the agents would have written between them: each spec reads
+    its own section, so issues, scores and weights land exactly as in the graph.
+    A missing section raises, so the review falls back instead of scoring that area 10.
+    Each agent's suggestions are also kept apart under agent_suggestions.
+    """
+    update = {"agent_suggestions": {}}
+    for spec in specs:
+        section = res.get(spec.name) if isinstance(res, dict) else None
+        if not isinstance(section, dict):
+            raise ValueError(f"Combined review response has no {spec.name} section")
+        part = spec.to_update(section)
+        for key, value in part.items():
+            update[key] = update.get(key, []) + value
+        if spec.emits_suggestions:
+            update["agent_suggestions"][spec.name] = part["suggestions"]
+    return update
+
+def agent_updates(update: Dict, specs: List[AgentSpec]) -> Iterator[Tuple[str, Dict]]:
+    """
+    Split a combined update back into one update per agent, for streaming. Scores
+    come one per spec in order (split_response rejects missing sections), and each
+    agent gets its own suggestions.
+    """
+    scores, weights = update.get("scores", []), update.get("score_weights", [])
+    agent_suggestions = update.get("agent_suggestions", {})
+    for index, spec in enumerate(specs):
+        part = {spec.issues_key: update.get(spec.issues_key, []), "scores": scores[index:index + 1], "score_weights": weights[index:index + 1]}
+        if spec.emits_suggestions:
+            part["suggestions"] = agent_suggestions.get(spec.name, [])
+        yield spec.name, part
+
+def run_combined(state: ReviewState, chain):
+    specs = enabled_agents(state["language"])
+    started, outcome = time.perf_counter(), "error"
+    try:
+        with span(f"agent:{COMBINED_REVIEWER}"):
+            res = chain.invoke(_chain_input(state, specs))
+        outcome = "ok"
+    finally:
+        AGENT_SECONDS.labels(COMBINED_REVIEWER, outcome).observe(time.perf_counter() - started)
+    return split_response(res, specs)
+
+async def arun_combined(state: ReviewState, chain):
+    specs = enabled_agents(state["language"])
+    started, outcome = time.perf_counter(), "error"
+    try:
+        with span(f"agent:{COMBINED_REVIEWER}"):
+            res = await chain.ainvoke(_chain_input(state, specs))
+        outcome = "ok"
+    finally:
+        AGENT_SECONDS.labels(COMBINED_REVIEWER, outcome).observe(time.perf_counter() - started)
+    return split_response(res, specs)
@@ -1,20 +1,20 @@
-from langchain_core.prompts import ChatPromptTemplate
-from .state import ReviewState
+from .registry import AgentSpec, register_agent
 
-def performance_node(state: ReviewState, llm, parser):
-    """Node focused on optimization and complexity"""
-    prompt = ChatPromptTemplate.from_template(
+# Node focused on optimization and complexity
+PERFORMANCE_AGENT = register_agent(AgentSpec(
+    name="performance_guru",
+    prompt=(
         "You are a Performance Expert. Analyze this {language} code for performance issues.\n"
         "Look for: inefficient loops, unnecessary operations, memory leaks, complexity issues.\n\n"
-        "Code:\n```{language}\n{code}\n```\n\n"
+        "Code (each line starts with its line number and a |):\n```{language}\n{code}\n```\n\n"
+        "{hints}"
         "CRITICAL: You MUST respond with ONLY a valid JSON object. No markdown, no explanation, no text before or after.\n"
-        "JSON format: {{\"issues\": [\"issue1\"], \"score\": 8, \"suggestions\": [\"suggestion1\"]}}\n"
+        "JSON format: {{\"issues\": [\"Line 12: issue1\"], \"score\": 8, \"suggestions\": [\"suggestion1\"]}}\n"
+        "Start every issue with the line it refers to, as \"Line 12: ...\" or \"Lines 12-15: ...\".\n"
         "Score: 1-10 (10 = best performance). If no issues, return empty arrays."
-    )
-    chain = prompt | llm | parser
-    res = chain.invoke({"code": state["code"], "language": state["language"]})
-    return {
-        "performance_issues": res.get("issues", []),
-        "suggestions": res.get("suggestions", []),
-        "scores": [res.get("score", 10)]
-    }
+    ),
+    issues_key="performance_issues",
+    stream_event="performance",
+    focus="performance: inefficient loops, unnecessary operations, memory leaks, complexity issues.",
+    emits_suggestions=True
+))
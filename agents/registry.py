@@ -0,0 +1,83 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+from langchain_core.prompts import ChatPromptTemplate
+from config import settings
+from services.metrics import AGENT_SECONDS
+from services.tracing import span
+from services.code_diff import number_lines
+from .state import ReviewState
+
+@dataclass(frozen=True)
+class AgentSpec:
+    """Everything the review graph needs to know about one expert agent"""
+    name: str                       # graph node name
+    prompt: str                     # template over {language}, {code} and {hints}
+    issues_key: str                 # ReviewState field that receives the agent's issues
+    stream_event: str               # SSE event name used by /api/review/stream
+    focus: str = ""                 # what the agent looks for, as a section of the combined review prompt
+    emits_suggestions: bool = False
+    weight: float = 1.0             # relative weight of this agent's score in the aggregate
+
+    def build_chain(self, llm, parser):
+        return ChatPromptTemplate.from_template(self.prompt) | llm | parser
+
+    def to_update(self, res) -> Dict:
+        update = {
+            self.issues_key: res.get("issues", []),
+            "scores": [res.get("score", 10)],
+            "score_weights": [self.weight]
+        }
+        if self.emits_suggestions:
+            update["suggestions"] = res.get("suggestions", [])
+        return update
+
+AGENT_REGISTRY: Dict[str, AgentSpec] = {}
+
+def register_agent(spec: AgentSpec) -> AgentSpec:
+    AGENT_REGISTRY[spec.name] = spec
+    return spec
+
+def enabled_agents(language: str) -> List[AgentSpec]:
+    """Agents turned on in config, minus any disabled for this language, in registration order"""
+    disabled = settings.DISABLED_AGENTS_BY_LANGUAGE.get(language.lower(), [])
+    return [
+        spec for name, spec in AGENT_REGISTRY.items()
+        if name in settings.ENABLED_AGENTS and name not in disabled
+    ]
+
+def format_hints(hints: List[str]) -> str:
+    """Already-known findings (static analysis, earlier reviews) handed to an agent so it can skip them and answer shorter"""
+    if not hints:
+        return ""
+    listed = "\n".join(f"- {hint}" for hint in hints)
+    return (
+        "These issues are already reported; do NOT repeat them, report only additional ones:\n"
+        f"{listed}\n\n"
+    )
+
+def _chain_input(state: ReviewState, spec: AgentSpec) -> Dict:
+    hints = (state.get("static_hints") or {}).get(spec.issues_key, [])
+    # Chunks are numbered from their first line in the file, so findings name real lines
+    first_line = state["line_range"][0] if state.get("line_range") else 1
+    return {"code": number_lines(state["code"], first_line), "language": state["language"], "hints": format_hints(hints)}
+
+def run_agent(state: ReviewState, spec: AgentSpec, chain):
+    started, outcome = time.perf_counter(), "error"
+    try:
+        with span(f"agent:{spec.name}"):
+            res = chain.invoke(_chain_input(state, spec))
+        outcome = "ok"
+    finally:
+        AGENT_SECONDS.labels(spec.name, outcome).observe(time.perf_counter() - started)
+    return spec.to_update(res)
+
+async def arun_agent(state: ReviewState, spec: AgentSpec, chain):
+    started, outcome = time.perf_counter(), "error"
+    try:
+        with span(f"agent:{spec.name}"):
+            res = await chain.ainvoke(_chain_input(state, spec))
+        outcome = "ok"
+    finally:
+        AGENT_SECONDS.labels(spec.name, outcome).observe(time.perf_counter() - started)
+    return spec.to_update(res)
@@ -1,19 +1,19 @@
-from langchain_core.prompts import ChatPromptTemplate
-from .state import ReviewState
+from .registry import AgentSpec, register_agent
 
-def security_node(state: ReviewState, llm, parser):
-    """Node focused on security vulnerabilities"""
-    prompt = ChatPromptTemplate.from_template(
+# Node focused on security vulnerabilities
+SECURITY_AGENT = register_agent(AgentSpec(
+    name="security_expert",
+    prompt=(
         "You are a Security Expert. Analyze this {language} code for security vulnerabilities.\n"
         "Look for: SQL injection, XSS, path traversal, hardcoded secrets, etc.\n\n"
-        "Code:\n```{language}\n{code}\n```\n\n"
+        "Code (each line starts with its line number and a |):\n```{language}\n{code}\n```\n\n"
+        "{hints}"
         "CRITICAL: You MUST respond with ONLY a valid JSON object. No markdown, no explanation, no text before or after.\n"
-        "JSON format: {{\"issues\": [\"issue1\", \"issue2\"], \"score\": 8}}\n"
+        "JSON format: {{\"issues\": [\"Line 12: issue1\", \"Line 30: issue2\"], \"score\": 8}}\n"
+        "Start every issue with the line it refers to, as \"Line 12: ...\" or \"Lines 12-15: ...\".\n"
         "Score: 1-10 (10 = most secure). If no issues, return empty array for issues."
-    )
-    chain = prompt | llm | parser
-    res = chain.invoke({"code": state["code"], "language": state["language"]})
-    return {
-        "security_issues": res.get("issues", []),
-        "scores": [res.get("score", 10)]
-    }
+    ),
+    issues_key="security_issues",
+    stream_event="security",
+    focus="security vulnerabilities: SQL injection, XSS, path traversal, hardcoded secrets, etc."
+))
@@ -1,5 +1,5 @@
 import operator
-from typing import Dict, Any, List, TypedDict, Annotated
+from typing import Dict, Any, List, Optional, Tuple, TypedDict, Annotated
 
 class ReviewState(TypedDict):
     code: str
@@ -9,5 +9,13 @@ class ReviewState(TypedDict):
     performance_issues: Annotated[List[str], operator.add]
     style_issues: Annotated[List[str], operator.add]
     suggestions: Annotated[List[str], operator.add]
+    # Written by the combined reviewer only: each agent's own suggestions, for streaming
+    agent_suggestions: Dict[str, List[str]]
     scores: Annotated[List[int], operator.add]
+    # Parallel to scores: the weight of the agent that produced each score
+    score_weights: Annotated[List[float], operator.add]
     final_result: Dict[str, Any]
+    # Local static-analysis findings per issues field, passed to agents as hints
+    static_hints: Dict[str, List[str]]
+    # Set when reviewing one chunk of a larger file: (first_line, last_line)
+    line_range: Optional[Tuple[int, int]]
@@ -1,20 +1,20 @@
-from langchain_core.prompts import ChatPromptTemplate
-from .state import ReviewState
+from .registry import AgentSpec, register_agent
 
-def style_node(state: ReviewState, llm, parser):
-    """Node focused on clean code, naming, and PEP/Style guides"""
-    prompt = ChatPromptTemplate.from_template(
+# Node focused on clean code, naming, and PEP/Style guides
+STYLE_AGENT = register_agent(AgentSpec(
+    name="style_architect",
+    prompt=(
         "You are a Code Style Expert. Analyze this {language} code for style and readability.\n"
         "Look for: naming conventions, code organization, comments, best practices.\n\n"
-        "Code:\n```{language}\n{code}\n```\n\n"
+        "Code (each line starts with its line number and a |):\n```{language}\n{code}\n```\n\n"
+        "{hints}"
         "CRITICAL: You MUST respond with ONLY a valid JSON object. No markdown, no explanation, no text before or after.\n"
-        "JSON format: {{\"issues\": [\"issue1\"], \"score\": 8, \"suggestions\": [\"suggestion1\"]}}\n"
+        "JSON format: {{\"issues\": [\"Line 12: issue1\"], \"score\": 8, \"suggestions\": [\"suggestion1\"]}}\n"
+        "Start every issue with the line it refers to, as \"Line 12: ...\" or \"Lines 12-15: ...\".\n"
         "Score: 1-10 (10 = cleanest code). If no issues, return empty arrays."
-    )
-    chain = prompt | llm | parser
-    res = chain.invoke({"code": state["code"], "language": state["language"]})
-    return {
-        "style_issues": res.get("issues", []),
-        "suggestions": res.get("suggestions", []),
-        "scores": [res.get("score", 10)]
-    }
+    ),
+    issues_key="style_issues",
+    stream_event="style",
+    focus="style and readability: naming conventions, code organization, comments, best practices.",
+    emits_suggestions=True
+))
@@ -0,0 +1 @@
+# Benchmarks package: run individual benchmarks with `python -m benchmarks.<name>`
@@ -0,0 +1,81 @@
+"""
+Benchmark authenticated request throughput with and without the user cache.
+
+Drives a minimal authenticated route through the real auth dependency against
+an in-memory Mongo stand-in with a simulated round-trip latency, and reports
+requests per second, mean request latency and database operations per request.
+
+    python -m benchmarks.bench_auth [--requests 2000] [--concurrency 10] [--latency-ms 1.0]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+import httpx
+from fastapi import Depends, FastAPI
+from typing import Annotated
+import database
+from benchmarks.fakes import InMemoryDatabase
+from routes.deps import get_current_user
+from services.user_cache import user_cache
+from utils.auth import create_access_token
+
+USERS = 20
+
+def build_app() -> FastAPI:
+    # Just the auth dependency: the route body costs nothing, so the lookup dominates
+    app = FastAPI()
+
+    @app.get("/whoami")
+    async def whoami(current_user: Annotated[dict, Depends(get_current_user)]):
+        return {"id": current_user["id"]}
+
+    return app
+
+async def run(requests: int, concurrency: int, cached: bool, latency: float):
+    fake_db = InMemoryDatabase(latency=latency)
+    for index in range(USERS):
+        await fake_db.users.insert_one({"id": f"user-{index}", "email": f"user{index}@example.com", "hashed_password": "x"})
+    fake_db.users.operations = 0
+    database.db.db = fake_db
+
+    user_cache.clear()
+    user_cache.ttl_seconds = 60 if cached else 0
+    tokens = [create_access_token(data={"sub": f"user{index}@example.com"}) for index in range(USERS)]
+
+    transport = httpx.ASGITransport(app=build_app())
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        latencies = []
+
+        async def one(index: int):
+            async with semaphore:
+                sent = time.perf_counter()
+                response = await client.get("/whoami", headers={"Authorization": f"Bearer {tokens[index % USERS]}"})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - sent)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(index) for index in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    return requests / elapsed, sum(latencies) / len(latencies) * 1000, fake_db.operations / requests
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    print(f"{'user cache':12} {'req/s':>9} {'mean ms':>9} {'db ops/req':>11}")
+    for cached in (False, True):
+        throughput, mean_ms, ops = asyncio.run(run(args.requests, args.concurrency, cached, latency))
+        print(f"{'on' if cached else 'off':12} {throughput:>9.0f} {mean_ms:>9.2f} {ops:>11.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Load test the API in-process against a fake LLM and a local or in-memory Mongo.
+
+Requests go through the full ASGI app (middleware, auth, controllers, review
+graph) via httpx, with ChatGroq replaced by FakeChatModel behind the usual
+resilience wrapper (quotas off). Each scenario runs at increasing concurrency
+and reports throughput, p50/p95/p99 latency and event-loop lag. Results are
+written as JSON; --compare flags p95/throughput regressions against an earlier run.
+
+    python -m benchmarks.bench_load [--scenarios review,review_file,chat,sessions]
+        [--concurrency 1,8,32] [--requests 100] [--llm-latency-ms 300]
+        [--tokens-per-second 400] [--mongo memory|url] [--output FILE] [--compare FILE]
+
+--mongo memory needs mongomock-motor; --mongo url uses a throwaway database on MONGO_URL.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+import httpx
+import motor.motor_asyncio
+import database
+import main as app_main
+from benchmarks.corpus import SNIPPETS
+from benchmarks.fakes import FakeChatModel
+from config import settings
+from controllers.review_controller import analyzer
+from services.llm_resilience import LLMGuard, ResilientChatModel
+from services.message_store import new_session_fields
+from utils.auth import shutdown_password_executor
+
+BENCH_DB = "smart_code_reviewer_bench"
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+LANGUAGE, CODE = SNIPPETS["clean_python"]
+CHAT_QUESTIONS = ["Why this score?", "How would you fix the first issue?", "Show me the corrected code.", "Anything else?"]
+
+def percentile(values, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))]
+
+class LoopLagMonitor:
+    """Samples how late a short periodic sleep wakes up: time the event loop was blocked"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def start(self):
+        self.samples = []
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        return sorted(self.samples)
+
+# --- Scenarios: request(client, n) issues the n-th request of a run ---
+
+class Scenario:
+    name = ""
+
+    def __init__(self):
+        # Unique across concurrency levels, unlike the per-run request number
+        self.sequence = itertools.count()
+
+    async def setup(self, client: httpx.AsyncClient, user_id: str, max_concurrency: int):
+        pass
+
+    async def request(self, client: httpx.AsyncClient, n: int) -> httpx.Response:
+        raise NotImplementedError
+
+class ReviewScenario(Scenario):
+    name = "review"
+
+    async def request(self, client, n):
+        # A distinct input per request, so every review misses the cache and runs the graph
+        return await client.post("/api/review", json={"code": f"{CODE}\n# request {next(self.sequence)}\n", "language": LANGUAGE})
+
+class ReviewFileScenario(Scenario):
+    name = "review_file"
+
+    async def request(self, client, n):
+        return await client.post(
+            "/api/review/file",
+            files={"file": (f"bench_{n}.py", f"{CODE}\n# file {next(self.sequence)}\n".encode(), "text/x-python")},
+            data={"language": LANGUAGE}
+        )
+
+class ChatScenario(Scenario):
+    """Follow-up turns spread over one session per concurrent client; histories grow as in real use"""
+    name = "chat"
+
+    async def setup(self, client, user_id, max_concurrency):
+        self.session_ids = []
+        for index in range(max_concurrency):
+            response = await client.post("/api/review", json={"code": f"{CODE}\n# chat {index}\n", "language": LANGUAGE})
+            response.raise_for_status()
+            self.session_ids.append(response.json()["session_id"])
+
+    async def request(self, client, n):
+        return await client.post("/api/chat", json={
+            "session_id": self.session_ids[n % len(self.session_ids)],
+            "message": CHAT_QUESTIONS[n % len(CHAT_QUESTIONS)]
+        })
+
+class SessionsScenario(Scenario):
+    name = "sessions"
+    seeded = 200
+
+    async def setup(self, client, user_id, max_concurrency):
+        start = datetime(2026, 1, 1)
+        await database.get_db().sessions.insert_many([
+            {
+                "user_id": user_id,
+                "language": LANGUAGE,
+                "code": CODE * 20,
+                "score": 7,
+                "issues": ["issue text"] * 10,
+                "suggestions": ["suggestion text"] * 5,
+                "reasoning": "seeded",
+                **new_session_fields(),
+                "created_at": start + timedelta(minutes=index),
+                "updated_at": start + timedelta(minutes=index)
+            }
+            for index in range(self.seeded)
+        ])
+
+    async def request(self, client, n):
+        return await client.get("/api/sessions", params={"limit": 20})
+
+SCENARIOS = {scenario.name: scenario for scenario in (ReviewScenario, ReviewFileScenario, ChatScenario, SessionsScenario)}
+
+# --- Environment ---
+
+async def connect(mongo: str):
+    if mongo == "memory":
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise SystemExit("--mongo memory needs mongomock-motor (pip install mongomock-motor); or use --mongo url")
+        database.db.client = AsyncMongoMockClient()
+    else:
+        database.db.client = motor.motor_asyncio.AsyncIOMotorClient(database.MONGO_URL, **database._client_options())
+        await database.db.client.drop_database(BENCH_DB)
+    database.db.db = database.db.client[BENCH_DB]
+    await database.ensure_indexes()
+
+def install_fake_llm(latency: float, tokens_per_second: float):
+    """Every routed model becomes a FakeChatModel behind the production wrapper, with quotas off"""
+    def build(model_name: str):
+        return ResilientChatModel(
+            inner=FakeChatModel(latency=latency, tokens_per_second=tokens_per_second),
+            guard=LLMGuard(f"bench:{model_name}", 0, 0)
+        )
+    analyzer.model_factory = build
+    analyzer.llm = build(settings.GROQ_MODEL)
+    analyzer.compile_chains()
+
+async def sign_in(client: httpx.AsyncClient) -> str:
+    credentials = {"email": "bench@example.com", "username": "bench", "password": "benchmark-password"}
+    await client.post("/api/auth/signup", json=credentials)
+    response = await client.post("/api/auth/signin", json=credentials)
+    response.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    me = await client.get("/api/users/me")
+    me.raise_for_status()
+    return me.json()["id"]
+
+# --- Runner ---
+
+async def run_level(client, scenario: Scenario, concurrency: int, requests: int) -> dict:
+    latencies, errors = [], 0
+    counter = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        while (n := next(counter)) < requests:
+            start = time.perf_counter()
+            try:
+                response = await scenario.request(client, n)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    lag = await monitor.stop()
+
+    latencies.sort()
+    return {
+        "scenario": scenario.name,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 2),
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 2),
+        "p50_ms": round(1000 * percentile(latencies, 0.50), 2),
+        "p95_ms": round(1000 * percentile(latencies, 0.95), 2),
+        "p99_ms": round(1000 * percentile(latencies, 0.99), 2),
+        "loop_lag_p99_ms": round(1000 * percentile(lag, 0.99), 2),
+        "loop_lag_max_ms": round(1000 * (lag[-1] if lag else 0.0), 2)
+    }
+
+async def run(args) -> list:
+    await connect(args.mongo)
+    install_fake_llm(args.llm_latency_ms / 1000, args.tokens_per_second)
+    levels = [int(level) for level in args.concurrency.split(",")]
+    results = []
+    transport = httpx.ASGITransport(app=app_main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+            user_id = await sign_in(client)
+            for name in args.scenarios.split(","):
+                scenario = SCENARIOS[name]()
+                await scenario.setup(client, user_id, max(levels))
+                for concurrency in levels:
+                    result = await run_level(client, scenario, concurrency, args.requests)
+                    results.append(result)
+                    print_row(result)
+    finally:
+        if args.mongo == "url":
+            await database.db.client.drop_database(BENCH_DB)
+        database.db.client.close()
+    return results
+
+# --- Reporting ---
+
+HEADER = f"{'scenario':12} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'lag p99':>8} {'lag max':>8} {'errors':>7}"
+
+def print_row(result: dict):
+    print(
+        f"{result['scenario']:12} {result['concurrency']:>5} {result['throughput_rps']:>8.1f} "
+        f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+        f"{result['loop_lag_p99_ms']:>8.1f} {result['loop_lag_max_ms']:>8.1f} {result['errors']:>7}"
+    )
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def compare(results: list, baseline_path: str, tolerance: float) -> int:
+    """Print deltas against a previous results file; returns the number of regressions"""
+    baseline = {(row["scenario"], row["concurrency"]): row for row in json.loads(Path(baseline_path).read_text())["results"]}
+    regressions = 0
+    print(f"\nvs {baseline_path} (tolerance {tolerance:.0%})")
+    for row in results:
+        before = baseline.get((row["scenario"], row["concurrency"]))
+        if before is None:
+            continue
+        p95_change = row["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        rps_change = row["throughput_rps"] / before["throughput_rps"] - 1 if before["throughput_rps"] else 0.0
+        regressed = p95_change > tolerance or rps_change < -tolerance
+        regressions += regressed
+        print(
+            f"{row['scenario']:12} {row['concurrency']:>5}  p95 {p95_change:+7.1%}  req/s {rps_change:+7.1%}"
+            f"{'  REGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario and concurrency level")
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="fake model time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=400, help="fake model generation speed (0: instant)")
+    parser.add_argument("--mongo", choices=("memory", "url"), default="memory")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/load-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="relative change counted as a regression")
+    parser.add_argument("--with-logging", action="store_true", help="keep access and trace logging on (measures their cost)")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios.split(",")) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    if not args.with_logging:
+        settings.ACCESS_LOG_ENABLED = False
+        settings.REVIEW_TRACE_LOG_ENABLED = False
+
+    print(HEADER)
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        shutdown_password_executor()
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"load-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "args": vars(args)
+        },
+        "results": results
+    }, indent=2))
+    print(f"\nresults written to {output}")
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Compare the review engines: the multi-agent graph (one LLM call per enabled agent)
+against the combined reviewer (one call answering for all of them).
+
+Every corpus snippet that needs the LLM is reviewed --repeat times per engine,
+bypassing the review cache. LLM calls, input/output tokens and estimated cost
+come from the route stats; latency is the whole review. With --llm fake (the
+default) input tokens are counted from the real prompts, while output size and
+latency follow the fake's reply, --llm-latency-ms and --tokens-per-second.
+--llm live uses the configured provider, or a recorded cassette when
+LLM_CASSETTE_MODE=replay.
+
+    python -m benchmarks.bench_review_engines [--repeat 5] [--llm fake|live]
+        [--corpus snippets|full] [--llm-latency-ms 300] [--tokens-per-second 400]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from agents.registry import enabled_agents
+from benchmarks.bench_load import percentile
+from benchmarks.corpus import SNIPPETS, full_corpus
+from benchmarks.fakes import FakeChatModel
+from controllers.review_controller import analyzer
+from config import settings
+from services.llm_resilience import LLMGuard, ResilientChatModel
+from services.model_router import route_stats
+from services.static_analysis import run_static_analysis, should_skip_llm
+
+ENGINES = ("multi_agent", "combined")
+# What one agent answers; the combined reply holds one of these per agent
+AGENT_REPLY = {"issues": ["Line 2: Example issue"], "score": 7, "suggestions": ["Example suggestion"]}
+HEADER = f"{'snippet':34} {'engine':11} {'calls':>5} {'in tok':>7} {'out tok':>7} {'p50 ms':>8} {'p95 ms':>8}"
+
+def install_fake_llm(reply: str, latency: float, tokens_per_second: float):
+    """Every routed model answers `reply`, behind the production wrapper with quotas off"""
+    def build(model_name: str):
+        return ResilientChatModel(
+            inner=FakeChatModel(reply=reply, latency=latency, tokens_per_second=tokens_per_second),
+            guard=LLMGuard(f"bench:{model_name}", 0, 0)
+        )
+    analyzer.model_factory = build
+    analyzer.llm = build(settings.GROQ_MODEL)
+    analyzer.compile_chains()
+
+def fake_reply(engine: str, language: str) -> str:
+    if engine == "combined":
+        return json.dumps({spec.name: AGENT_REPLY for spec in enabled_agents(language)})
+    return json.dumps(AGENT_REPLY)
+
+def llm_totals() -> dict:
+    routes = route_stats.snapshot()
+    return {key: sum(route[key] for route in routes) for key in ("calls", "input_tokens", "output_tokens", "cost_usd")}
+
+async def review_snippet(language: str, code: str, engine: str, repeat: int) -> dict:
+    before, latencies, fallbacks = llm_totals(), [], 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await analyzer.aanalyze_code(code, language, engine)
+        latencies.append(time.perf_counter() - started)
+        fallbacks += bool(result.get("fallback"))
+    after = llm_totals()
+    return {
+        **{key: (after[key] - before[key]) / repeat for key in before},
+        "latencies": sorted(latencies),
+        "fallbacks": fallbacks
+    }
+
+async def run(args) -> dict:
+    corpus = SNIPPETS if args.corpus == "snippets" else full_corpus()
+    totals = {engine: {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0, "latencies": [], "fallbacks": 0, "snippets": 0} for engine in ENGINES}
+    for name, (language, code) in corpus.items():
+        if should_skip_llm(run_static_analysis(code, language), code):
+            continue
+        for engine in ENGINES:
+            if args.llm == "fake":
+                install_fake_llm(fake_reply(engine, language), args.llm_latency_ms / 1000, args.tokens_per_second)
+            row = await review_snippet(language, code, engine, args.repeat)
+            print(
+                f"{name[:34]:34} {engine:11} {row['calls']:>5.1f} {row['input_tokens']:>7.0f} {row['output_tokens']:>7.0f} "
+                f"{percentile(row['latencies'], 0.50) * 1000:>8.1f} {percentile(row['latencies'], 0.95) * 1000:>8.1f}"
+            )
+            for key in ("calls", "input_tokens", "output_tokens", "cost_usd", "fallbacks"):
+                totals[engine][key] += row[key]
+            totals[engine]["latencies"].extend(row["latencies"])
+            totals[engine]["snippets"] += 1
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="reviews per snippet and engine")
+    parser.add_argument("--llm", choices=("fake", "live"), default="fake")
+    parser.add_argument("--corpus", choices=("snippets", "full"), default="snippets", help="full adds the repository's own modules")
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="fake model time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=400, help="fake model generation speed (0: instant)")
+    args = parser.parse_args()
+
+    print(HEADER)
+    totals = asyncio.run(run(args))
+
+    print()
+    for engine, total in totals.items():
+        latencies = sorted(total["latencies"])
+        print(
+            f"{engine:11} per review: {total['calls'] / max(1, total['snippets']):.1f} calls; "
+            f"per pass over {total['snippets']} snippets: {total['input_tokens']:.0f} input and {total['output_tokens']:.0f} output tokens, "
+            f"${total['cost_usd']:.6f}; latency p50 {percentile(latencies, 0.50) * 1000:.1f} ms, "
+            f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms; fallbacks: {total['fallbacks']}"
+        )
+
+    multi, combined = totals["multi_agent"], totals["combined"]
+    if multi["input_tokens"] and multi["latencies"]:
+        print(
+            f"\ncombined vs multi_agent: input tokens {combined['input_tokens'] / multi['input_tokens']:.0%}, "
+            f"output tokens {combined['output_tokens'] / max(1, multi['output_tokens']):.0%}, "
+            f"p50 latency {percentile(sorted(combined['latencies']), 0.50) / percentile(sorted(multi['latencies']), 0.50):.0%}"
+        )
+
+if __name__ == "__main__":
+    main()
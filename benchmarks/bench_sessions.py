@@ -0,0 +1,109 @@
+"""
+Benchmark the session listing against a seeded local MongoDB.
+
+Seeds one heavy user (large code, long chat histories) into a throwaway
+database on MONGO_URL, then compares the old full-document listing with the
+projected, keyset-paginated listing: latency and bytes returned by the server.
+
+    python -m benchmarks.bench_sessions [--sessions 500] [--code-kb 40] [--messages 60] [--limit 50]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+import bson
+import motor.motor_asyncio
+import database
+from controllers.session_controller import get_user_sessions
+
+BENCH_DB = "smart_code_reviewer_bench"
+USER_ID = "bench-user"
+
+async def seed(db_conn, sessions: int, code_kb: int, messages: int):
+    await db_conn.sessions.drop()
+    for index in database.INDEXES["sessions"]:
+        await db_conn.sessions.create_indexes([index])
+    start = datetime(2026, 1, 1)
+    code = "x = 1\n" * (code_kb * 1024 // 6)
+    chat = [{"role": "user" if turn % 2 == 0 else "assistant", "content": "message " * 40} for turn in range(messages)]
+    docs = [
+        {
+            "user_id": USER_ID,
+            "language": "python",
+            "code": code,
+            "issues": ["issue text"] * 20,
+            "suggestions": ["suggestion text"] * 10,
+            "messages": chat,
+            "created_at": start + timedelta(minutes=index),
+            "updated_at": start + timedelta(minutes=index)
+        }
+        for index in range(sessions)
+    ]
+    for offset in range(0, len(docs), 100):
+        await db_conn.sessions.insert_many(docs[offset:offset + 100])
+
+async def legacy_listing(db_conn):
+    """The previous implementation: every full document, counted client side"""
+    docs = [doc async for doc in db_conn.sessions.find({"user_id": USER_ID}).sort("created_at", -1)]
+    listing = [(doc["_id"], doc["language"], doc["created_at"], len(doc.get("messages", []))) for doc in docs]
+    return listing, sum(len(bson.encode(doc)) for doc in docs)
+
+async def projected_page(db_conn, limit: int, cursor=None):
+    sessions, next_cursor = await get_user_sessions(USER_ID, limit, cursor)
+    # Size of the projected documents as they come back from the server
+    returned_bytes = sum(len(bson.encode(session.model_dump())) for session in sessions)
+    return sessions, next_cursor, returned_bytes
+
+async def timed(repeat: int, func, *args):
+    samples, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await func(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+async def run(args):
+    client = motor.motor_asyncio.AsyncIOMotorClient(database.MONGO_URL, serverSelectionTimeoutMS=3000)
+    db_conn = client[BENCH_DB]
+    database.db.client, database.db.db = client, db_conn
+    try:
+        await seed(db_conn, args.sessions, args.code_kb, args.messages)
+
+        legacy_ms, (listing, legacy_bytes) = await timed(args.repeat, legacy_listing, db_conn)
+        page_ms, (sessions, _, page_bytes) = await timed(args.repeat, projected_page, db_conn, args.limit)
+
+        async def walk_all():
+            cursor, total_bytes, count = None, 0, 0
+            while True:
+                page, cursor, size = await projected_page(db_conn, args.limit, cursor)
+                total_bytes += size
+                count += len(page)
+                if not cursor:
+                    return count, total_bytes
+        walk_ms, (walked, walk_bytes) = await timed(args.repeat, walk_all)
+
+        print(f"{args.sessions} sessions, {args.code_kb} KB code, {args.messages} messages each")
+        print(f"{'listing':28} {'rows':>6} {'median ms':>10} {'bytes':>14}")
+        print(f"{'legacy full documents':28} {len(listing):>6} {legacy_ms:>10.1f} {legacy_bytes:>14,}")
+        print(f"{'projected first page':28} {len(sessions):>6} {page_ms:>10.1f} {page_bytes:>14,}")
+        print(f"{'projected, all pages':28} {walked:>6} {walk_ms:>10.1f} {walk_bytes:>14,}")
+    finally:
+        await client.drop_database(BENCH_DB)
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--code-kb", type=int, default=40)
+    parser.add_argument("--messages", type=int, default=60)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
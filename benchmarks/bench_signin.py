@@ -0,0 +1,98 @@
+"""
+Benchmark sign-in throughput and event-loop stalls for each password hashing mode.
+
+Runs concurrent POST /api/auth/signin requests through the real auth router
+against an in-memory Mongo stand-in, while a probe task measures how late the
+event loop wakes up. Use it to pick PASSWORD_HASH_ROUNDS / PASSWORD_HASH_WORKERS
+for a latency target.
+
+    python -m benchmarks.bench_signin [--requests 40] [--concurrency 8] [--rounds 535000] [--workers 2]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+import httpx
+from fastapi import FastAPI
+import database
+from benchmarks.fakes import InMemoryDatabase
+from config import settings
+from routes import auth
+from utils.auth import ahash_password, shutdown_password_executor
+
+MODES = ("inline", "thread", "process")
+PASSWORD = "benchmark-password"
+
+async def probe_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Worst delay between when the loop should have woken the probe and when it did"""
+    worst = 0.0
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - expected)
+    return worst
+
+async def run(mode: str, requests: int, concurrency: int):
+    settings.PASSWORD_HASH_EXECUTOR = mode
+    shutdown_password_executor()
+
+    fake_db = InMemoryDatabase()
+    database.db.db = fake_db
+    # Also warms the executor so pool start-up is not billed to the first sign-ins
+    hashed = await ahash_password(PASSWORD)
+    for index in range(concurrency):
+        await fake_db.users.insert_one({"id": f"user-{index}", "email": f"user{index}@example.com", "hashed_password": hashed})
+
+    app = FastAPI()
+    app.include_router(auth.router)
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(index: int):
+            async with semaphore:
+                sent = time.perf_counter()
+                response = await client.post("/api/auth/signin", json={
+                    "email": f"user{index % concurrency}@example.com",
+                    "username": "bench",
+                    "password": PASSWORD
+                })
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - sent)
+
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_loop_lag(stop))
+        start = time.perf_counter()
+        await asyncio.gather(*(one(index) for index in range(requests)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        worst_lag = await probe
+
+    shutdown_password_executor()
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return requests / elapsed, statistics.median(latencies) * 1000, p99 * 1000, worst_lag * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=settings.PASSWORD_HASH_ROUNDS)
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS)
+    args = parser.parse_args()
+
+    settings.PASSWORD_HASH_ROUNDS = args.rounds
+    settings.PASSWORD_HASH_WORKERS = args.workers
+    print(f"rounds={args.rounds} workers={args.workers} cpus={os.cpu_count()}")
+    print(f"{'mode':8} {'signin/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'max loop lag ms':>16}")
+    for mode in MODES:
+        throughput, p50, p99, lag = asyncio.run(run(mode, args.requests, args.concurrency))
+        print(f"{mode:8} {throughput:>9.1f} {p50:>9.1f} {p99:>9.1f} {lag:>16.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Benchmark the local static pre-analysis stage against the snippet corpus.
+
+Reports per-snippet latency, the findings handed to the agents as hints, and
+how many LLM calls the short-circuit avoids.
+
+    python -m benchmarks.bench_static_analysis [--repeat 200]
+"""
+import argparse
+import time
+from benchmarks.corpus import full_corpus
+from agents.registry import enabled_agents
+from services.static_analysis import run_static_analysis, should_skip_llm
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    corpus = full_corpus()
+    skipped, avoided_calls, total_ms = 0, 0, 0.0
+    print(f"{'snippet':42} {'lines':>6} {'us/run':>9} {'sec':>4} {'perf':>4} {'style':>5}  local")
+    for name, (language, code) in corpus.items():
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            report = run_static_analysis(code, language)
+        per_run_ms = (time.perf_counter() - start) * 1000 / args.repeat
+        total_ms += per_run_ms
+
+        local = should_skip_llm(report, code)
+        if local:
+            skipped += 1
+            avoided_calls += len(enabled_agents(language))
+        print(
+            f"{name[:42]:42} {report['metrics']['lines']:>6} {per_run_ms * 1000:>9.1f} "
+            f"{len(report['security_issues']):>4} {len(report['performance_issues']):>4} "
+            f"{len(report['style_issues']):>5}  {'yes' if local else 'no'}"
+        )
+
+    print()
+    print(f"snippets: {len(corpus)}, answered locally: {skipped} ({skipped / len(corpus):.0%})")
+    print(f"LLM calls avoided: {avoided_calls}")
+    print(f"mean static-analysis cost: {total_ms / len(corpus):.3f} ms per snippet")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""Small labelled snippet corpus shared by the benchmarks"""
+from pathlib import Path
+
+SNIPPETS = {
+    "tiny_python": ("python", "print('hello')"),
+    "tiny_js": ("javascript", "let x = 1;"),
+    "syntax_error": ("python", "def broken(:\n    return 1\n\nclass Also Broken:\n    pass\n"),
+    "hardcoded_secret": ("python", 'import requests\n\nAPI_KEY = "sk-live-0123456789abcdefghijklmn"\n\ndef fetch(url):\n    return requests.get(url, headers={"Authorization": API_KEY})\n'),
+    "sql_concat": ("python", 'def find_user(cursor, name):\n    cursor.execute("SELECT * FROM users WHERE name = \'" + name + "\'")\n    return cursor.fetchall()\n'),
+    "sql_fstring": ("python", 'def delete_user(cursor, user_id):\n    cursor.execute(f"DELETE FROM users WHERE id = {user_id}")\n'),
+    "sql_template_js": ("javascript", 'async function getUser(db, id) {\n  return db.query(`SELECT * FROM users WHERE id = ${id}`);\n}\n'),
+    "nested_loops": ("python", "def pairs(items):\n    out = []\n    for a in items:\n        for b in items:\n            for c in items:\n                out.append((a, b, c))\n    return out\n"),
+    "bad_naming": ("python", "class user_repo:\n    def GetAll(self):\n        return []\n\n    def FindById(self, id):\n        return None\n"),
+    "clean_python": ("python", 'from dataclasses import dataclass\n\n@dataclass\nclass Point:\n    x: float\n    y: float\n\n    def distance_to(self, other: "Point") -> float:\n        return ((self.x - other.x) ** 2 + (self.y - other.y) ** 2) ** 0.5\n'),
+    "clean_js": ("javascript", "export function debounce(fn, wait) {\n  let timer;\n  return (...args) => {\n    clearTimeout(timer);\n    timer = setTimeout(() => fn(...args), wait);\n  };\n}\n"),
+}
+
+def repository_sources():
+    """The repository's own Python modules, as realistic medium-sized inputs"""
+    root = Path(__file__).resolve().parent.parent
+    for path in sorted(root.glob("*/*.py")):
+        if path.parent.name != "benchmarks":
+            yield f"repo:{path.relative_to(root)}", ("python", path.read_text())
+
+def full_corpus():
+    corpus = dict(SNIPPETS)
+    corpus.update(repository_sources())
+    return corpus
@@ -0,0 +1,161 @@
+"""
+In-process stand-ins used by the benchmarks so they run without external services.
+
+InMemoryDatabase mimics the small part of the Motor API the app uses for the
+paths being measured, with a fixed delay per operation to model the network
+round trip to a real Mongo server. FakeChatModel is a deterministic chat model
+with configurable latency and token rate that can inject throttling and server
+errors.
+"""
+import asyncio
+import copy
+import random
+import time
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+from services.chat_history import estimate_tokens
+
+def _matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    return all(doc.get(field) == value for field, value in query.items())
+
+def _project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not projection:
+        return copy.deepcopy(doc)
+    fields = {field for field, include in projection.items() if include}
+    return {field: copy.deepcopy(value) for field, value in doc.items() if field in fields or field == "_id"}
+
+class InMemoryCollection:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.docs: List[Dict[str, Any]] = []
+        self.operations = 0
+
+    async def _round_trip(self):
+        self.operations += 1
+        await asyncio.sleep(self.latency)
+
+    async def find_one(self, query: Dict[str, Any], projection: Dict[str, Any] = None):
+        await self._round_trip()
+        for doc in self.docs:
+            if _matches(doc, query):
+                return _project(doc, projection)
+        return None
+
+    async def insert_one(self, doc: Dict[str, Any]):
+        await self._round_trip()
+        doc.setdefault("_id", ObjectId())
+        self.docs.append(copy.deepcopy(doc))
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any]):
+        await self._round_trip()
+        for doc in self.docs:
+            if _matches(doc, query):
+                doc.update(copy.deepcopy(update.get("$set", {})))
+                return
+
+    async def create_index(self, *args, **kwargs):
+        return None
+
+class InMemoryDatabase:
+    def __init__(self, latency: float = 0.001):
+        self.latency = latency
+        self._collections: Dict[str, InMemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection(self.latency)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> InMemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    @property
+    def operations(self) -> int:
+        return sum(collection.operations for collection in self._collections.values())
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers: Dict[str, str]):
+        self.status_code = status_code
+        self.headers = headers
+
+class FakeAPIError(Exception):
+    """Shaped like the provider SDK's status errors: status_code plus a response with headers"""
+
+    def __init__(self, status_code: int, retry_after: float = None):
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+        self.response = FakeResponse(status_code, headers)
+
+class FakeChatModel(BaseChatModel):
+    """
+    Answers every prompt with `reply` after `latency` seconds (time to first token),
+    then generates it at `tokens_per_second` (0: instantly). A fraction of calls
+    (`error_rate`, drawn from a generator seeded with `seed`) fails with
+    `error_status`; 429s carry `retry_after`. Set `outage_until` (a
+    time.monotonic() deadline) to fail every call until then.
+    """
+
+    reply: str = '{"issues": ["Example issue"], "score": 7, "suggestions": ["Example suggestion"]}'
+    latency: float = 0.05
+    tokens_per_second: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 429
+    retry_after: Optional[float] = None
+    outage_until: float = 0.0
+    seed: int = 0
+    calls: int = 0
+    failures: int = 0
+    _rng: random.Random = PrivateAttr()
+
+    def model_post_init(self, __context):
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _maybe_fail(self):
+        self.calls += 1
+        if time.monotonic() < self.outage_until or self._rng.random() < self.error_rate:
+            self.failures += 1
+            raise FakeAPIError(self.error_status, self.retry_after if self.error_status == 429 else None)
+
+    def _generation_seconds(self) -> float:
+        return estimate_tokens(self.reply) / self.tokens_per_second if self.tokens_per_second else 0.0
+
+    def _result(self, messages) -> ChatResult:
+        # Usage is reported like the real provider does, so token metrics are exercised
+        usage = {
+            "input_tokens": sum(estimate_tokens(str(message.content)) for message in messages),
+            "output_tokens": estimate_tokens(self.reply)
+        }
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply, usage_metadata=usage))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        self._maybe_fail()
+        time.sleep(self._generation_seconds())
+        return self._result(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        self._maybe_fail()
+        await asyncio.sleep(self._generation_seconds())
+        return self._result(messages)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        self._maybe_fail()
+        tokens = self.reply.split(" ")
+        for token in tokens:
+            if self.tokens_per_second:
+                await asyncio.sleep(estimate_tokens(token + " ") / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token + " "))
@@ -3,15 +3,182 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def _parse_model_routes(value: str) -> list:
+    """
+    "task[/language][<max_chars]=model;..." into route dicts, checked in order.
+    task "*" matches every task; a missing language or size limit matches any.
+    """
+    routes = []
+    for entry in value.split(";"):
+        match, _, model = entry.partition("=")
+        if not match.strip() or not model.strip():
+            continue
+        match, _, max_chars = match.partition("<")
+        task, _, language = match.partition("/")
+        routes.append({
+            "task": task.strip(),
+            "language": language.strip().lower() or None,
+            "max_chars": int(max_chars) if max_chars.strip() else None,
+            "model": model.strip()
+        })
+    return routes
+
 class Settings:
     # Groq Configuration
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
+    # Default model: anything no route below claims (deep security review, chat, generation)
     GROQ_MODEL: str = "llama-3.3-70b-versatile"
+    LLM_PROVIDER: str = "groq"
+    
+    # Model Routing Configuration
+    # Per task (agent node name, "chat", "generation", "summary"), language and input size;
+    # first match wins. The default sends style checks and small performance reviews to a small fast model.
+    MODEL_ROUTES: list = _parse_model_routes(os.getenv(
+        "MODEL_ROUTES",
+        "style_architect=llama-3.1-8b-instant;performance_guru<6000=llama-3.1-8b-instant;summary=llama-3.1-8b-instant"
+    ))
+    # USD per million input/output tokens, for the per-route cost figures
+    MODEL_PRICES: dict = {
+        model.strip(): tuple(float(price) for price in prices.split("/"))
+        for model, _, prices in (entry.partition("=") for entry in os.getenv(
+            "MODEL_PRICES", "llama-3.3-70b-versatile=0.59/0.79;llama-3.1-8b-instant=0.05/0.08"
+        ).split(";") if entry.strip())
+    }
+    
+    # LLM Resilience Configuration
+    # Client-side quotas matching the provider's limits (0 disables a bucket)
+    LLM_REQUESTS_PER_MINUTE: int = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+    LLM_TOKENS_PER_MINUTE: int = int(os.getenv("LLM_TOKENS_PER_MINUTE", "12000"))
+    # Completion budget counted against the token quota on top of the prompt estimate
+    LLM_EXPECTED_OUTPUT_TOKENS: int = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "400"))
+    # Longest a call may queue for quota before failing with 503
+    LLM_RATE_LIMIT_MAX_WAIT: float = float(os.getenv("LLM_RATE_LIMIT_MAX_WAIT", "20"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    LLM_RETRY_BASE_DELAY: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+    # A Retry-After longer than this is not waited out; the call fails with 503 instead
+    LLM_RETRY_MAX_DELAY: float = float(os.getenv("LLM_RETRY_MAX_DELAY", "20"))
+    LLM_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+    LLM_BREAKER_RESET_SECONDS: float = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+    LLM_REQUEST_TIMEOUT: float = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+    
+    # LLM Cassette Configuration
+    # "record" saves every prompt/response pair to LLM_CASSETTE_PATH; "replay" serves them offline
+    LLM_CASSETTE_MODE: str = os.getenv("LLM_CASSETTE_MODE", "").lower()
+    LLM_CASSETTE_PATH: str = os.getenv("LLM_CASSETTE_PATH", "cassettes/llm.jsonl")
+    # Replay waits the recorded latency times this factor; 0 replays instantly
+    LLM_CASSETTE_LATENCY_SCALE: float = float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", "1"))
+    
+    # Review Graph Configuration
+    # "parallel" fans the expert agents out from the entry point, "sequential" chains them
+    REVIEW_GRAPH_MODE: str = os.getenv("REVIEW_GRAPH_MODE", "parallel").lower()
+    # "multi_agent" runs one LLM call per enabled agent; "combined" asks one call for every agent's findings
+    REVIEW_ENGINE: str = os.getenv("REVIEW_ENGINE", "multi_agent").lower()
+    # Agents (by graph node name) assembled into the review graph
+    ENABLED_AGENTS: list = [a.strip() for a in os.getenv("ENABLED_AGENTS", "security_expert,performance_guru,style_architect").split(",") if a.strip()]
+    # Per-language opt-outs, e.g. DISABLED_AGENTS_BY_LANGUAGE="json:performance_guru,style_architect;css:security_expert"
+    DISABLED_AGENTS_BY_LANGUAGE: dict = {
+        lang.strip().lower(): [a.strip() for a in agents.split(",") if a.strip()]
+        for lang, _, agents in (entry.partition(":") for entry in os.getenv("DISABLED_AGENTS_BY_LANGUAGE", "").split(";") if entry.strip())
+    }
+    # Bump whenever agent prompts change so cached reviews from old prompts are not reused
+    REVIEW_PROMPT_VERSION: str = "4"
+    
+    # Static Pre-analysis Configuration
+    # Inputs shorter than this (after stripping) are reviewed locally without any LLM call
+    STATIC_MIN_LLM_CHARS: int = int(os.getenv("STATIC_MIN_LLM_CHARS", "40"))
+    STATIC_MAX_LINE_LENGTH: int = int(os.getenv("STATIC_MAX_LINE_LENGTH", "120"))
+    STATIC_COMPLEXITY_THRESHOLD: int = int(os.getenv("STATIC_COMPLEXITY_THRESHOLD", "10"))
+    
+    # Large files are split into chunks of at most this many characters and reviewed concurrently
+    REVIEW_CHUNK_MAX_CHARS: int = int(os.getenv("REVIEW_CHUNK_MAX_CHARS", "12000"))
+    REVIEW_CHUNK_CONCURRENCY: int = int(os.getenv("REVIEW_CHUNK_CONCURRENCY", "4"))
+    
+    # Re-review Configuration
+    # Unchanged lines sent around each edited region so the agents see it in context
+    REREVIEW_CONTEXT_LINES: int = int(os.getenv("REREVIEW_CONTEXT_LINES", "3"))
+    # Above this share of changed lines a resubmission gets a full review instead
+    REREVIEW_MAX_CHANGED_RATIO: float = float(os.getenv("REREVIEW_MAX_CHANGED_RATIO", "0.5"))
+    # Earlier findings that name no line are only carried while at most this share of lines changed
+    REREVIEW_UNLOCATED_MAX_CHANGED_RATIO: float = float(os.getenv("REREVIEW_UNLOCATED_MAX_CHANGED_RATIO", "0.2"))
+    
+    # Review Cache Configuration
+    REVIEW_CACHE_ENABLED: bool = os.getenv("REVIEW_CACHE_ENABLED", "True").lower() == "true"
+    REVIEW_CACHE_SIZE: int = int(os.getenv("REVIEW_CACHE_SIZE", "512"))
+    REVIEW_CACHE_TTL_SECONDS: int = int(os.getenv("REVIEW_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+    
+    # MongoDB Configuration
+    MONGO_MAX_POOL_SIZE: int = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+    MONGO_MIN_POOL_SIZE: int = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+    MONGO_MAX_IDLE_TIME_MS: int = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+    # How long a request waits for a free pooled connection before failing
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+    MONGO_CONNECT_TIMEOUT_MS: int = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+    MONGO_SOCKET_TIMEOUT_MS: int = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000"))
+    # "majority", "1", ... (empty keeps the server default) and whether writes wait for the journal
+    MONGO_WRITE_CONCERN: str = os.getenv("MONGO_WRITE_CONCERN", "")
+    MONGO_WRITE_JOURNAL: bool = os.getenv("MONGO_WRITE_JOURNAL", "False").lower() == "true"
+    MONGO_ENSURE_INDEXES: bool = os.getenv("MONGO_ENSURE_INDEXES", "True").lower() == "true"
     
     # Server Configuration
     PORT: int = int(os.getenv("PORT", "8000"))
     HOST: str = "0.0.0.0"
     
+    # Observability Configuration
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
+    # One JSON line per request on the "app.access" logger
+    ACCESS_LOG_ENABLED: bool = os.getenv("ACCESS_LOG_ENABLED", "True").lower() == "true"
+    # Per-span review timings on the "app.trace" logger, for reviews taking at least REVIEW_TRACE_LOG_MIN_MS
+    REVIEW_TRACE_LOG_ENABLED: bool = os.getenv("REVIEW_TRACE_LOG_ENABLED", "True").lower() == "true"
+    REVIEW_TRACE_LOG_MIN_MS: float = float(os.getenv("REVIEW_TRACE_LOG_MIN_MS", "0"))
+    
+    # Chat History Configuration
+    # Older turns beyond the recent window are folded into a rolling summary stored on the session
+    CHAT_HISTORY_TOKEN_BUDGET: int = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "2000"))
+    CHAT_RECENT_TURNS: int = int(os.getenv("CHAT_RECENT_TURNS", "4"))
+    CHAT_SUMMARY_MIN_MESSAGES: int = int(os.getenv("CHAT_SUMMARY_MIN_MESSAGES", "4"))
+    CHAT_SUMMARY_MAX_WORDS: int = int(os.getenv("CHAT_SUMMARY_MAX_WORDS", "200"))
+    
+    # Session listing page size (keyset paginated, newest first) for clients that page with ?limit= or ?cursor=
+    SESSION_PAGE_SIZE: int = int(os.getenv("SESSION_PAGE_SIZE", "50"))
+    SESSION_PAGE_MAX_SIZE: int = int(os.getenv("SESSION_PAGE_MAX_SIZE", "200"))
+    
+    # "collection" keeps one document per chat message; "embedded" pushes them into the session
+    CHAT_MESSAGE_STORAGE: str = os.getenv("CHAT_MESSAGE_STORAGE", "collection").lower()
+    # Messages returned with a session's detail; older ones are paged with ?before=
+    SESSION_MESSAGES_PAGE_SIZE: int = int(os.getenv("SESSION_MESSAGES_PAGE_SIZE", "50"))
+    
+    # Hot chat sessions kept in process so a turn does not reload the whole session document
+    SESSION_CACHE_SIZE: int = int(os.getenv("SESSION_CACHE_SIZE", "256"))
+    SESSION_CACHE_TTL_SECONDS: int = int(os.getenv("SESSION_CACHE_TTL_SECONDS", "300"))
+    
+    # Authenticated user lookups cached per token subject; 0 disables the cache
+    USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", "1024"))
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    # Multi-worker deployments: broadcast profile changes through Mongo instead of waiting out the TTL
+    USER_CACHE_SHARED_INVALIDATION: bool = os.getenv("USER_CACHE_SHARED_INVALIDATION", "False").lower() == "true"
+    USER_CACHE_SYNC_SECONDS: float = float(os.getenv("USER_CACHE_SYNC_SECONDS", "2"))
+    # How far apart worker clocks may be; each sync re-reads this much (plus one sync period) of past invalidations
+    USER_CACHE_MAX_CLOCK_SKEW_SECONDS: float = float(os.getenv("USER_CACHE_MAX_CLOCK_SKEW_SECONDS", "5"))
+    
+    # Password Hashing Configuration
+    # sha256_crypt cost; changing it upgrades existing hashes on each user's next sign-in
+    PASSWORD_HASH_ROUNDS: int = int(os.getenv("PASSWORD_HASH_ROUNDS", "535000"))
+    # "process" (default), "thread" or "inline" (on the event loop)
+    PASSWORD_HASH_EXECUTOR: str = os.getenv("PASSWORD_HASH_EXECUTOR", "process").lower()
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    
+    # Review Job Queue Configuration
+    # In-process workers started with the API; set to 0 when running worker.py separately
+    JOB_INPROCESS_WORKERS: int = int(os.getenv("JOB_INPROCESS_WORKERS", "2"))
+    JOB_WORKER_CONCURRENCY: int = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+    JOB_MAX_QUEUE_DEPTH: int = int(os.getenv("JOB_MAX_QUEUE_DEPTH", "500"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    JOB_RETRY_BACKOFF_SECONDS: int = int(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "5"))
+    JOB_LEASE_SECONDS: int = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+    JOB_POLL_INTERVAL: float = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+    
     # CORS Configuration
     ALLOWED_ORIGINS: list = [o.strip().strip('"').strip("'") for o in os.getenv("ALLOWED_ORIGINS", "").split(",") if o.strip()]
     
@@ -19,6 +186,11 @@ class Settings:
     MAX_FILE_SIZE: int = 1024 * 1024 
     ALLOWED_EXTENSIONS: set = {".js", ".ts", ".py", ".html", ".css", ".json", ".c", ".cpp", ".php"}
     
+    # Batch Review Configuration (multi-file and archive uploads)
+    BATCH_MAX_FILES: int = int(os.getenv("BATCH_MAX_FILES", "100"))
+    BATCH_MAX_TOTAL_SIZE: int = int(os.getenv("BATCH_MAX_TOTAL_SIZE", str(20 * 1024 * 1024)))
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "4"))
+    
     # Scoring Criteria
     SCORE_CRITERIA = {
         "excellent": (9, 10),
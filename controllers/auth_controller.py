@@ -1,7 +1,7 @@
 from fastapi import HTTPException
 from database import get_db
 from models.user import UserCreate
-from utils.auth import get_password_hash, verify_password, create_access_token
+from utils.auth import ahash_password, averify_password, create_access_token
 import secrets
 
 async def signup_user(user_data: UserCreate):
@@ -16,7 +16,7 @@ async def signup_user(user_data: UserCreate):
         
     # Create user
     user_dict = user_data.dict()
-    user_dict["hashed_password"] = get_password_hash(user_dict.pop("password"))
+    user_dict["hashed_password"] = await ahash_password(user_dict.pop("password"))
     user_dict["id"] = secrets.token_hex(12)
     
     await db_conn.users.insert_one(user_dict)
@@ -35,8 +35,13 @@ async def signin_user(user_data: UserCreate):
     if not user:
         raise HTTPException(status_code=401, detail="Incorrect email or password")
         
-    if not verify_password(user_data.password, user["hashed_password"]):
+    valid, new_hash = await averify_password(user_data.password, user["hashed_password"])
+    if not valid:
         raise HTTPException(status_code=401, detail="Incorrect email or password")
+    
+    if new_hash:
+        # Hash cost changed since this password was stored: upgrade it transparently
+        await db_conn.users.update_one({"_id": user["_id"]}, {"$set": {"hashed_password": new_hash}})
         
     access_token = create_access_token(data={"sub": user_data.email})
     return {"access_token": access_token, "token_type": "bearer"}
@@ -1,33 +1,208 @@
+import asyncio
 from fastapi import HTTPException
-from datetime import datetime
 from bson import ObjectId
 from database import get_db
 from controllers.review_controller import analyzer
+from services.chat_history import plan_history, recent_window
+from services.session_cache import session_cache, mongo_now
+from services.message_store import append_messages, load_messages
+from services.llm_resilience import LLMUnavailableError
+from utils.sse import format_sse
 
-async def chat_followup_logic(code: str, review_context: str, messages: list, language: str, session_id: str = None, user_id: str = None):
+# Only what the chat prompt needs; never the whole document (messages only exist here for embedded storage)
+SESSION_CONTEXT_PROJECTION = {
+    "user_id": 1, "language": 1, "code": 1, "score": 1, "issues": 1, "suggestions": 1,
+    "reasoning": 1, "messages": 1, "history_summary": 1, "summarized_count": 1, "updated_at": 1
+}
+
+def _format_review_context(doc: dict) -> str:
+    issues = "\n".join(f"- {issue}" for issue in doc.get("issues", [])) or "- none"
+    suggestions = "\n".join(f"- {suggestion}" for suggestion in doc.get("suggestions", [])) or "- none"
+    return (
+        f"Score: {doc.get('score')}/10\n"
+        f"Issues:\n{issues}\n"
+        f"Suggestions:\n{suggestions}\n"
+        f"Reasoning: {doc.get('reasoning', '')}"
+    )
+
+async def load_session_context(session_id: str, user_id: str) -> dict:
+    """
+    Code, review and history for a chat turn, served from the hot-session cache
+    when its updated_at still matches the stored session.
+    """
+    db_conn = get_db()
     try:
-        # history = [{"role": msg.role, "content": msg.content} for msg in messages] # handled in route
-        
-        response_content = analyzer.chat(
+        query = {"_id": ObjectId(session_id), "user_id": user_id}
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid session ID format")
+
+    cached = session_cache.get(session_id, user_id)
+    if cached is not None:
+        current = await db_conn.sessions.find_one(query, {"updated_at": 1})
+        if not current:
+            session_cache.invalidate(session_id)
+            raise HTTPException(status_code=404, detail="Session not found")
+        if current.get("updated_at") == cached["updated_at"]:
+            return cached
+
+    doc = await db_conn.sessions.find_one(query, SESSION_CONTEXT_PROJECTION)
+    if not doc:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    summarized_count = doc.get("summarized_count", 0)
+    context = {
+        "user_id": doc["user_id"],
+        "code": doc["code"],
+        "language": doc["language"],
+        "review_context": _format_review_context(doc),
+        # Messages already folded into the summary are never needed again
+        "messages": await load_messages(doc, start=summarized_count),
+        "message_offset": summarized_count,
+        "history_summary": doc.get("history_summary", ""),
+        "summarized_count": summarized_count,
+        "updated_at": doc.get("updated_at")
+    }
+    session_cache.put(session_id, context)
+    return context
+
+async def resolve_chat_request(request, user_id: str) -> dict:
+    """
+    Arguments for chat_followup_logic / stream_chat_followup. A request carrying
+    only session_id + message is completed from the stored session; otherwise
+    the client-supplied code, review and history are used as before.
+    """
+    if request.message is not None:
+        if not request.session_id:
+            raise HTTPException(status_code=400, detail="session_id is required when sending only a message")
+        context = await load_session_context(request.session_id, user_id)
+        return {
+            "code": context["code"],
+            "review_context": context["review_context"],
+            "messages": context["messages"] + [{"role": "user", "content": request.message}],
+            "language": context["language"],
+            "session_id": request.session_id,
+            "user_id": user_id,
+            "summary_state": context
+        }
+
+    missing = [name for name in ("code", "review_context", "messages", "language") if getattr(request, name) is None]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing fields: {', '.join(missing)} (or send session_id and message)")
+    return {
+        "code": request.code,
+        "review_context": request.review_context,
+        "messages": [{"role": msg.role, "content": msg.content} for msg in request.messages],
+        "language": request.language,
+        "session_id": request.session_id,
+        "user_id": user_id
+    }
+
+async def prepare_chat_history(messages: list, session_id: str = None, user_id: str = None, summary_state: dict = None):
+    """
+    Bound the history sent to the model: recent turns verbatim, older ones as a
+    rolling summary kept on the session document so each message is summarized once.
+    Returns (recent_messages, history_summary).
+    """
+    if not (session_id and user_id):
+        # Nowhere to keep a summary: just send the recent window
+        return recent_window(messages), ""
+
+    db_conn = get_db()
+    if summary_state is None:
+        summary_state = await db_conn.sessions.find_one(
+            {"_id": ObjectId(session_id), "user_id": user_id},
+            {"history_summary": 1, "summarized_count": 1}
+        ) or {}
+    summary = summary_state.get("history_summary", "")
+    # messages may start part-way into the conversation (see load_session_context)
+    offset = summary_state.get("message_offset", 0)
+    plan = plan_history(messages, summary_state.get("summarized_count", 0) - offset)
+    summarized_count = plan.summarized_count + offset
+
+    if plan.to_summarize:
+        try:
+            summary = await analyzer.asummarize_history(summary, plan.to_summarize)
+        except Exception as e:
+            # Keep the old summary and send the unsummarized messages verbatim this turn
+            print(f"DEBUG: Chat history summarization failed ({str(e)}).")
+            return plan.to_summarize + plan.recent, summary
+
+        updated_at = mongo_now()
+        await db_conn.sessions.update_one(
+            {"_id": ObjectId(session_id), "user_id": user_id},
+            {"$set": {"history_summary": summary, "summarized_count": summarized_count, "updated_at": updated_at}}
+        )
+        session_cache.update(session_id, history_summary=summary, summarized_count=summarized_count, updated_at=updated_at)
+
+    return plan.recent, summary
+
+async def _append_chat_turn(session_id: str, user_id: str, user_msg: dict, response_content: str):
+    ai_msg = {"role": "assistant", "content": response_content}
+    updated_at = await append_messages(session_id, user_id, [user_msg, ai_msg])
+    if updated_at is not None:
+        session_cache.append_messages(session_id, [user_msg, ai_msg], updated_at)
+
+async def chat_followup_logic(code: str, review_context: str, messages: list, language: str, session_id: str = None, user_id: str = None, summary_state: dict = None):
+    try:
+        recent_messages, history_summary = await prepare_chat_history(messages, session_id, user_id, summary_state)
+        response_content = await analyzer.achat(
             code=code,
             review_context=review_context,
-            messages=messages,
-            language=language
+            messages=recent_messages,
+            language=language,
+            history_summary=history_summary
         )
         
         if session_id and user_id:
-            db_conn = get_db()
-            user_msg = messages[-1]
-            ai_msg = {"role": "assistant", "content": response_content}
-            
-            await db_conn.sessions.update_one(
-                {"_id": ObjectId(session_id), "user_id": user_id},
-                {
-                    "$push": {"messages": {"$each": [user_msg, ai_msg]}},
-                    "$set": {"updated_at": datetime.utcnow()}
-                }
-            )
+            await _append_chat_turn(session_id, user_id, messages[-1], response_content)
             
         return response_content
+    except LLMUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+async def stream_chat_followup(code: str, review_context: str, messages: list, language: str, session_id: str = None, user_id: str = None, summary_state: dict = None, is_disconnected=None):
+    """
+    Async generator of SSE frames: a "token" frame per model chunk, then a "done"
+    frame with the full answer. The turn is only persisted once the whole answer
+    has been produced; a disconnect or error leaves the session untouched.
+    """
+    chunks = []
+    try:
+        recent_messages, history_summary = await prepare_chat_history(messages, session_id, user_id, summary_state)
+    except Exception as e:
+        yield format_sse("error", {"detail": str(e)[:100]})
+        return
+
+    stream = analyzer.astream_chat(
+        code=code,
+        review_context=review_context,
+        messages=recent_messages,
+        language=language,
+        history_summary=history_summary
+    )
+    try:
+        async for token in stream:
+            if is_disconnected is not None and await is_disconnected():
+                print("Chat stream client disconnected, cancelling generation")
+                return
+            chunks.append(token)
+            yield format_sse("token", {"content": token})
+    except LLMUnavailableError as e:
+        yield format_sse("error", e.to_payload())
+        return
+    except Exception as e:
+        print(f"DEBUG: LangChain Chat stream failed ({str(e)}).")
+        yield format_sse("error", {"detail": str(e)[:100]})
+        return
+    finally:
+        # Closes the upstream model stream when we stop early (disconnect, error, cancellation)
+        await stream.aclose()
+
+    response_content = "".join(chunks)
+    if session_id and user_id:
+        # Shield the write so a disconnect arriving now cannot leave a half-applied turn
+        await asyncio.shield(_append_chat_turn(session_id, user_id, messages[-1], response_content))
+
+    yield format_sse("done", {"content": response_content})
@@ -0,0 +1,78 @@
+import asyncio
+from fastapi import HTTPException
+from config import settings
+from controllers.review_controller import review_with_cache, save_review_session
+from services.job_queue import enqueue_job, get_job, QueueFullError, TransientJobError, TERMINAL_STATUSES
+from services.llm_resilience import LLMUnavailableError
+from utils.validators import CodeValidator
+from utils.sse import format_sse
+from models.schemas import ReviewJobResponse
+
+async def run_review_job(job: dict) -> dict:
+    """Job handler: the same review and session write as /api/review, retried on mock fallbacks"""
+    payload = job["payload"]
+    try:
+        result = await review_with_cache(payload["code"], payload["language"], payload.get("use_cache", True), payload.get("engine"))
+    except LLMUnavailableError as e:
+        raise TransientJobError(str(e))
+    if result.get("fallback"):
+        # The analyzer swallowed an LLM failure; retry instead of storing a bogus review
+        raise TransientJobError(result["reasoning"])
+
+    session_id = await save_review_session(payload["code"], payload["language"], job["user_id"], result)
+    return {
+        "score": result["score"],
+        "issues": result["issues"],
+        "suggestions": result["suggestions"],
+        "reasoning": result["reasoning"],
+        "language": payload["language"],
+        "session_id": session_id
+    }
+
+def _to_response(job: dict) -> ReviewJobResponse:
+    return ReviewJobResponse(
+        job_id=job["_id"],
+        status=job["status"],
+        attempts=job["attempts"],
+        result=job.get("result"),
+        error=job.get("error"),
+        created_at=job["created_at"],
+        updated_at=job["updated_at"]
+    )
+
+async def submit_review_job(code: str, language: str, user_id: str, use_cache: bool = True, engine: str = None):
+    CodeValidator.sanitize_code(code)
+    try:
+        job = await enqueue_job({"code": code, "language": language, "use_cache": use_cache, "engine": engine}, user_id)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(settings.JOB_RETRY_BACKOFF_SECONDS)})
+    return _to_response(job)
+
+async def get_review_job(job_id: str, user_id: str):
+    job = await get_job(job_id, user_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _to_response(job)
+
+async def stream_review_job(job_id: str, user_id: str):
+    """
+    Async generator of SSE frames: a "status" frame whenever the job changes state,
+    ending with a "result" or "error" frame once it completes or fails.
+    """
+    last_status = None
+    while True:
+        job = await get_job(job_id, user_id)
+        if not job:
+            yield format_sse("error", {"detail": "Job not found"})
+            return
+
+        if job["status"] != last_status:
+            last_status = job["status"]
+            yield format_sse("status", {"status": last_status, "attempts": job["attempts"]})
+
+        if job["status"] in TERMINAL_STATUSES:
+            response = _to_response(job)
+            yield format_sse("result" if job["status"] == "completed" else "error", response.model_dump())
+            return
+
+        await asyncio.sleep(settings.JOB_POLL_INTERVAL)
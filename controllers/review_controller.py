@@ -1,48 +1,242 @@
+import asyncio
 from fastapi import HTTPException, UploadFile
 from datetime import datetime
+from typing import List
+from config import settings
 from database import get_db
 from services.code_analyzer import CodeAnalyzer
+from services.review_cache import review_cache
+from services.message_store import new_session_fields
+from services.session_cache import session_cache, mongo_now
+from services.code_diff import diff_code, carry_forward
+from services.static_analysis import run_static_analysis, all_findings_text
+from services.llm_resilience import LLMUnavailableError
+from services.model_router import route_stats
+from services.tracing import finish_trace, span, start_trace
+from agents.registry import AGENT_REGISTRY
 from utils.validators import CodeValidator
-from models.schemas import CodeReviewResponse, CodeGenerationResponse
+from utils.sse import format_sse
+from utils.archive import is_archive, extract_archive, MemberBudget, ArchiveLimitError
+from controllers.session_controller import find_user_session
+from models.schemas import CodeReviewResponse, CodeGenerationResponse, BatchFileResult, BatchReviewSummary
 
 analyzer = CodeAnalyzer()
 
-async def analyze_code(code: str, language: str, user_id: str):
-    try:
-        CodeValidator.sanitize_code(code)
-        result = analyzer.analyze_code(code, language)
-        
-        # Save to DB
-        db_conn = get_db()
-        session = {
-            "user_id": user_id,
-            "language": language,
-            "code": code,
-            "score": result["score"],
-            "issues": result["issues"],
-            "suggestions": result["suggestions"],
-            "reasoning": result["reasoning"],
-            "messages": [],
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
+
+async def review_with_cache(code: str, language: str, use_cache: bool = True, engine: str = None):
+    """Run the review, reusing a cached result for identical submissions to the same engine"""
+    key = review_cache.make_key(code, language, engine)
+    if use_cache:
+        with span("cache.get") as cache_span:
+            cached = await review_cache.get(key)
+            if cache_span is not None:
+                cache_span["hit"] = cached is not None
+        if cached is not None:
+            return cached
+    else:
+        review_cache.record_bypass()
+
+    # A bypass still refreshes the cache with the new result
+    result = await analyzer.aanalyze_code(code, language, engine)
+    with span("cache.set"):
+        await review_cache.set(key, result)
+    return result
+
+async def save_review_session(code: str, language: str, user_id: str, result: dict) -> str:
+    db_conn = get_db()
+    session = {
+        "user_id": user_id,
+        "language": language,
+        "code": code,
+        "score": result["score"],
+        "issues": result["issues"],
+        "suggestions": result["suggestions"],
+        "reasoning": result["reasoning"],
+        # Which provider and model each review agent ran on; absent for local-only reviews
+        "provider": result.get("provider"),
+        "models": result.get("models", {}),
+        **new_session_fields(),
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
+    }
+    with span("db.sessions.insert"):
         res = await db_conn.sessions.insert_one(session)
-        
-        return CodeReviewResponse(
-            score=result["score"],
-            issues=result["issues"],
-            suggestions=result["suggestions"],
-            reasoning=result["reasoning"],
-            language=language,
-            session_id=str(res.inserted_id)
+    return str(res.inserted_id)
+
+async def analyze_code(code: str, language: str, user_id: str, use_cache: bool = True, debug: bool = False, engine: str = None):
+    with start_trace("review", language=language, chars=len(code)) as trace:
+        try:
+            CodeValidator.sanitize_code(code)
+            result = await review_with_cache(code, language, use_cache, engine)
+            
+            session_id = await save_review_session(code, language, user_id, result)
+            
+            return CodeReviewResponse(
+                score=result["score"],
+                issues=result["issues"],
+                suggestions=result["suggestions"],
+                reasoning=result["reasoning"],
+                language=language,
+                session_id=session_id,
+                debug=trace.to_dict() if debug else None
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            print(f"Error processing review: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            finish_trace(trace)
+
+async def rereview_session(session_id: str, code: str, user_id: str, debug: bool = False):
+    """
+    Review an edited version of a session's code, paying only for what changed,
+    and update the session in place (its chat history is kept).
+    """
+    with start_trace("rereview", chars=len(code)) as trace:
+        try:
+            CodeValidator.sanitize_code(code)
+            session = await find_user_session(session_id, user_id, {"code": 1, "language": 1, "score": 1, "issues": 1, "suggestions": 1, "reasoning": 1})
+            result = await rereview_code(session, code)
+
+            if result is None:
+                # Nothing changed: the stored review stands and the session is left untouched
+                result = session
+            else:
+                with span("db.sessions.update"):
+                    await get_db().sessions.update_one(
+                        {"_id": session["_id"], "user_id": user_id},
+                        {
+                            "$set": {
+                                "code": code,
+                                "score": result["score"],
+                                "issues": result["issues"],
+                                "suggestions": result["suggestions"],
+                                "reasoning": result["reasoning"],
+                                "provider": result.get("provider"),
+                                "models": result.get("models", {}),
+                                "updated_at": mongo_now()
+                            },
+                            "$inc": {"review_revision": 1}
+                        }
+                    )
+                session_cache.invalidate(session_id)
+
+            return CodeReviewResponse(
+                score=result["score"],
+                issues=result["issues"],
+                suggestions=result["suggestions"],
+                reasoning=result["reasoning"],
+                language=session["language"],
+                session_id=session_id,
+                debug=trace.to_dict() if debug else None
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except (HTTPException, LLMUnavailableError):
+            raise
+        except Exception as e:
+            print(f"Error re-reviewing session: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            finish_trace(trace)
+
+async def rereview_code(session: dict, code: str) -> dict:
+    """
+    Diff the new code against the session's, review the changed hunks, keep earlier
+    findings on unchanged lines (renumbered) and drop those on changed or removed lines,
+    as well as those naming no line once more than REREVIEW_UNLOCATED_MAX_CHANGED_RATIO changed.
+    Returns None when nothing changed.
+    """
+    old_code, language = session["code"], session["language"]
+    plan = diff_code(old_code, code, settings.REREVIEW_CONTEXT_LINES)
+    if not plan.hunks:
+        return None
+
+    if max(plan.changed_lines, plan.removed_lines) > settings.REREVIEW_MAX_CHANGED_RATIO * plan.total_lines:
+        result = await review_with_cache(code, language)
+        return {**result, "reasoning": f"Most of the file changed, so it was reviewed in full. {result['reasoning']}"}
+
+    # Static findings are recomputed for the whole new file, so only the agents' earlier findings carry over
+    old_static = set(all_findings_text(run_static_analysis(old_code, language)))
+    carried, dropped = carry_forward(
+        [issue for issue in session["issues"] if issue not in old_static], plan, settings.REREVIEW_UNLOCATED_MAX_CHANGED_RATIO
+    )
+
+    result = await analyzer.areview_changes(code, language, plan.hunks, carried)
+    if "models" not in result:
+        # Answered locally (e.g. the edit broke the syntax) or the agents failed: that result stands alone
+        return result
+
+    reviewed_lines = sum(hunk.end_line - hunk.start_line + 1 for hunk in plan.hunks)
+    unchanged_lines = plan.total_lines - reviewed_lines
+    suggestions = list(session["suggestions"])
+    suggestions += [suggestion for suggestion in result["suggestions"] if suggestion not in suggestions]
+    return {
+        **result,
+        "score": round((session["score"] * unchanged_lines + result["score"] * reviewed_lines) / plan.total_lines),
+        "issues": result["issues"] + [finding["text"] for finding in carried],
+        "suggestions": suggestions,
+        "reasoning": (
+            f"Re-reviewed {len(plan.hunks)} changed region(s) covering {reviewed_lines} of {plan.total_lines} lines. "
+            f"Carried forward {len(carried)} earlier finding(s) from unchanged code and dropped {dropped} that may no longer apply."
         )
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        print(f"Error processing review: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    }
+
+async def stream_code_review(code: str, language: str, user_id: str, use_cache: bool = True, debug: bool = False, engine: str = None):
+    """
+    Async generator of SSE frames: one per expert agent as it finishes, then a
+    final "result" frame with the aggregated review and the stored session id.
+    """
+    with start_trace("review", language=language, chars=len(code), stream=True) as trace:
+        try:
+            CodeValidator.sanitize_code(code)
+            key = review_cache.make_key(code, language, engine)
+            if use_cache:
+                result = await review_cache.get(key)
+            else:
+                result = None
+                review_cache.record_bypass()
+
+            if result is None:
+                async for node_name, update in analyzer.astream_review(code, language, engine):
+                    if node_name == "static_analysis":
+                        if any(update.values()):
+                            yield format_sse("static", update)
+                    elif node_name in AGENT_REGISTRY:
+                        spec = AGENT_REGISTRY[node_name]
+                        scores = update.get("scores", [])
+                        yield format_sse(spec.stream_event, {
+                            "issues": update.get(spec.issues_key, []),
+                            "suggestions": update.get("suggestions", []),
+                            "score": scores[0] if scores else None
+                        })
+                    elif node_name == "aggregator":
+                        result = update["final_result"]
+                await review_cache.set(key, result)
 
-async def analyze_file(file: UploadFile, language: str = None):
+            session_id = await save_review_session(code, language, user_id, result)
+            response = CodeReviewResponse(
+                score=result["score"],
+                issues=result["issues"],
+                suggestions=result["suggestions"],
+                reasoning=result["reasoning"],
+                language=language,
+                session_id=session_id,
+                debug=trace.to_dict() if debug else None
+            )
+            yield format_sse("result", response.model_dump())
+        except LLMUnavailableError as e:
+            yield format_sse("error", e.to_payload())
+        except Exception as e:
+            print(f"Error streaming review: {str(e)}")
+            yield format_sse("error", {"detail": str(e)})
+        finally:
+            finish_trace(trace)
+
+async def analyze_file(file: UploadFile, language: str = None, use_cache: bool = True):
     try:
         content = await file.read()
         
@@ -65,7 +259,7 @@ async def analyze_file(file: UploadFile, language: str = None):
         except UnicodeDecodeError:
             raise HTTPException(status_code=400, detail="File must be a valid text file")
             
-        result = analyzer.analyze_code(code_content, final_lang)
+        result = await review_with_cache(code_content, final_lang, use_cache)
         
         return CodeReviewResponse(
             score=result["score"],
@@ -74,18 +268,132 @@ async def analyze_file(file: UploadFile, language: str = None):
             reasoning=result["reasoning"],
             language=final_lang
         )
-    except HTTPException:
+    except (HTTPException, LLMUnavailableError):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-def generate_code_response(prompt: str, language: str):
+async def collect_batch_members(files: List[UploadFile]):
+    """
+    Read every upload (expanding zip/tar archives) into (filename, bytes) pairs,
+    enforcing the batch member count and total size limits up front.
+    """
+    budget = MemberBudget()
+    members = []
+    try:
+        for file in files:
+            filename = file.filename or ""
+            # Never buffer more than the whole batch is allowed to hold
+            content = await file.read(settings.BATCH_MAX_TOTAL_SIZE + 1)
+            if len(content) > settings.BATCH_MAX_TOTAL_SIZE:
+                raise ArchiveLimitError(f"Upload {filename} exceeds the maximum batch size")
+            if is_archive(filename):
+                members.extend(extract_archive(filename, content, budget))
+            else:
+                budget.reserve(len(content))
+                members.append((filename, content))
+    except ArchiveLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not members:
+        raise HTTPException(status_code=400, detail="No files to review")
+    return members
+
+async def _review_batch_member(filename: str, content: bytes, language: str, use_cache: bool, semaphore: asyncio.Semaphore):
+    is_valid_size, size_msg = CodeValidator.validate_file_size(len(content))
+    if not is_valid_size:
+        return BatchFileResult(filename=filename, error=size_msg), 0
+        
+    is_valid_ext, ext_msg = CodeValidator.validate_file_extension(filename)
+    if not is_valid_ext:
+        return BatchFileResult(filename=filename, error=ext_msg), 0
+        
+    final_lang = language if language else CodeValidator.detect_language_from_extension(filename)
+    if final_lang == 'unknown':
+        return BatchFileResult(filename=filename, error="Could not detect language. Please specify."), 0
+        
     try:
-        result = analyzer.generate_code(prompt, language)
+        code_content = content.decode('utf-8')
+    except UnicodeDecodeError:
+        return BatchFileResult(filename=filename, language=final_lang, error="File must be a valid text file"), 0
+
+    if not code_content.strip():
+        return BatchFileResult(filename=filename, language=final_lang, error="File is empty"), 0
+
+    try:
+        async with semaphore:
+            result = await review_with_cache(code_content, final_lang, use_cache)
+    except Exception as e:
+        print(f"Error processing batch member {filename}: {str(e)}")
+        return BatchFileResult(filename=filename, language=final_lang, error=str(e)), 0
+
+    return BatchFileResult(
+        filename=filename,
+        language=final_lang,
+        score=result["score"],
+        issues=result["issues"],
+        suggestions=result["suggestions"],
+        reasoning=result["reasoning"]
+    ), code_content.count("\n") + 1
+
+async def stream_batch_review(members: list, language: str = None, use_cache: bool = True):
+    """
+    Async generator of SSE frames: a "file" frame per member as soon as its review
+    finishes (in completion order), then a "summary" frame with the roll-up score.
+    At most BATCH_CONCURRENCY reviews run at once.
+    """
+    semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+    tasks = [
+        asyncio.ensure_future(_review_batch_member(filename, content, language, use_cache, semaphore))
+        for filename, content in members
+    ]
+    reviewed, failed = 0, 0
+    weighted_score, total_lines = 0, 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            file_result, line_count = await next_done
+            if file_result.error:
+                failed += 1
+            else:
+                reviewed += 1
+                weighted_score += file_result.score * line_count
+                total_lines += line_count
+            yield format_sse("file", file_result.model_dump())
+
+        summary = BatchReviewSummary(
+            total_files=len(members),
+            reviewed=reviewed,
+            failed=failed,
+            score=round(weighted_score / total_lines) if total_lines else None
+        )
+        yield format_sse("summary", summary.model_dump())
+    finally:
+        # Client went away mid-batch: stop paying for reviews nobody will read
+        for task in tasks:
+            task.cancel()
+
+async def generate_code_response(prompt: str, language: str):
+    try:
+        result = await analyzer.agenerate_code(prompt, language)
         return CodeGenerationResponse(
             code=result["code"],
             explanation=result["explanation"],
             language=language
         )
+    except LLMUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+def get_review_cache_stats():
+    return review_cache.stats()
+
+def get_model_route_stats():
+    return {
+        "provider": settings.LLM_PROVIDER,
+        "default_model": settings.GROQ_MODEL,
+        "routes": settings.MODEL_ROUTES,
+        "stats": route_stats.snapshot()
+    }
@@ -1,34 +1,99 @@
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
 from fastapi import HTTPException
 from bson import ObjectId
 from database import get_db
 from models.chat import ChatSessionResponse
+from config import settings
+from services.session_cache import session_cache
+from services.message_store import session_message_count, message_page, delete_messages
 
-async def get_user_sessions(user_id: str):
+def encode_session_cursor(created_at: datetime, session_id: ObjectId) -> str:
+    raw = f"{created_at.isoformat()}|{session_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_session_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        created_at, session_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), ObjectId(session_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def get_user_sessions(user_id: str, limit: Optional[int], cursor: Optional[str] = None) -> Tuple[List[ChatSessionResponse], Optional[str]]:
+    """
+    One page of a user's sessions, newest first, and the cursor for the next page
+    (all of them, with no cursor, when limit is None). Keyset pagination on
+    (created_at, _id) walks the user_created_id index; only the listed fields leave
+    the server, with the message count computed there.
+    """
     db_conn = get_db()
-    cursor = db_conn.sessions.find({"user_id": user_id}).sort("created_at", -1)
-    sessions = []
-    async for doc in cursor:
-        sessions.append(ChatSessionResponse(
+    match = {"user_id": user_id}
+    if cursor:
+        created_at, session_id = decode_session_cursor(cursor)
+        match["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": session_id}}
+        ]
+
+    pipeline = [{"$match": match}, {"$sort": {"created_at": -1, "_id": -1}}]
+    if limit is not None:
+        # One extra row tells us whether another page exists
+        pipeline.append({"$limit": limit + 1})
+    pipeline.append({"$project": {
+        "language": 1,
+        "created_at": 1,
+        "message_count": session_message_count()
+    }})
+    docs = [doc async for doc in db_conn.sessions.aggregate(pipeline)]
+
+    next_cursor = None
+    if limit is not None and len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_session_cursor(docs[-1]["created_at"], docs[-1]["_id"])
+
+    sessions = [
+        ChatSessionResponse(
             id=str(doc["_id"]),
             language=doc["language"],
             created_at=doc["created_at"],
-            message_count=len(doc.get("messages", []))
-        ))
-    return sessions
+            message_count=doc["message_count"]
+        )
+        for doc in docs
+    ]
+    return sessions, next_cursor
 
-async def get_session_by_id(session_id: str, user_id: str):
+async def find_user_session(session_id: str, user_id: str, projection: dict = None):
     db_conn = get_db()
     try:
-        doc = await db_conn.sessions.find_one({"_id": ObjectId(session_id), "user_id": user_id})
+        doc = await db_conn.sessions.find_one({"_id": ObjectId(session_id), "user_id": user_id}, projection)
     except Exception:
          raise HTTPException(status_code=400, detail="Invalid session ID format")
          
     if not doc:
         raise HTTPException(status_code=404, detail="Session not found")
+    return doc
+
+async def get_session_by_id(session_id: str, user_id: str, messages_limit: int = None):
+    """
+    The session with its latest messages_limit messages (oldest first). When older
+    messages exist, messages_before is the `before` value for get_session_messages.
+    """
+    doc = await find_user_session(session_id, user_id)
     
+    messages, messages_before = await message_page(doc, messages_limit or settings.SESSION_MESSAGES_PAGE_SIZE)
+    doc.pop("message_count", None)
     doc["id"] = str(doc.pop("_id"))
+    doc["messages"] = messages
+    doc["messages_before"] = messages_before
     return doc
 
+async def get_session_messages(session_id: str, user_id: str, limit: int, before: int = None):
+    """An older page of a session's messages, walking back with the returned before value"""
+    doc = await find_user_session(session_id, user_id, {"messages": 1})
+    messages, messages_before = await message_page(doc, limit, before)
+    return {"messages": messages, "before": messages_before}
+
 async def delete_session(session_id: str, user_id: str):
     db_conn = get_db()
     try:
@@ -39,4 +104,7 @@ async def delete_session(session_id: str, user_id: str):
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Session not found or permission denied")
     
+    session_cache.invalidate(session_id)
+    await delete_messages(session_id)
+    
     return {"message": "Session deleted successfully"}
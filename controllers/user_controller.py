@@ -2,6 +2,7 @@ from fastapi import HTTPException
 from database import get_db
 from datetime import datetime
 from config import settings
+from services.user_cache import user_cache
 import hashlib
 import time
 
@@ -33,6 +34,7 @@ async def update_user_profile(email: str, profile_data: dict):
         {"email": email},
         {"$set": update_dict}
     )
+    await user_cache.invalidate(email)
     
     updated_user = await db_conn.users.find_one({"email": email})
     updated_user.pop("hashed_password", None)
@@ -1,27 +1,191 @@
 import motor.motor_asyncio
 import os
+import time
 from dotenv import load_dotenv
+from pymongo import ASCENDING, DESCENDING, IndexModel, monitoring
+from pymongo.write_concern import WriteConcern
+from config import settings
+from services.metrics import MONGO_SECONDS
 
 load_dotenv()
 
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
 DB_NAME = "smart_code_reviewer"
 
+# Every index the app's queries rely on, by collection. Ensured at startup;
+# create_index is a no-op for indexes that already exist with the same spec.
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True)
+    ],
+    "sessions": [
+        # Session listing: keyset pages on (created_at, _id), newest first
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="user_created_id")
+    ],
+    "messages": [
+        # Chat history pages and the migration's upserts
+        IndexModel([("session_id", ASCENDING), ("seq", ASCENDING)], name="session_seq", unique=True)
+    ],
+    "review_jobs": [
+        IndexModel([("status", ASCENDING), ("available_at", ASCENDING), ("created_at", ASCENDING)], name="status_available"),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created")
+    ],
+    "review_cache": [
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=settings.REVIEW_CACHE_TTL_SECONDS)
+    ],
+    "user_cache_invalidations": [
+        # Records only need to outlive a cached entry
+        IndexModel(
+            [("created_at", ASCENDING)],
+            name="created_at_ttl",
+            expireAfterSeconds=int(max(settings.USER_CACHE_TTL_SECONDS, settings.USER_CACHE_SYNC_SECONDS) * 2)
+        )
+    ]
+}
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Connection pool counters for the health endpoint, fed by the driver's pool events"""
+
+    def __init__(self):
+        self.open = 0
+        self.checked_out = 0
+        self.checkout_failures = 0
+        self.cleared = 0
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_check_out_started(self, event): pass
+
+    def pool_cleared(self, event):
+        self.cleared += 1
+
+    def connection_created(self, event):
+        self.open += 1
+
+    def connection_closed(self, event):
+        self.open -= 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "open_connections": self.open,
+            "checked_out": self.checked_out,
+            "checkout_failures": self.checkout_failures,
+            "pool_clears": self.cleared,
+            "max_pool_size": settings.MONGO_MAX_POOL_SIZE,
+            "min_pool_size": settings.MONGO_MIN_POOL_SIZE
+        }
+
+class CommandTimer(monitoring.CommandListener):
+    """Feeds every command's latency into the mongo_command_duration_seconds histogram"""
+
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self._collections[(event.connection_id, event.request_id)] = collection if isinstance(collection, str) else ""
+
+    def succeeded(self, event):
+        self._observe(event, "ok")
+
+    def failed(self, event):
+        self._observe(event, "error")
+
+    def _observe(self, event, outcome: str):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        MONGO_SECONDS.labels(event.command_name, collection, outcome).observe(event.duration_micros / 1_000_000)
+
 class Database:
     client: motor.motor_asyncio.AsyncIOMotorClient = None
     db: motor.motor_asyncio.AsyncIOMotorDatabase = None
+    pool_stats: PoolStats = PoolStats()
+    command_timer: CommandTimer = CommandTimer()
+    # "collection.index" names that could not be created; the errors are only logged,
+    # since they can contain data (a duplicate key's value) and /health/db is public
+    failed_indexes: set = set()
 
 db = Database()
 
+def _client_options() -> dict:
+    return {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGO_SOCKET_TIMEOUT_MS,
+        "event_listeners": [db.pool_stats, db.command_timer] if settings.METRICS_ENABLED else [db.pool_stats]
+    }
+
+def _write_concern():
+    w = settings.MONGO_WRITE_CONCERN
+    if not w and not settings.MONGO_WRITE_JOURNAL:
+        return None
+    return WriteConcern(
+        w=(int(w) if w.isdigit() else w) or None,
+        j=True if settings.MONGO_WRITE_JOURNAL else None
+    )
+
 async def connect_to_mongo():
     try:
-        db.client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URL)   
+        db.client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URL, **_client_options())
         await db.client.admin.command('ping')
-        db.db = db.client[DB_NAME]
+        db.db = db.client.get_database(DB_NAME, write_concern=_write_concern())
         print(f"Successfully connected to MongoDB: {DB_NAME}")
     except Exception as e:
         print(f"Could not connect to MongoDB: {e}")
         raise e
+    if settings.MONGO_ENSURE_INDEXES:
+        await ensure_indexes()
+
+async def ensure_indexes():
+    """
+    Create every index in INDEXES. A failure (e.g. duplicate emails blocking the
+    unique index, or an existing index with different options) is logged and
+    reported as "error" by /health/db instead of stopping the app.
+    """
+    for collection, indexes in INDEXES.items():
+        for index in indexes:
+            name = index.document["name"]
+            try:
+                await db.db[collection].create_indexes([index])
+                db.failed_indexes.discard(f"{collection}.{name}")
+            except Exception as e:
+                db.failed_indexes.add(f"{collection}.{name}")
+                print(f"Could not create index {collection}.{name}: {e}")
+
+async def index_status() -> dict:
+    """Per declared index: "ok", "missing", or "error" when creating it failed (details are in the logs)"""
+    status = {}
+    for collection, indexes in INDEXES.items():
+        existing = set()
+        async for info in db.db[collection].list_indexes():
+            existing.add(info["name"])
+        for index in indexes:
+            name = index.document["name"]
+            key = f"{collection}.{name}"
+            if name in existing:
+                status[key] = "ok"
+            else:
+                status[key] = "error" if key in db.failed_indexes else "missing"
+    return status
+
+async def ping_ms() -> float:
+    start = time.perf_counter()
+    await db.client.admin.command('ping')
+    return round((time.perf_counter() - start) * 1000, 2)
 
 async def close_mongo_connection():
     if db.client:
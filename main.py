@@ -1,17 +1,32 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from config import settings
-from database import connect_to_mongo, close_mongo_connection
+from database import connect_to_mongo, close_mongo_connection, db, index_status, ping_ms
+from services.job_queue import JobWorkerPool
+from controllers.job_controller import run_review_job
+from utils.auth import shutdown_password_executor
+from services.llm_resilience import LLMUnavailableError
 from routes import auth, users, review, chat, sessions
-from models.schemas import HealthResponse
+from models.schemas import HealthResponse, DatabaseHealthResponse
+from services.metrics import render_metrics
+from utils.log import configure_logging
+from utils.telemetry import RequestTelemetryMiddleware
 import uvicorn
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print(f"Allowed Origins: {settings.ALLOWED_ORIGINS}")
     await connect_to_mongo()
+    job_workers = None
+    if settings.JOB_INPROCESS_WORKERS > 0:
+        job_workers = JobWorkerPool(run_review_job, concurrency=settings.JOB_INPROCESS_WORKERS)
+        await job_workers.start()
     yield
+    if job_workers:
+        await job_workers.stop()
+    shutdown_password_executor()
     await close_mongo_connection()
 
 app = FastAPI(
@@ -21,18 +36,20 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-from fastapi import Request
-import time
+from fastapi import Request, Response
 
-# Logging Middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = (time.time() - start_time) * 1000
-    formatted_process_time = "{0:.2f}".format(process_time)
-    print(f"DEBUG: {request.method} {request.url.path} - Status: {response.status_code} - Origin: {request.headers.get('origin')} - Time: {formatted_process_time}ms")
-    return response
+# Request metrics and structured access log
+configure_logging()
+app.add_middleware(RequestTelemetryMiddleware)
+
+@app.exception_handler(LLMUnavailableError)
+async def llm_unavailable_handler(request: Request, exc: LLMUnavailableError):
+    # Throttled, retries exhausted or circuit open: tell clients when to come back
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after_seconds)}
+    )
 
 # CORS Middleware
 app.add_middleware(
@@ -42,6 +59,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include Routers
@@ -63,6 +81,28 @@ async def health_check():
         "message": "Service is running"
     }
 
+@app.get("/health/db", response_model=DatabaseHealthResponse)
+async def database_health_check():
+    """MongoDB ping, connection pool usage and whether every declared index exists"""
+    try:
+        latency = await ping_ms()
+        indexes = await index_status()
+    except Exception as e:
+        # Driver errors can name hosts and data; they are logged, and only the error type is returned
+        print(f"Database health check failed: {e}")
+        return {"status": "unhealthy", "error": type(e).__name__, "pool": db.pool_stats.snapshot(), "indexes": {}}
+    
+    status = "healthy" if all(state == "ok" for state in indexes.values()) else "degraded"
+    return {"status": status, "ping_ms": latency, "pool": db.pool_stats.snapshot(), "indexes": indexes}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus exposition: request, agent, LLM and Mongo latency plus LLM usage and fallbacks"""
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 if __name__ == "__main__":
     import os
     reload = os.getenv("DEBUG", "True").lower() == "true"
@@ -0,0 +1,26 @@
+"""
+Move chat messages embedded in session documents into the messages collection.
+Safe to re-run and to run while the API is serving traffic:
+
+    python migrate_messages.py [--batch-size 100]
+
+Sessions that are not migrated up front are moved on their next chat turn when
+CHAT_MESSAGE_STORAGE=collection.
+"""
+import argparse
+import asyncio
+from database import connect_to_mongo, close_mongo_connection
+from services.message_store import migrate_all_sessions
+
+async def main(batch_size: int):
+    await connect_to_mongo()
+    try:
+        sessions, messages = await migrate_all_sessions(batch_size)
+        print(f"Migrated {messages} messages from {sessions} sessions")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move embedded chat messages into the messages collection")
+    parser.add_argument("--batch-size", type=int, default=100)
+    asyncio.run(main(parser.parse_args().batch_size))
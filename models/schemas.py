@@ -1,10 +1,14 @@
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+from datetime import datetime
 
 class CodeReviewRequest(BaseModel):
     """Request model for code review"""
     code: str = Field(..., min_length=1, description="Code to be reviewed")
     language: str = Field(..., description="Programming language (javascript, typescript, python)")
+    use_cache: bool = Field(True, description="Set to false to skip cached results and force a fresh review")
+    debug: bool = Field(False, description="Include the per-span timing trace in the response")
+    engine: Optional[str] = Field(None, description="Review engine: multi_agent (one LLM call per agent) or combined (one call for all); defaults to REVIEW_ENGINE")
     
     @validator('language')
     def validate_language(cls, v):
@@ -13,6 +17,24 @@ class CodeReviewRequest(BaseModel):
             raise ValueError(f'Language must be one of: {", ".join(allowed_languages)}')
         return v.lower()
     
+    @validator('engine')
+    def validate_engine(cls, v):
+        if v is not None and v.lower() not in ('multi_agent', 'combined'):
+            raise ValueError('Engine must be one of: multi_agent, combined')
+        return v.lower() if v else v
+    
+    @validator('code')
+    def validate_code(cls, v):
+        if len(v.strip()) == 0:
+            raise ValueError('Code cannot be empty')
+        return v
+
+class CodeReReviewRequest(BaseModel):
+    """Request model for re-reviewing an edited version of a session's code"""
+    session_id: str = Field(..., description="Session whose code was edited")
+    code: str = Field(..., min_length=1, description="The full edited code")
+    debug: bool = Field(False, description="Include the per-span timing trace in the response")
+    
     @validator('code')
     def validate_code(cls, v):
         if len(v.strip()) == 0:
@@ -27,12 +49,48 @@ class CodeReviewResponse(BaseModel):
     reasoning: str = Field(..., description="Detailed explanation of the score and feedback")
     language: str = Field(..., description="Programming language analyzed")
     session_id: Optional[str] = None
+    debug: Optional[Dict[str, Any]] = Field(None, description="Timing trace, when requested with debug=true")
+
+class BatchFileResult(BaseModel):
+    """Review outcome for one file of a batch"""
+    filename: str
+    language: Optional[str] = None
+    score: Optional[int] = Field(None, ge=0, le=10)
+    issues: List[str] = Field(default_factory=list)
+    suggestions: List[str] = Field(default_factory=list)
+    reasoning: Optional[str] = None
+    error: Optional[str] = Field(None, description="Why the file was skipped, if it was")
+
+class BatchReviewSummary(BaseModel):
+    """Roll-up sent after every file of a batch has been handled"""
+    total_files: int
+    reviewed: int
+    failed: int
+    score: Optional[int] = Field(None, ge=0, le=10, description="Line-weighted average score of reviewed files")
+
+class ReviewJobResponse(BaseModel):
+    """Status of a queued review job"""
+    job_id: str
+    status: str = Field(..., description="queued, running, completed or failed")
+    attempts: int = 0
+    result: Optional[CodeReviewResponse] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
 
 class HealthResponse(BaseModel):
     """Health check response"""
     status: str
     message: str
 
+class DatabaseHealthResponse(BaseModel):
+    """MongoDB reachability, connection pool counters and declared index status"""
+    status: str
+    ping_ms: Optional[float] = None
+    error: Optional[str] = None
+    pool: Dict[str, int]
+    indexes: Dict[str, str]
+
 class CodeGenerationRequest(BaseModel):
     """Request model for code generation"""
     prompt: str = Field(..., min_length=1, description="Description of the code to generate")
@@ -49,12 +107,17 @@ class ChatMessage(BaseModel):
     content: str
 
 class ChatRequest(BaseModel):
-    """Request model for follow-up chat"""
-    code: str = Field(..., description="The code context")
-    review_context: str = Field(..., description="The previous review feedback")
-    messages: List[ChatMessage] = Field(..., description="Conversation history")
-    language: str = Field(..., description="Programming language")
+    """
+    Request model for follow-up chat. Either send the full context (code,
+    review_context, messages, language) or just session_id + message and let
+    the server load the rest from the stored session.
+    """
+    code: Optional[str] = Field(None, description="The code context")
+    review_context: Optional[str] = Field(None, description="The previous review feedback")
+    messages: Optional[List[ChatMessage]] = Field(None, description="Conversation history")
+    language: Optional[str] = Field(None, description="Programming language")
     session_id: Optional[str] = None
+    message: Optional[str] = Field(None, min_length=1, description="New user message; context comes from the session")
 
 class ChatResponse(BaseModel):
     """Response model for chat"""
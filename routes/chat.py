@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
 from typing import Annotated
 from routes.deps import get_current_user
 from models.schemas import ChatRequest, ChatResponse
-from controllers.chat_controller import chat_followup_logic
+from controllers.chat_controller import chat_followup_logic, stream_chat_followup, resolve_chat_request
+from utils.sse import SSE_HEADERS
 
 router = APIRouter(prefix="/api", tags=["chat"])
 
@@ -11,15 +13,22 @@ async def chat_endpoint(
     request: ChatRequest,
     current_user: Annotated[dict, Depends(get_current_user)]
 ):
-    history = [{"role": msg.role, "content": msg.content} for msg in request.messages]
+    chat_args = await resolve_chat_request(request, current_user["id"])
     
-    response_content = await chat_followup_logic(
-        code=request.code,
-        review_context=request.review_context,
-        messages=history,
-        language=request.language,
-        session_id=request.session_id,
-        user_id=current_user["id"]
-    )
+    response_content = await chat_followup_logic(**chat_args)
     
     return ChatResponse(content=response_content)
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(
+    request: ChatRequest,
+    http_request: Request,
+    current_user: Annotated[dict, Depends(get_current_user)]
+):
+    chat_args = await resolve_chat_request(request, current_user["id"])
+    
+    return StreamingResponse(
+        stream_chat_followup(**chat_args, is_disconnected=http_request.is_disconnected),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
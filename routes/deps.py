@@ -2,6 +2,7 @@ from fastapi import HTTPException, Depends
 from fastapi.security import OAuth2PasswordBearer
 from typing import Annotated
 from database import get_db
+from services.user_cache import user_cache
 from utils.auth import decode_access_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/signin")
@@ -11,11 +12,18 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     
+    subject = payload.get("sub")
+    await user_cache.sync()
+    user = user_cache.get(subject)
+    if user is not None:
+        return user
+    
     db_conn = get_db()
     if db_conn is None:
         raise HTTPException(status_code=500, detail="Database connection not available")
         
-    user = await db_conn.users.find_one({"email": payload.get("sub")})
+    user = await db_conn.users.find_one({"email": subject})
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
+    user_cache.set(subject, user)
     return user
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, UploadFile, File, Form
-from typing import Annotated, Optional
+from fastapi.responses import StreamingResponse
+from typing import Annotated, Optional, List
 from routes.deps import get_current_user
-from models.schemas import CodeReviewRequest, CodeReviewResponse, CodeGenerationRequest, CodeGenerationResponse
-from controllers.review_controller import analyze_code, analyze_file, generate_code_response
+from models.schemas import CodeReviewRequest, CodeReReviewRequest, CodeReviewResponse, CodeGenerationRequest, CodeGenerationResponse, ReviewJobResponse
+from controllers.review_controller import analyze_code, rereview_session, analyze_file, stream_code_review, collect_batch_members, stream_batch_review, generate_code_response, get_review_cache_stats, get_model_route_stats
+from controllers.job_controller import submit_review_job, get_review_job, stream_review_job
+from utils.sse import SSE_HEADERS
 
 router = APIRouter(prefix="/api", tags=["review"])
 
@@ -11,15 +14,81 @@ async def review_endpoint(
     request: CodeReviewRequest,
     current_user: Annotated[dict, Depends(get_current_user)]
 ):
-    return await analyze_code(request.code, request.language, current_user["id"])
+    return await analyze_code(request.code, request.language, current_user["id"], request.use_cache, request.debug, request.engine)
+
+@router.post("/review/rereview", response_model=CodeReviewResponse)
+async def rereview_endpoint(
+    request: CodeReReviewRequest,
+    current_user: Annotated[dict, Depends(get_current_user)]
+):
+    return await rereview_session(request.session_id, request.code, current_user["id"], request.debug)
+
+@router.post("/review/stream")
+async def review_stream_endpoint(
+    request: CodeReviewRequest,
+    current_user: Annotated[dict, Depends(get_current_user)]
+):
+    return StreamingResponse(
+        stream_code_review(request.code, request.language, current_user["id"], request.use_cache, request.debug, request.engine),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+@router.post("/review/jobs", response_model=ReviewJobResponse, status_code=202)
+async def review_job_submit_endpoint(
+    request: CodeReviewRequest,
+    current_user: Annotated[dict, Depends(get_current_user)]
+):
+    return await submit_review_job(request.code, request.language, current_user["id"], request.use_cache, request.engine)
+
+@router.get("/review/jobs/{job_id}", response_model=ReviewJobResponse)
+async def review_job_status_endpoint(
+    job_id: str,
+    current_user: Annotated[dict, Depends(get_current_user)]
+):
+    return await get_review_job(job_id, current_user["id"])
+
+@router.get("/review/jobs/{job_id}/events")
+async def review_job_events_endpoint(
+    job_id: str,
+    current_user: Annotated[dict, Depends(get_current_user)]
+):
+    return StreamingResponse(
+        stream_review_job(job_id, current_user["id"]),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
 
 @router.post("/review/file", response_model=CodeReviewResponse)
 async def review_file_endpoint(
     file: UploadFile = File(...),
-    language: Optional[str] = Form(None)
+    language: Optional[str] = Form(None),
+    use_cache: bool = Form(True)
+):
+    return await analyze_file(file, language, use_cache)
+
+@router.post("/review/batch")
+async def review_batch_endpoint(
+    current_user: Annotated[dict, Depends(get_current_user)],
+    files: List[UploadFile] = File(...),
+    language: Optional[str] = Form(None),
+    use_cache: bool = Form(True)
 ):
-    return await analyze_file(file, language)
+    members = await collect_batch_members(files)
+    return StreamingResponse(
+        stream_batch_review(members, language, use_cache),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+@router.get("/review/cache/stats")
+async def review_cache_stats_endpoint(current_user: Annotated[dict, Depends(get_current_user)]):
+    return get_review_cache_stats()
+
+@router.get("/review/models/stats")
+async def review_model_stats_endpoint(current_user: Annotated[dict, Depends(get_current_user)]):
+    return get_model_route_stats()
 
 @router.post("/generate", response_model=CodeGenerationResponse)
 async def generate_endpoint(request: CodeGenerationRequest):
-    return generate_code_response(request.prompt, request.language)
+    return await generate_code_response(request.prompt, request.language)
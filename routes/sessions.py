@@ -1,21 +1,47 @@
-from fastapi import APIRouter, Depends
-from typing import Annotated, List
+from fastapi import APIRouter, Depends, Query, Response
+from typing import Annotated, List, Optional
+from config import settings
 from routes.deps import get_current_user
 from models.chat import ChatSessionResponse
-from controllers.session_controller import get_user_sessions, get_session_by_id, delete_session
+from controllers.session_controller import get_user_sessions, get_session_by_id, get_session_messages, delete_session
 
 router = APIRouter(prefix="/api/sessions", tags=["sessions"])
 
 @router.get("", response_model=List[ChatSessionResponse])
-async def read_sessions(current_user: Annotated[dict, Depends(get_current_user)]):
-    return await get_user_sessions(current_user["id"])
+async def read_sessions(
+    response: Response,
+    current_user: Annotated[dict, Depends(get_current_user)],
+    limit: Optional[int] = Query(None, ge=1, le=settings.SESSION_PAGE_MAX_SIZE, description="Page size; omit (without a cursor) to list every session"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page")
+):
+    """
+    The user's sessions, newest first. Without `limit` or `cursor` every session is
+    returned, as before pagination existed. Clients opt in to paging by passing `limit`;
+    the next page's cursor then comes in the X-Next-Cursor header.
+    """
+    if cursor and limit is None:
+        limit = settings.SESSION_PAGE_SIZE
+    sessions, next_cursor = await get_user_sessions(current_user["id"], limit, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return sessions
 
 @router.get("/{session_id}")
 async def read_session_detail(
     session_id: str,
-    current_user: Annotated[dict, Depends(get_current_user)]
+    current_user: Annotated[dict, Depends(get_current_user)],
+    messages_limit: int = Query(settings.SESSION_MESSAGES_PAGE_SIZE, ge=1, le=settings.SESSION_PAGE_MAX_SIZE)
+):
+    return await get_session_by_id(session_id, current_user["id"], messages_limit)
+
+@router.get("/{session_id}/messages")
+async def read_session_messages(
+    session_id: str,
+    current_user: Annotated[dict, Depends(get_current_user)],
+    limit: int = Query(settings.SESSION_MESSAGES_PAGE_SIZE, ge=1, le=settings.SESSION_PAGE_MAX_SIZE),
+    before: Optional[int] = Query(None, ge=0, description="messages_before / before value from the previous page")
 ):
-    return await get_session_by_id(session_id, current_user["id"])
+    return await get_session_messages(session_id, current_user["id"], limit, before)
 
 @router.delete("/{session_id}")
 async def remove_session(
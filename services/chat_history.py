@@ -0,0 +1,52 @@
+from typing import Dict, List, NamedTuple
+from config import settings
+
+def estimate_tokens(text: str) -> int:
+    """Rough local token count (~4 characters per token for English and code); no tokenizer needed"""
+    return (len(text) + 3) // 4
+
+def estimate_messages_tokens(messages: List[Dict[str, str]]) -> int:
+    # A few tokens of per-message overhead for the role markers
+    return sum(estimate_tokens(message["content"]) + 4 for message in messages)
+
+class HistoryPlan(NamedTuple):
+    """How one chat turn's history is split between the rolling summary and the verbatim window"""
+    to_summarize: List[Dict[str, str]]  # not yet summarized, falling out of the window: fold into the summary now
+    recent: List[Dict[str, str]]        # sent verbatim
+    summarized_count: int               # messages covered by the summary once to_summarize is folded in
+
+def plan_history(messages: List[Dict[str, str]], summarized_count: int = 0, token_budget: int = None, recent_turns: int = None) -> HistoryPlan:
+    """
+    Keep the last recent_turns exchanges verbatim (fewer if they exceed the token
+    budget) and represent everything before them by the rolling summary.
+    Messages leaving the window are folded in batches of CHAT_SUMMARY_MIN_MESSAGES
+    so the summary is refreshed every few turns rather than on every one.
+    """
+    token_budget = token_budget if token_budget is not None else settings.CHAT_HISTORY_TOKEN_BUDGET
+    recent_turns = recent_turns if recent_turns is not None else settings.CHAT_RECENT_TURNS
+    summarized_count = min(summarized_count, len(messages))
+
+    window_start, trimmed_for_budget = _window_start(messages, summarized_count, token_budget, recent_turns)
+    pending = messages[summarized_count:window_start]
+    if pending and (trimmed_for_budget or len(pending) >= settings.CHAT_SUMMARY_MIN_MESSAGES):
+        return HistoryPlan(pending, messages[window_start:], window_start)
+
+    # Not worth a summary call yet: the few messages past the window still fit, send them as-is
+    return HistoryPlan([], messages[summarized_count:], summarized_count)
+
+def recent_window(messages: List[Dict[str, str]], token_budget: int = None, recent_turns: int = None) -> List[Dict[str, str]]:
+    """The verbatim window alone, for conversations with no session to keep a summary on"""
+    token_budget = token_budget if token_budget is not None else settings.CHAT_HISTORY_TOKEN_BUDGET
+    recent_turns = recent_turns if recent_turns is not None else settings.CHAT_RECENT_TURNS
+    window_start, _ = _window_start(messages, 0, token_budget, recent_turns)
+    return messages[window_start:]
+
+def _window_start(messages, floor: int, token_budget: int, recent_turns: int):
+    """First message of the verbatim window, and whether the token budget (not the turn count) set it"""
+    window_start = max(len(messages) - 2 * recent_turns, floor)
+    trimmed_for_budget = False
+    # The newest message is always sent, even if it alone exceeds the budget
+    while window_start < len(messages) - 1 and estimate_messages_tokens(messages[window_start:]) > token_budget:
+        window_start += 1
+        trimmed_for_budget = True
+    return window_start, trimmed_for_budget
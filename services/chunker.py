@@ -0,0 +1,123 @@
+import ast
+from typing import List, NamedTuple, Tuple
+
+class CodeChunk(NamedTuple):
+    """A contiguous slice of the source, with 1-based inclusive line numbers"""
+    start_line: int
+    end_line: int
+    text: str
+
+def split_code(code: str, language: str, max_chars: int) -> List[CodeChunk]:
+    """
+    Split code into reviewable chunks of at most max_chars, cutting only between
+    top-level definitions where possible. Small inputs come back as a single chunk.
+    """
+    lines = code.split("\n")
+    if len(code) <= max_chars:
+        return [CodeChunk(1, len(lines), code)]
+
+    units = None
+    if language.lower() == "python":
+        units = _python_units(code, lines, max_chars)
+    if units is None:
+        units = _heuristic_units(lines)
+
+    return _pack(units, lines, max_chars)
+
+def _python_units(code: str, lines: List[str], max_chars: int):
+    """
+    Line ranges of top-level statements, using ast so functions and classes stay
+    whole. A class too large for one chunk is cut between its methods instead.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+
+    starts = []
+    for node in tree.body:
+        start = _node_start(node)
+        starts.append(start)
+        if isinstance(node, ast.ClassDef):
+            size = sum(len(line) + 1 for line in lines[start - 1:node.end_lineno])
+            if size > max_chars:
+                starts.extend(_node_start(child) for child in node.body[1:])
+
+    # Comments and blank lines between definitions belong to the definition that follows
+    return _ranges_from_starts(starts, len(lines))
+
+def _node_start(node) -> int:
+    start = node.lineno
+    for decorator in getattr(node, "decorator_list", []):
+        start = min(start, decorator.lineno)
+    return start
+
+def _heuristic_units(lines: List[str]):
+    """
+    Brace/indent heuristic for everything else: a unit ends where brace depth is
+    back to zero and the next non-blank line starts in column 0.
+    """
+    starts = [1]
+    depth = 0
+    for index, line in enumerate(lines[:-1]):
+        depth = max(depth + line.count("{") - line.count("}"), 0)
+        if depth:
+            continue
+        following = lines[index + 1]
+        if following.strip() and not following[0].isspace() and not following.lstrip().startswith(("}", ")", "]")):
+            starts.append(index + 2)
+    return _ranges_from_starts(starts, len(lines))
+
+def _ranges_from_starts(starts: List[int], line_count: int) -> List[Tuple[int, int]]:
+    if not starts:
+        return [(1, line_count)]
+    starts = sorted(set(starts))
+    starts[0] = 1
+    ends = [start - 1 for start in starts[1:]] + [line_count]
+    return list(zip(starts, ends))
+
+def _pack(units: List[Tuple[int, int]], lines: List[str], max_chars: int) -> List[CodeChunk]:
+    """Greedily merge adjacent units up to max_chars; hard-split any single unit that is too large"""
+    chunks = []
+    current_start, current_end, current_size = None, None, 0
+
+    def flush():
+        if current_start is not None:
+            chunks.append(CodeChunk(current_start, current_end, "\n".join(lines[current_start - 1:current_end])))
+
+    for start, end in units:
+        size = sum(len(line) + 1 for line in lines[start - 1:end])
+        if size > max_chars:
+            flush()
+            current_start, current_end, current_size = None, None, 0
+            chunks.extend(_split_lines(start, end, lines, max_chars))
+            continue
+        if current_start is not None and current_size + size > max_chars:
+            flush()
+            current_start, current_size = None, 0
+        if current_start is None:
+            current_start = start
+        current_end = end
+        current_size += size
+
+    flush()
+    return chunks
+
+def _split_lines(start: int, end: int, lines: List[str], max_chars: int) -> List[CodeChunk]:
+    chunks = []
+    chunk_start, size = start, 0
+    for number in range(start, end + 1):
+        line = lines[number - 1]
+        if size and size + len(line) + 1 > max_chars:
+            chunks.append(CodeChunk(chunk_start, number - 1, "\n".join(lines[chunk_start - 1:number - 1])))
+            chunk_start, size = number, 0
+        if len(line) + 1 > max_chars:
+            # A single overlong line (minified code): cut it into character slices
+            for offset in range(0, len(line), max_chars):
+                chunks.append(CodeChunk(number, number, line[offset:offset + max_chars]))
+            chunk_start, size = number + 1, 0
+            continue
+        size += len(line) + 1
+    if chunk_start <= end:
+        chunks.append(CodeChunk(chunk_start, end, "\n".join(lines[chunk_start - 1:end])))
+    return chunks
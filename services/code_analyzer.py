@@ -1,136 +1,496 @@
 import json
+import asyncio
 import operator
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator, Tuple
 from functools import partial
 from config import settings
 from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-from langgraph.graph import StateGraph, END
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import StateGraph, START, END
 
 # Import modular agents
 from agents.state import ReviewState
-from agents.security import security_node
-from agents.performance import performance_node
-from agents.style import style_node
-from agents.aggregator import aggregator_node
+from agents.registry import AGENT_REGISTRY, enabled_agents, run_agent, arun_agent
+from agents.aggregator import aggregator_node, merge_chunk_results, tag_with_line_range
+from agents.combined import COMBINED_REVIEWER, build_combined_chain, run_combined, arun_combined, agent_updates
+from services.chunker import CodeChunk, split_code
+from services.static_analysis import run_static_analysis, should_skip_llm, local_review, findings_text, findings_in_range
+from services.llm_resilience import LLMUnavailableError, ResilientChatModel, guard_for
+from services.llm_cassette import CassetteChatModel, cassette_for
+from services.metrics import ANALYZER_FALLBACKS
+from services.tracing import TracedJsonOutputParser, span
+from services.model_router import RouteMetricsCallback, review_routes, route_model
 
 class CodeAnalyzer:    
     def __init__(self):
-        # Initialize LangChain Groq model
-        self.llm = ChatGroq(
-            api_key=settings.GROQ_API_KEY,
-            model_name=settings.GROQ_MODEL,
-            temperature=0.2
+        # Builds the model for each routed model name; self.llm is the default (GROQ_MODEL)
+        self.model_factory = self.build_model
+        self.llm = self.build_model(settings.GROQ_MODEL)
+        self.parser = TracedJsonOutputParser()
+        self.compile_chains()
+
+    @staticmethod
+    def build_model(model_name: str):
+        if settings.LLM_CASSETTE_MODE == "replay":
+            # Served from the recorded cassette alone: no provider, no network
+            return CassetteChatModel(cassette=cassette_for(settings.LLM_CASSETTE_PATH), model_name=model_name, mode="replay")
+
+        # Retries are owned by the resilience layer (quotas, Retry-After, circuit
+        # breaker), so the SDK's own are disabled.
+        model = ResilientChatModel(
+            inner=ChatGroq(
+                api_key=settings.GROQ_API_KEY,
+                model_name=model_name,
+                temperature=0.2,
+                max_retries=0,
+                request_timeout=settings.LLM_REQUEST_TIMEOUT
+            ),
+            guard=guard_for(model_name)
         )
-        self.parser = JsonOutputParser()
-        self.graph = self._build_review_graph()
+        if settings.LLM_CASSETTE_MODE == "record":
+            return CassetteChatModel(inner=model, cassette=cassette_for(settings.LLM_CASSETTE_PATH), model_name=model_name, mode="record")
+        return model
 
-    def _build_review_graph(self):
-        workflow = StateGraph(ReviewState)
+    def compile_chains(self):
+        """
+        Drop compiled chains and graphs. Each prompt | llm | parser chain is built once
+        per (task, model) on first use; requests only fill in variables.
+        Call again after swapping self.llm or self.model_factory.
+        """
+        self._models = {settings.GROQ_MODEL: self.llm}
+        self._chains = {}
+        # Compiled graphs keyed by the ((agent, model), ...) routes they run
+        self._graphs = {}
+
+    def model_for(self, model_name: str):
+        if model_name not in self._models:
+            self._models[model_name] = self.model_factory(model_name)
+        return self._models[model_name]
 
-        security_call = partial(security_node, llm=self.llm, parser=self.parser)
-        performance_call = partial(performance_node, llm=self.llm, parser=self.parser)
-        style_call = partial(style_node, llm=self.llm, parser=self.parser)
+    def chain_for(self, task: str, model_name: str):
+        key = (task, model_name)
+        if key not in self._chains:
+            llm = self.model_for(model_name).with_config(callbacks=[RouteMetricsCallback(task, model_name)])
+            if task in AGENT_REGISTRY:
+                chain = AGENT_REGISTRY[task].build_chain(llm, self.parser)
+            elif task == COMBINED_REVIEWER:
+                chain = build_combined_chain(llm, self.parser)
+            elif task == "generation":
+                chain = self._generation_prompt() | llm | self.parser
+            elif task == "chat":
+                chain = self._chat_prompt() | llm
+            else:
+                chain = ChatPromptTemplate.from_template(self._get_summary_template()) | llm
+            self._chains[key] = chain
+        return self._chains[key]
 
-        workflow.add_node("security_expert", security_call)
-        workflow.add_node("performance_guru", performance_call)
-        workflow.add_node("style_architect", style_call)
+    def graph_for(self, routes: Dict[str, str]):
+        key = tuple(routes.items())
+        if key not in self._graphs:
+            self._graphs[key] = self._build_review_graph(routes)
+        return self._graphs[key]
+
+    def _routed(self, result: Dict[str, Any], routes: Dict[str, str]) -> Dict[str, Any]:
+        """Record which provider and models produced a review"""
+        return {**result, "provider": settings.LLM_PROVIDER, "models": dict(routes)}
+
+    def _build_review_graph(self, routes: Dict[str, str]):
+        workflow = StateGraph(ReviewState)
+
+        # Each node carries a sync and an async implementation so the same compiled
+        # graph serves both invoke() and ainvoke()
+        for name, model_name in routes.items():
+            chain = self.chain_for(name, model_name)
+            if name == COMBINED_REVIEWER:
+                # One call fills every agent's fields, so the aggregator is unchanged
+                node = RunnableLambda(partial(run_combined, chain=chain), afunc=partial(arun_combined, chain=chain))
+            else:
+                spec = AGENT_REGISTRY[name]
+                node = RunnableLambda(partial(run_agent, spec=spec, chain=chain), afunc=partial(arun_agent, spec=spec, chain=chain))
+            workflow.add_node(name, node)
         workflow.add_node("aggregator", aggregator_node)
-        workflow.set_entry_point("security_expert")
-        workflow.add_edge("security_expert", "performance_guru")
-        workflow.add_edge("performance_guru", "style_architect")
-        workflow.add_edge("style_architect", "aggregator")
+
+        experts = list(routes)
+        if not experts:
+            workflow.add_edge(START, "aggregator")
+        elif settings.REVIEW_GRAPH_MODE == "sequential":
+            workflow.add_edge(START, experts[0])
+            for current, following in zip(experts, experts[1:]):
+                workflow.add_edge(current, following)
+            workflow.add_edge(experts[-1], "aggregator")
+        else:
+            # Fan out: every expert starts from the entry point at once, and the
+            # aggregator only runs after all of them have written their findings.
+            for expert in experts:
+                workflow.add_edge(START, expert)
+            workflow.add_edge(experts, "aggregator")
         workflow.add_edge("aggregator", END)
 
         return workflow.compile()
 
     # --- Public API Methods ---
 
-    def analyze_code(self, code: str, language: str) -> Dict[str, Any]:
+    def analyze_code(self, code: str, language: str, engine: str = None) -> Dict[str, Any]:
         """
-        Analyze code using a Multi-Agent LangGraph workflow
+        Analyze code using a Multi-Agent LangGraph workflow (or, with engine="combined", one combined call)
         """
         try:
-            initial_state = {
-                "code": code,
-                "language": language.upper(),
-                "security_issues": [],
-                "performance_issues": [],
-                "style_issues": [],
-                "suggestions": [],
-                "scores": [],
-                "final_result": {}
-            }
-            
-            final_output = self.graph.invoke(initial_state)
-            return final_output["final_result"]
+            with span("static_analysis"):
+                report = run_static_analysis(code, language)
+            if should_skip_llm(report, code):
+                return local_review(report, code, language)
+
+            routes = review_routes(language, len(code), engine)
+            final_output = self.graph_for(routes).invoke(self._initial_review_state(code, language, report))
+            return self._routed(final_output["final_result"], routes)
+            
+        except LLMUnavailableError:
+            # Provider outage or throttling: a 503 for the caller, never a mock result
+            raise
             
         except Exception as e:
-            print(f"DEBUG: LangGraph Workflow failed ({str(e)}). Using Mock Mode.")
-            return {
-                "score": 8,
-                "issues": ["Graph failed to execute, falling back to mock."],
-                "suggestions": ["Check API logs for graph connectivity."],
-                "reasoning": f"Multi-agent review failed: {str(e)[:100]}",
-                "language": language
-            }
+            return self._review_fallback(e, language)
+
+    async def aanalyze_code(self, code: str, language: str, engine: str = None) -> Dict[str, Any]:
+        """
+        Async variant of analyze_code; agent LLM calls are awaited on the event loop.
+        Inputs larger than REVIEW_CHUNK_MAX_CHARS are split and reviewed chunk by chunk.
+        """
+        try:
+            with span("static_analysis"):
+                report = run_static_analysis(code, language)
+            if should_skip_llm(report, code):
+                return local_review(report, code, language)
+
+            # Routed on the whole input, so every chunk of a large file gets the same models
+            routes = review_routes(language, len(code), engine)
+            chunks = split_code(code, language, settings.REVIEW_CHUNK_MAX_CHARS)
+            if len(chunks) > 1:
+                return self._routed(await self._areview_chunks(chunks, language, report, routes), routes)
+
+            final_output = await self.graph_for(routes).ainvoke(self._initial_review_state(code, language, report))
+            return self._routed(final_output["final_result"], routes)
+            
+        except LLMUnavailableError:
+            raise
+            
+        except Exception as e:
+            return self._review_fallback(e, language)
+
+    async def areview_changes(self, code: str, language: str, hunks: List[CodeChunk], known: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Review only the changed regions (hunks) of an edited file. Static analysis
+        still covers the whole file. Findings carried over from the previous review
+        are passed to the agents as known, so they are not reported again.
+        """
+        try:
+            with span("static_analysis"):
+                report = run_static_analysis(code, language)
+            if should_skip_llm(report, code):
+                return local_review(report, code, language)
+
+            # Routed on the size of the edit, which is what the agents see
+            routes = review_routes(language, sum(len(hunk.text) for hunk in hunks))
+            regions = [
+                CodeChunk(hunk.start_line + part.start_line - 1, hunk.start_line + part.end_line - 1, part.text)
+                for hunk in hunks
+                for part in split_code(hunk.text, language, settings.REVIEW_CHUNK_MAX_CHARS)
+            ]
+            return self._routed(await self._areview_chunks(regions, language, report, routes, known), routes)
+
+        except LLMUnavailableError:
+            raise
+
+        except Exception as e:
+            return self._review_fallback(e, language)
+
+    async def astream_review(self, code: str, language: str, engine: str = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Run the review graph and yield (node_name, state_update) as each node finishes.
+        Static findings come first as a "static_analysis" update. The combined reviewer's
+        update is split into one per agent. Inputs larger than REVIEW_CHUNK_MAX_CHARS are
+        chunked as in aanalyze_code, with one update per chunk and agent (issues tagged
+        with the chunk's lines). The last item always comes from the aggregator, falling
+        back to mock mode on failure.
+        """
+        try:
+            with span("static_analysis"):
+                report = run_static_analysis(code, language)
+            yield "static_analysis", {key: findings_text(report[key]) for key in ("security_issues", "performance_issues", "style_issues")}
+            if should_skip_llm(report, code):
+                yield "aggregator", {"final_result": local_review(report, code, language)}
+                return
+
+            routes = review_routes(language, len(code), engine)
+            chunks = split_code(code, language, settings.REVIEW_CHUNK_MAX_CHARS)
+            if len(chunks) > 1:
+                updates = asyncio.Queue()
+                review = asyncio.create_task(self._areview_chunks(chunks, language, report, routes, updates=updates))
+                try:
+                    # _areview_chunks ends the queue with None, also when a chunk fails
+                    while (item := await updates.get()) is not None:
+                        node_name, update, line_range = item
+                        for agent_update in self._agent_updates(node_name, update, language, line_range):
+                            yield agent_update
+                    result = await review
+                finally:
+                    review.cancel()
+                yield "aggregator", {"final_result": self._routed(result, routes)}
+                return
+
+            async for step in self.graph_for(routes).astream(self._initial_review_state(code, language, report), stream_mode="updates"):
+                for node_name, update in step.items():
+                    if node_name == "aggregator":
+                        yield node_name, {**update, "final_result": self._routed(update["final_result"], routes)}
+                    else:
+                        for agent_update in self._agent_updates(node_name, update, language):
+                            yield agent_update
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            yield "aggregator", {"final_result": self._review_fallback(e, language)}
 
     def generate_code(self, prompt: str, language: str) -> Dict[str, Any]:
         """
         Generate code based on a prompt using LangChain
         """
         try:
-            prompt_template = ChatPromptTemplate.from_messages([
-                ("system", "You are an expert {language} developer. Generate clean, efficient, and well-documented code. You must respond with valid JSON only."),
-                ("user", self._get_generation_prompt_template())
-            ])
+            result = self.chain_for("generation", route_model("generation", language, len(prompt))).invoke({
+                "prompt": prompt,
+                "language": language
+            })
             
-            chain = prompt_template | self.llm | self.parser
+            return result
+            
+        except LLMUnavailableError:
+            raise
             
-            result = chain.invoke({
+        except Exception as e:
+            return self._generation_fallback(e, prompt, language)
+
+    async def agenerate_code(self, prompt: str, language: str) -> Dict[str, Any]:
+        """
+        Async variant of generate_code
+        """
+        try:
+            result = await self.chain_for("generation", route_model("generation", language, len(prompt))).ainvoke({
                 "prompt": prompt,
                 "language": language
             })
             
             return result
             
+        except LLMUnavailableError:
+            raise
+            
         except Exception as e:
-            print(f"DEBUG: LangChain Generation API Call failed ({str(e)}). Using Mock Mode.")
-            return {
-                "code": f"// Mock code for: {prompt}\nfunction example() {{\n  console.log('AI Generation is currently in mock mode.');\n}}",
-                "explanation": "This is a fallback response since the AI service encountered an error.",
-                "language": language
-            }
+            return self._generation_fallback(e, prompt, language)
     
-    def chat(self, code: str, review_context: str, messages: List[Dict[str, str]], language: str) -> str:
+    def chat(self, code: str, review_context: str, messages: List[Dict[str, str]], language: str, history_summary: str = "") -> str:
         """
         Hold a follow-up conversation about the code review
         """
         try:
-            history = []
-            for msg in messages:
-                role = "human" if msg["role"] == "user" else "ai"
-                history.append((role, msg["content"]))
-
-            prompt_template = ChatPromptTemplate.from_messages([
-                ("system", self._get_chat_system_template()),
-                *history
-            ])
+            result = self.chain_for("chat", route_model("chat", language, len(code))).invoke({
+                "code": code,
+                "review_context": review_context,
+                "language": language,
+                "history": self._chat_history(messages),
+                "history_summary": self._format_history_summary(history_summary)
+            })
+            
+            return result.content
             
-            chain = prompt_template | self.llm
+        except LLMUnavailableError:
+            raise
             
-            result = chain.invoke({
+        except Exception as e:
+            return self._chat_fallback(e)
+
+    async def achat(self, code: str, review_context: str, messages: List[Dict[str, str]], language: str, history_summary: str = "") -> str:
+        """
+        Async variant of chat
+        """
+        try:
+            result = await self.chain_for("chat", route_model("chat", language, len(code))).ainvoke({
                 "code": code,
                 "review_context": review_context,
-                "language": language
+                "language": language,
+                "history": self._chat_history(messages),
+                "history_summary": self._format_history_summary(history_summary)
             })
             
             return result.content
             
+        except LLMUnavailableError:
+            raise
+            
         except Exception as e:
-            print(f"DEBUG: LangChain Chat API Call failed ({str(e)}).")
-            return f"I'm sorry, I'm having trouble connecting to the AI service right now. Error: {str(e)[:100]}"
+            return self._chat_fallback(e)
+
+    async def astream_chat(self, code: str, review_context: str, messages: List[Dict[str, str]], language: str, history_summary: str = "") -> AsyncIterator[str]:
+        """
+        Stream the follow-up answer token by token. Errors propagate to the caller,
+        and closing the iterator cancels the upstream generation.
+        """
+        async for chunk in self.chain_for("chat", route_model("chat", language, len(code))).astream({
+            "code": code,
+            "review_context": review_context,
+            "language": language,
+            "history": self._chat_history(messages),
+            "history_summary": self._format_history_summary(history_summary)
+        }):
+            if chunk.content:
+                yield chunk.content
+
+    async def asummarize_history(self, previous_summary: str, messages: List[Dict[str, str]]) -> str:
+        """
+        Fold older chat messages into the rolling conversation summary.
+        Errors propagate so the caller can keep the previous summary.
+        """
+        transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+        result = await self.chain_for("summary", route_model("summary")).ainvoke({
+            "previous_summary": previous_summary or "(none)",
+            "transcript": transcript,
+            "max_words": settings.CHAT_SUMMARY_MAX_WORDS
+        })
+        return result.content.strip()
+
+    # --- Shared helpers for the sync and async paths ---
+
+    async def _areview_chunks(self, chunks, language: str, report: Dict[str, Any], routes: Dict[str, str], known: List[Dict[str, Any]] = (), updates: asyncio.Queue = None) -> Dict[str, Any]:
+        """
+        Runs the review graph per chunk with bounded fan-out and merges the findings.
+        `known` findings ({"text", "line"}) are hinted to every agent of the chunk they fall in.
+        With an `updates` queue, each agent's update is put on it as (node_name, update,
+        line_range) as soon as it finishes, followed by None once the review is over.
+        """
+        semaphore = asyncio.Semaphore(settings.REVIEW_CHUNK_CONCURRENCY)
+        graph = self.graph_for(routes)
+
+        async def review_chunk(chunk):
+            async with semaphore:
+                line_range = (chunk.start_line, chunk.end_line)
+                state = self._initial_review_state(chunk.text, language)
+                state["line_range"] = line_range
+                # Static findings are merged once below; chunks only get the hints for their lines
+                state["static_hints"] = {
+                    key: findings_text(findings_in_range(report[key] + list(known), line_range))
+                    for key in ("security_issues", "performance_issues", "style_issues")
+                }
+                with span("chunk", lines=f"{chunk.start_line}-{chunk.end_line}"):
+                    if updates is None:
+                        return await graph.ainvoke(state)
+                    async for mode, data in graph.astream(state, stream_mode=["updates", "values"]):
+                        if mode == "values":
+                            state = data
+                            continue
+                        for node_name, update in data.items():
+                            if node_name != "aggregator":
+                                updates.put_nowait((node_name, update, line_range))
+                    return state
+
+        tasks = [asyncio.create_task(review_chunk(chunk)) for chunk in chunks]
+        try:
+            chunk_states = await asyncio.gather(*tasks)
+        finally:
+            # One failed chunk fails the review: stop the others spending LLM quota on it
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if updates is not None:
+                updates.put_nowait(None)
+        result = merge_chunk_results(chunk_states, language.upper())
+        static_issues = [
+            text for key in ("security_issues", "performance_issues", "style_issues")
+            for text in findings_text(report[key])
+        ]
+        result["issues"] = static_issues + result["issues"]
+        return result
+
+    def _agent_updates(self, node_name: str, update: Dict[str, Any], language: str, line_range: Tuple[int, int] = None):
+        """One update per agent for a review node (the combined reviewer's is split), issues tagged with the chunk's lines"""
+        if node_name == COMBINED_REVIEWER:
+            parts = agent_updates(update, enabled_agents(language))
+        else:
+            parts = [(node_name, update)]
+        for name, part in parts:
+            issues_key = AGENT_REGISTRY[name].issues_key
+            yield name, {**part, issues_key: tag_with_line_range(part.get(issues_key, []), line_range)}
+
+    def _initial_review_state(self, code: str, language: str, report: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Starting state for the graph. Static findings seed the issue lists (the
+        reducers append agent output to them) and double as hints for the agents.
+        """
+        static = {
+            key: findings_text(report[key]) if report else []
+            for key in ("security_issues", "performance_issues", "style_issues")
+        }
+        return {
+            "code": code,
+            "language": language.upper(),
+            "security_issues": list(static["security_issues"]),
+            "performance_issues": list(static["performance_issues"]),
+            "style_issues": list(static["style_issues"]),
+            "suggestions": [],
+            "scores": [],
+            "score_weights": [],
+            "final_result": {},
+            "static_hints": static
+        }
+
+    def _review_fallback(self, e: Exception, language: str) -> Dict[str, Any]:
+        ANALYZER_FALLBACKS.labels("review").inc()
+        print(f"DEBUG: LangGraph Workflow failed ({str(e)}). Using Mock Mode.")
+        return {
+            "score": 8,
+            "issues": ["Graph failed to execute, falling back to mock."],
+            "suggestions": ["Check API logs for graph connectivity."],
+            "reasoning": f"Multi-agent review failed: {str(e)[:100]}",
+            "language": language,
+            "fallback": True
+        }
+
+    def _generation_prompt(self) -> ChatPromptTemplate:
+        return ChatPromptTemplate.from_messages([
+            ("system", "You are an expert {language} developer. Generate clean, efficient, and well-documented code. You must respond with valid JSON only."),
+            ("user", self._get_generation_prompt_template())
+        ])
+
+    def _generation_fallback(self, e: Exception, prompt: str, language: str) -> Dict[str, Any]:
+        ANALYZER_FALLBACKS.labels("generation").inc()
+        print(f"DEBUG: LangChain Generation API Call failed ({str(e)}). Using Mock Mode.")
+        return {
+            "code": f"// Mock code for: {prompt}\nfunction example() {{\n  console.log('AI Generation is currently in mock mode.');\n}}",
+            "explanation": "This is a fallback response since the AI service encountered an error.",
+            "language": language
+        }
+
+    def _chat_prompt(self) -> ChatPromptTemplate:
+        # History goes through a placeholder so message text is never parsed as a template
+        return ChatPromptTemplate.from_messages([
+            ("system", self._get_chat_system_template()),
+            MessagesPlaceholder("history")
+        ])
+
+    def _chat_history(self, messages: List[Dict[str, str]]) -> List[Tuple[str, str]]:
+        history = []
+        for msg in messages:
+            role = "human" if msg["role"] == "user" else "ai"
+            history.append((role, msg["content"]))
+        return history
+
+    def _format_history_summary(self, history_summary: str) -> str:
+        if not history_summary:
+            return ""
+        return f"Summary of the earlier conversation:\n{history_summary}\n\n"
+
+    def _chat_fallback(self, e: Exception) -> str:
+        ANALYZER_FALLBACKS.labels("chat").inc()
+        print(f"DEBUG: LangChain Chat API Call failed ({str(e)}).")
+        return f"I'm sorry, I'm having trouble connecting to the AI service right now. Error: {str(e)[:100]}"
     
     def _get_chat_system_template(self) -> str:
         """System template for follow-up chat"""
@@ -148,7 +508,20 @@ Your Previous Review:
 {review_context}
 ---
 
-Be helpful, concise, and professional in your answers. If the developer asks for a fix, explain the fix and show the corrected code.
+{history_summary}Be helpful, concise, and professional in your answers. If the developer asks for a fix, explain the fix and show the corrected code.
+"""
+
+    def _get_summary_template(self) -> str:
+        """Instruction template for the rolling chat history summary"""
+        return """You maintain a running summary of a conversation between a developer and a code reviewer.
+
+Current summary:
+{previous_summary}
+
+New messages to fold in:
+{transcript}
+
+Write the updated summary in at most {max_words} words. Keep the developer's questions, the decisions made, and any code changes agreed on. Respond with the summary text only.
 """
 
     def _get_generation_prompt_template(self) -> str:
@@ -0,0 +1,110 @@
+import difflib
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from services.chunker import CodeChunk
+
+# Where a finding points, most specific first: the agents' "Line 12:" / "Lines 12-15:"
+# prefix, the static checks' "(line 12)" suffix, then a chunk's "[Lines 10-40]" tag
+CHUNK_TAG = re.compile(r"^\[Lines (\d+)-(\d+)\] ")
+AGENT_LINES = re.compile(r"^(?:\[Lines \d+-\d+\] )?Lines? (\d+)(?:\s*[-–]\s*(\d+))?:", re.IGNORECASE)
+STATIC_LINE = re.compile(r"\(line (\d+)\)$")
+
+def number_lines(code: str, first_line: int = 1) -> str:
+    """Prefix each line with its number so agents can say which line a finding is on"""
+    return "\n".join(f"{number}| {line}" for number, line in enumerate(code.split("\n"), start=first_line))
+
+def finding_span(text: str) -> Optional[Tuple[int, int]]:
+    """First and last line a finding refers to, or None when it names no line"""
+    match = AGENT_LINES.match(text)
+    if match:
+        return int(match.group(1)), int(match.group(2) or match.group(1))
+    match = STATIC_LINE.search(text)
+    if match:
+        return int(match.group(1)), int(match.group(1))
+    match = CHUNK_TAG.match(text)
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    return None
+
+def remap_finding(text: str, line_map: Dict[int, int]) -> Optional[str]:
+    """
+    Rewrite a finding's line numbers for the edited code. None when any line it
+    refers to was changed or removed, so the finding no longer applies as written.
+    """
+    first, last = finding_span(text)
+    if any(line not in line_map for line in range(first, last + 1)):
+        return None
+
+    if AGENT_LINES.match(text) or STATIC_LINE.search(text):
+        # The specific reference is remapped; the old chunk tag no longer means anything
+        text = CHUNK_TAG.sub("", text, count=1)
+        text = AGENT_LINES.sub(lambda m: _lines_label(m, line_map), text, count=1)
+        return STATIC_LINE.sub(lambda m: f"(line {line_map[int(m.group(1))]})", text, count=1)
+    return CHUNK_TAG.sub(lambda m: f"[Lines {line_map[int(m.group(1))]}-{line_map[int(m.group(2))]}] ", text, count=1)
+
+def _lines_label(match, line_map: Dict[int, int]) -> str:
+    first = line_map[int(match.group(1))]
+    if match.group(2):
+        return f"Lines {first}-{line_map[int(match.group(2))]}:"
+    return f"Line {first}:"
+
+class DiffPlan(NamedTuple):
+    """What changed between a session's reviewed code and its resubmission"""
+    hunks: List[CodeChunk]      # regions of the new code to review: changed lines plus context
+    line_map: Dict[int, int]    # every unchanged old line -> its new line (1-based)
+    changed_lines: int          # new lines inserted or rewritten
+    removed_lines: int          # old lines deleted or rewritten
+    total_lines: int            # lines in the new code
+
+def diff_code(old: str, new: str, context: int) -> DiffPlan:
+    old_lines, new_lines = old.split("\n"), new.split("\n")
+    # Trailing whitespace never changes a review
+    matcher = difflib.SequenceMatcher(
+        None, [line.rstrip() for line in old_lines], [line.rstrip() for line in new_lines], autojunk=False
+    )
+
+    line_map, ranges = {}, []
+    changed = removed = 0
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            line_map.update((i1 + offset + 1, j1 + offset + 1) for offset in range(i2 - i1))
+            continue
+        removed += i2 - i1
+        changed += j2 - j1
+        # New lines j1+1..j2; a pure deletion (j1 == j2) reviews the lines around the gap
+        ranges.append((max(1, j1 + 1 - context), min(len(new_lines), max(j2, j1 + 1) + context)))
+
+    hunks = []
+    for start, end in ranges:
+        if hunks and start <= hunks[-1][1] + 1:
+            hunks[-1] = (hunks[-1][0], max(hunks[-1][1], end))
+        else:
+            hunks.append((start, end))
+
+    return DiffPlan(
+        [CodeChunk(start, end, "\n".join(new_lines[start - 1:end])) for start, end in hunks],
+        line_map, changed, removed, len(new_lines)
+    )
+
+def carry_forward(findings: List[str], plan: DiffPlan, unlocated_max_ratio: float) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Earlier findings that still apply, renumbered, as {"text", "line"}. Also returns
+    how many were dropped because their lines changed or were removed. Findings that
+    name no line cannot be checked that way: they are kept (line None) only while at
+    most `unlocated_max_ratio` of the lines changed, so they do not pile up across edits.
+    """
+    changed_ratio = max(plan.changed_lines, plan.removed_lines) / plan.total_lines
+    carried, dropped = [], 0
+    for text in findings:
+        if finding_span(text) is None:
+            if changed_ratio <= unlocated_max_ratio:
+                carried.append({"text": text, "line": None})
+            else:
+                dropped += 1
+            continue
+        remapped = remap_finding(text, plan.line_map)
+        if remapped is None:
+            dropped += 1
+        else:
+            carried.append({"text": remapped, "line": finding_span(remapped)[0]})
+    return carried, dropped
@@ -0,0 +1,207 @@
+import asyncio
+import secrets
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from pymongo import ReturnDocument
+from config import settings
+from database import get_db
+
+JOBS_COLLECTION = "review_jobs"
+TERMINAL_STATUSES = ("completed", "failed")
+
+class QueueFullError(Exception):
+    """Raised when the number of queued jobs has reached JOB_MAX_QUEUE_DEPTH"""
+
+class TransientJobError(Exception):
+    """Raised by a job handler for failures worth retrying (LLM timeouts, throttling)"""
+
+# Wake in-process workers as soon as a job is submitted instead of waiting for the next poll.
+# One event per worker, so a worker clearing its own wake-up never swallows another's.
+_wake_events: Set[asyncio.Event] = set()
+
+async def enqueue_job(payload: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+    db_conn = get_db()
+    queued = await db_conn[JOBS_COLLECTION].count_documents({"status": "queued"})
+    if queued >= settings.JOB_MAX_QUEUE_DEPTH:
+        raise QueueFullError(f"Review queue is full ({queued} jobs waiting)")
+
+    now = datetime.utcnow()
+    job = {
+        "_id": secrets.token_hex(12),
+        "user_id": user_id,
+        "status": "queued",
+        "payload": payload,
+        "attempts": 0,
+        "max_attempts": settings.JOB_MAX_ATTEMPTS,
+        "available_at": now,
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now
+    }
+    await db_conn[JOBS_COLLECTION].insert_one(job)
+    for wake in _wake_events:
+        wake.set()
+    return job
+
+async def get_job(job_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+    db_conn = get_db()
+    return await db_conn[JOBS_COLLECTION].find_one({"_id": job_id, "user_id": user_id})
+
+async def claim_next_job(worker_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Atomically move the oldest runnable job to "running". Jobs whose lease has
+    expired (their worker died mid-run) are runnable again until they run out of
+    attempts; then they are marked failed, so a job that keeps killing its worker
+    is not picked up forever.
+    """
+    db_conn = get_db()
+    now = datetime.utcnow()
+    await db_conn[JOBS_COLLECTION].update_many(
+        {"status": "running", "lease_expires_at": {"$lt": now}, "$expr": {"$gte": ["$attempts", "$max_attempts"]}},
+        {
+            "$set": {"status": "failed", "error": "Worker lost the job on every attempt", "updated_at": now},
+            "$unset": {"lease_expires_at": ""}
+        }
+    )
+    return await db_conn[JOBS_COLLECTION].find_one_and_update(
+        {"$or": [
+            {"status": "queued", "available_at": {"$lte": now}},
+            {"status": "running", "lease_expires_at": {"$lt": now}, "$expr": {"$lt": ["$attempts", "$max_attempts"]}}
+        ]},
+        {
+            "$set": {
+                "status": "running",
+                "worker_id": worker_id,
+                "lease_expires_at": now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                "updated_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+class JobWorkerPool:
+    """
+    A fixed number of asyncio workers pulling jobs from the shared collection.
+    Runs inside the API process or standalone via worker.py.
+    """
+
+    def __init__(self, handler: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]], concurrency: int = None):
+        self.handler = handler
+        self.concurrency = concurrency if concurrency is not None else settings.JOB_WORKER_CONCURRENCY
+        self.worker_prefix = secrets.token_hex(4)
+        self._tasks = []
+
+    async def start(self):
+        self._tasks = [
+            asyncio.create_task(self._worker_loop(f"{self.worker_prefix}-{index}"))
+            for index in range(self.concurrency)
+        ]
+        print(f"Started {self.concurrency} review job workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run_forever(self):
+        await self.start()
+        await asyncio.gather(*self._tasks)
+
+    async def _worker_loop(self, worker_id: str):
+        wake = asyncio.Event()
+        _wake_events.add(wake)
+        try:
+            while True:
+                # Cleared before claiming, so a job submitted during the claim still wakes us
+                wake.clear()
+                try:
+                    job = await claim_next_job(worker_id)
+                except Exception as e:
+                    print(f"Job worker {worker_id} could not claim a job: {e}")
+                    job = None
+
+                if job is None:
+                    try:
+                        await asyncio.wait_for(wake.wait(), timeout=settings.JOB_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                try:
+                    await self._run_job(job)
+                except Exception as e:
+                    # e.g. Mongo unavailable for the result write: the worker keeps going and
+                    # the job is reclaimed once its lease expires
+                    print(f"Job worker {worker_id} could not finish job {job['_id']}: {e}")
+        finally:
+            _wake_events.discard(wake)
+
+    async def _run_job(self, job: Dict[str, Any]):
+        db_conn = get_db()
+        handler = asyncio.create_task(self.handler(job))
+        keeper = asyncio.create_task(self._keep_lease(job, handler))
+        try:
+            result = await handler
+        except asyncio.CancelledError:
+            if keeper.done():
+                # The lease was lost and the job belongs to another worker now
+                return
+            raise
+        except TransientJobError as e:
+            await self._record_failure(job, str(e), retryable=True)
+            return
+        except Exception as e:
+            print(f"Review job {job['_id']} failed: {e}")
+            await self._record_failure(job, str(e), retryable=False)
+            return
+        finally:
+            keeper.cancel()
+
+        # Writes are fenced on worker_id, so a worker whose job was reclaimed cannot overwrite it
+        await db_conn[JOBS_COLLECTION].update_one(
+            {"_id": job["_id"], "worker_id": job["worker_id"]},
+            {"$set": {"status": "completed", "result": result, "error": None, "updated_at": datetime.utcnow()},
+             "$unset": {"lease_expires_at": ""}}
+        )
+
+    async def _keep_lease(self, job: Dict[str, Any], handler: asyncio.Task):
+        """
+        Renew the job's lease while its handler runs (slow chunked reviews can wait on
+        rate limits past JOB_LEASE_SECONDS). Returns, cancelling the handler, only if
+        another worker has taken the job over.
+        """
+        db_conn = get_db()
+        while True:
+            await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+            now = datetime.utcnow()
+            try:
+                res = await db_conn[JOBS_COLLECTION].update_one(
+                    {"_id": job["_id"], "worker_id": job["worker_id"], "status": "running"},
+                    {"$set": {"lease_expires_at": now + timedelta(seconds=settings.JOB_LEASE_SECONDS), "updated_at": now}}
+                )
+            except Exception as e:
+                print(f"Could not renew the lease of review job {job['_id']}: {e}")
+                continue
+            if res.matched_count == 0:
+                print(f"Review job {job['_id']} was taken over by another worker; abandoning it")
+                handler.cancel()
+                return
+
+    async def _record_failure(self, job: Dict[str, Any], error: str, retryable: bool):
+        db_conn = get_db()
+        now = datetime.utcnow()
+        if retryable and job["attempts"] < job["max_attempts"]:
+            # Exponential backoff: base, 2x base, 4x base...
+            delay = settings.JOB_RETRY_BACKOFF_SECONDS * (2 ** (job["attempts"] - 1))
+            update = {"status": "queued", "available_at": now + timedelta(seconds=delay), "error": error, "updated_at": now}
+        else:
+            update = {"status": "failed", "error": error, "updated_at": now}
+
+        await db_conn[JOBS_COLLECTION].update_one(
+            {"_id": job["_id"], "worker_id": job["worker_id"]},
+            {"$set": update, "$unset": {"lease_expires_at": ""}}
+        )
@@ -0,0 +1,153 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from config import settings
+
+class CassetteMissError(LookupError):
+    """Replay mode was asked a prompt the cassette has no recording for"""
+
+def prompt_key(messages: List[BaseMessage]) -> str:
+    """Hash of the rendered prompt (role and text of every message); the model is not part of it"""
+    material = json.dumps([[message.type, message.content] for message in messages], ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:32]
+
+class Cassette:
+    """
+    Prompt/response pairs in a JSON-lines file, one recording per line:
+    {"key", "model", "latency", "first_token", "content", "usage"}. Recording
+    appends as calls complete (arecord does the file write in a worker thread,
+    off the event loop); a prompt recorded more than once is replayed in
+    recorded order, cycling.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._replayed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry["key"], []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def record(self, key: str, model: str, latency: float, content: str, usage: Optional[Dict[str, int]] = None, first_token: float = None):
+        entry = {
+            "key": key,
+            "model": model,
+            "latency": round(latency, 4),
+            "first_token": round(first_token, 4) if first_token is not None else None,
+            "content": content,
+            "usage": usage
+        }
+        with self._lock:
+            self._entries.setdefault(key, []).append(entry)
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    async def arecord(self, *args, **kwargs):
+        await asyncio.to_thread(self.record, *args, **kwargs)
+
+    def lookup(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMissError(f"No cassette recording for prompt {key} in {self.path}")
+            index = self._replayed.get(key, 0)
+            self._replayed[key] = index + 1
+            return entries[index % len(entries)]
+
+_cassettes: Dict[str, Cassette] = {}
+
+def cassette_for(path: str) -> Cassette:
+    if path not in _cassettes:
+        _cassettes[path] = Cassette(path)
+    return _cassettes[path]
+
+class CassetteChatModel(BaseChatModel):
+    """
+    LLM_CASSETTE_MODE="record": calls `inner` and records every prompt/response pair.
+    "replay": answers from the cassette alone (no provider, no network), waiting
+    the recorded latency times LLM_CASSETTE_LATENCY_SCALE (0 replays instantly).
+    """
+
+    inner: Optional[BaseChatModel] = None
+    cassette: Any
+    model_name: str
+    mode: str
+
+    @property
+    def _llm_type(self) -> str:
+        return f"cassette-{self.mode}"
+
+    def _replay(self, messages: List[BaseMessage]) -> Dict[str, Any]:
+        return self.cassette.lookup(prompt_key(messages))
+
+    def _delay(self, seconds: Optional[float]) -> float:
+        return (seconds or 0.0) * settings.LLM_CASSETTE_LATENCY_SCALE
+
+    @staticmethod
+    def _result(entry: Dict[str, Any]) -> ChatResult:
+        message = AIMessage(content=entry["content"], usage_metadata=entry.get("usage") or None)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _recording(self, messages: List[BaseMessage], started: float, result: ChatResult) -> tuple:
+        message = result.generations[0].message
+        return (
+            prompt_key(messages), self.model_name, time.perf_counter() - started,
+            message.content, getattr(message, "usage_metadata", None)
+        )
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.mode == "replay":
+            entry = self._replay(messages)
+            time.sleep(self._delay(entry["latency"]))
+            return self._result(entry)
+        started = time.perf_counter()
+        result = self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        self.cassette.record(*self._recording(messages, started, result))
+        return result
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.mode == "replay":
+            entry = self._replay(messages)
+            await asyncio.sleep(self._delay(entry["latency"]))
+            return self._result(entry)
+        started = time.perf_counter()
+        result = await self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        await self.cassette.arecord(*self._recording(messages, started, result))
+        return result
+
+    async def _astream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        if self.mode == "replay":
+            entry = self._replay(messages)
+            first_token = entry.get("first_token") or entry["latency"]
+            await asyncio.sleep(self._delay(first_token))
+            words = entry["content"].split(" ")
+            # The rest of the recorded time is spread evenly over the remaining words
+            step = self._delay(max(0.0, entry["latency"] - first_token)) / max(1, len(words) - 1)
+            for index, word in enumerate(words):
+                if index:
+                    await asyncio.sleep(step)
+                yield ChatGenerationChunk(message=AIMessageChunk(content=word if index == len(words) - 1 else word + " "))
+            return
+
+        started, first_token, parts = time.perf_counter(), None, []
+        async for chunk in self.inner._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            parts.append(chunk.message.content)
+            yield chunk
+        await self.cassette.arecord(prompt_key(messages), self.model_name, time.perf_counter() - started, "".join(parts), first_token=first_token)
@@ -0,0 +1,269 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import groq
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from config import settings
+from services.chat_history import estimate_tokens
+
+# Statuses worth retrying: throttling, timeouts, conflicts and server-side failures
+RETRYABLE_STATUSES = (408, 409, 425, 429)
+
+class LLMUnavailableError(Exception):
+    """
+    The model provider cannot serve the call right now: throttled beyond what we
+    are willing to wait for, retries exhausted, or the circuit breaker is open.
+    Surfaced to clients as 503 with Retry-After, never as a mock result.
+    """
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    def to_payload(self) -> Dict[str, Any]:
+        return {"detail": str(self), "status": 503, "retry_after": self.retry_after_seconds}
+
+    @property
+    def retry_after_seconds(self) -> int:
+        return max(1, int(round(self.retry_after))) if self.retry_after else 1
+
+class TokenBucket:
+    """
+    Client-side quota: `capacity` units refilling evenly over a minute. Callers
+    reserve units up front (the balance may go negative) and sleep off the debt,
+    so waiters are served in arrival order. Usable from threads and the event loop.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float, max_wait: float) -> float:
+        """Reserve `amount` units and return how long to wait; raises instead of queueing past max_wait"""
+        if self.rate <= 0:
+            return 0.0
+        # A single call larger than the whole quota can still run once the bucket is full
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = max(0.0, (amount - self.tokens) / self.rate)
+            if wait > max_wait:
+                raise LLMUnavailableError("AI service quota exhausted; try again shortly", retry_after=wait)
+            self.tokens -= amount
+            return wait
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive transient failures and fails fast
+    for `reset_seconds`. Then it is half-open: calls go through again (a review
+    fans out to several agents at once, so one lone probe would just be cancelled
+    by its failing siblings), the first success closes it and the first failure
+    re-opens it for another full period.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def before_call(self):
+        with self._lock:
+            if self.state != "open":
+                return
+            retry_after = self.reset_seconds - (time.monotonic() - self.opened_at)
+            raise LLMUnavailableError("AI service is unavailable (circuit open); try again shortly", retry_after=retry_after)
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+def is_transient(error: Exception) -> bool:
+    if isinstance(error, (groq.APIConnectionError, asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status = _status_code(error)
+    return status is not None and (status in RETRYABLE_STATUSES or status >= 500)
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Server-requested delay from Retry-After / retry-after-ms, if the error carries one"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+class LLMGuard:
+    """Quotas, retry policy and circuit breaker shared by every call to one model"""
+
+    def __init__(self, name: str, requests_per_minute: int = None, tokens_per_minute: int = None):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute if requests_per_minute is not None else settings.LLM_REQUESTS_PER_MINUTE)
+        self.tokens = TokenBucket(tokens_per_minute if tokens_per_minute is not None else settings.LLM_TOKENS_PER_MINUTE)
+        self.breaker = CircuitBreaker(settings.LLM_BREAKER_FAILURE_THRESHOLD, settings.LLM_BREAKER_RESET_SECONDS)
+
+    def _admission_wait(self, messages: List[BaseMessage]) -> float:
+        self.breaker.before_call()
+        estimate = sum(estimate_tokens(str(message.content)) for message in messages) + settings.LLM_EXPECTED_OUTPUT_TOKENS
+        max_wait = settings.LLM_RATE_LIMIT_MAX_WAIT
+        return max(self.requests.reserve(1, max_wait), self.tokens.reserve(estimate, max_wait))
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Delay before the next attempt; raises LLMUnavailableError when we should stop"""
+        self.breaker.record_failure()
+        requested = retry_after_seconds(error)
+        if attempt >= settings.LLM_MAX_RETRIES or (requested is not None and requested > settings.LLM_RETRY_MAX_DELAY):
+            raise LLMUnavailableError(
+                f"AI service is unavailable after {attempt + 1} attempt(s): {str(error)[:100]}",
+                retry_after=requested or settings.LLM_BREAKER_RESET_SECONDS
+            ) from error
+        if requested is not None:
+            # Honour the server's delay, with a little jitter so waiters do not return in lockstep
+            return requested + random.uniform(0, settings.LLM_RETRY_BASE_DELAY)
+        # Full jitter exponential backoff
+        return random.uniform(0, min(settings.LLM_RETRY_MAX_DELAY, settings.LLM_RETRY_BASE_DELAY * (2 ** attempt)))
+
+    async def acall(self, make_call: Callable[[], Awaitable[Any]], messages: List[BaseMessage]) -> Any:
+        attempt = 0
+        while True:
+            wait = self._admission_wait(messages)
+            if wait:
+                await asyncio.sleep(wait)
+            try:
+                result = await make_call()
+            except Exception as e:
+                if not is_transient(e):
+                    # The provider answered (bad request, auth...): not an outage
+                    self.breaker.record_success()
+                    raise
+                await asyncio.sleep(self._retry_delay(e, attempt))
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    def call(self, make_call: Callable[[], Any], messages: List[BaseMessage]) -> Any:
+        attempt = 0
+        while True:
+            wait = self._admission_wait(messages)
+            if wait:
+                time.sleep(wait)
+            try:
+                result = make_call()
+            except Exception as e:
+                if not is_transient(e):
+                    self.breaker.record_success()
+                    raise
+                time.sleep(self._retry_delay(e, attempt))
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def astream(self, make_stream: Callable[[], AsyncIterator[Any]], messages: List[BaseMessage]) -> AsyncIterator[Any]:
+        """Retries only until the first chunk arrives; a stream that fails part-way is not replayed"""
+        attempt = 0
+        while True:
+            wait = self._admission_wait(messages)
+            if wait:
+                await asyncio.sleep(wait)
+            stream = make_stream()
+            try:
+                try:
+                    first = await stream.__anext__()
+                except StopAsyncIteration:
+                    self.breaker.record_success()
+                    return
+                except Exception as e:
+                    if not is_transient(e):
+                        self.breaker.record_success()
+                        raise
+                    await asyncio.sleep(self._retry_delay(e, attempt))
+                    attempt += 1
+                    continue
+
+                yield first
+                try:
+                    async for chunk in stream:
+                        yield chunk
+                except Exception as e:
+                    if is_transient(e):
+                        self.breaker.record_failure()
+                    raise
+                self.breaker.record_success()
+                return
+            finally:
+                await stream.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"model": self.name, "circuit": self.breaker.state, "consecutive_failures": self.breaker.failures}
+
+_guards: Dict[str, LLMGuard] = {}
+
+def guard_for(model_name: str) -> LLMGuard:
+    """One guard per model: quotas and breaker state are shared by every chain using it"""
+    if model_name not in _guards:
+        _guards[model_name] = LLMGuard(model_name)
+    return _guards[model_name]
+
+class ResilientChatModel(BaseChatModel):
+    """
+    Wraps a chat model so every call goes through an LLMGuard. Drop-in for the
+    wrapped model in prompt | llm | parser chains.
+    """
+
+    inner: BaseChatModel
+    guard: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return f"resilient-{self.inner._llm_type}"
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return self.guard.call(lambda: self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs), messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return await self.guard.acall(lambda: self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs), messages)
+
+    async def _astream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        async for chunk in self.guard.astream(lambda: self.inner._astream(messages, stop=stop, run_manager=run_manager, **kwargs), messages):
+            yield chunk
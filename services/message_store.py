@@ -0,0 +1,160 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from config import settings
+from database import get_db
+from services.session_cache import mongo_now
+
+MESSAGES_COLLECTION = "messages"
+
+# A session's chat history lives either in its embedded "messages" array (legacy,
+# and CHAT_MESSAGE_STORAGE="embedded") or as one document per message in the
+# messages collection, numbered by "seq" (its index in the conversation) with the
+# session's "message_count" as the counter. Never both: in collection mode an
+# embedded array is moved out before the first new message is written.
+
+def _uses_collection() -> bool:
+    return settings.CHAT_MESSAGE_STORAGE == "collection"
+
+def _as_message(doc: Dict[str, Any]) -> Dict[str, str]:
+    return {"role": doc["role"], "content": doc["content"]}
+
+def session_message_count() -> Dict[str, Any]:
+    """Aggregation expression for a session's message count in either storage"""
+    return {"$add": [{"$ifNull": ["$message_count", 0]}, {"$size": {"$ifNull": ["$messages", []]}}]}
+
+def new_session_fields() -> Dict[str, Any]:
+    """Message fields for a freshly inserted session document"""
+    return {"message_count": 0} if _uses_collection() else {"messages": []}
+
+async def append_messages(session_id: str, user_id: str, messages: List[Dict[str, str]]) -> Optional[datetime]:
+    """Append messages to a session; returns the session's new updated_at, or None if it is gone"""
+    db_conn = get_db()
+    query = {"_id": ObjectId(session_id), "user_id": user_id}
+    updated_at = mongo_now()
+
+    if not _uses_collection():
+        result = await db_conn.sessions.update_one(
+            query,
+            {"$push": {"messages": {"$each": messages}}, "$set": {"updated_at": updated_at}}
+        )
+        return updated_at if result.matched_count else None
+
+    await migrate_session(session_id)
+    # Reserve a block of seq numbers; concurrent turns each get their own
+    session = await db_conn.sessions.find_one_and_update(
+        query,
+        {"$inc": {"message_count": len(messages)}, "$set": {"updated_at": updated_at}},
+        projection={"message_count": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if session is None:
+        return None
+
+    first_seq = session["message_count"] - len(messages)
+    await db_conn[MESSAGES_COLLECTION].insert_many([
+        {
+            "session_id": ObjectId(session_id),
+            "user_id": user_id,
+            "seq": first_seq + offset,
+            "role": message["role"],
+            "content": message["content"],
+            "created_at": updated_at
+        }
+        for offset, message in enumerate(messages)
+    ])
+    return updated_at
+
+async def load_messages(session: Dict[str, Any], start: int = 0) -> List[Dict[str, str]]:
+    """Messages from index start onward, oldest first. session needs _id and (if embedded) messages."""
+    if "messages" in session:
+        return [_as_message(message) for message in session["messages"][start:]]
+
+    db_conn = get_db()
+    cursor = db_conn[MESSAGES_COLLECTION].find(
+        {"session_id": session["_id"], "seq": {"$gte": start}},
+        {"role": 1, "content": 1}
+    ).sort("seq", 1)
+    return [_as_message(doc) async for doc in cursor]
+
+async def message_page(session: Dict[str, Any], limit: int, before: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    The latest `limit` messages before index `before` (default: the newest), oldest
+    first, each with its seq. Also returns the `before` value for the next older page.
+    """
+    if "messages" in session:
+        end = len(session["messages"]) if before is None else min(before, len(session["messages"]))
+        start = max(end - limit, 0)
+        page = [
+            {**_as_message(message), "seq": seq}
+            for seq, message in enumerate(session["messages"][start:end], start=start)
+        ]
+        return page, (start if start > 0 else None)
+
+    db_conn = get_db()
+    query = {"session_id": session["_id"]}
+    if before is not None:
+        query["seq"] = {"$lt": before}
+    cursor = db_conn[MESSAGES_COLLECTION].find(query, {"role": 1, "content": 1, "seq": 1}).sort("seq", -1).limit(limit + 1)
+    docs = [doc async for doc in cursor]
+    has_older = len(docs) > limit
+    docs = list(reversed(docs[:limit]))
+    page = [{**_as_message(doc), "seq": doc["seq"]} for doc in docs]
+    return page, (docs[0]["seq"] if has_older else None)
+
+async def delete_messages(session_id: str):
+    db_conn = get_db()
+    await db_conn[MESSAGES_COLLECTION].delete_many({"session_id": ObjectId(session_id)})
+
+async def migrate_session(session_id) -> int:
+    """
+    Move one session's embedded array into the messages collection. Messages are
+    upserted by (session_id, seq) first, so a crash or a concurrent migration
+    repeats work instead of losing or duplicating it; the array is only unset once
+    it is unchanged since it was read. Returns the number of messages moved.
+    """
+    db_conn = get_db()
+    session = await db_conn.sessions.find_one(
+        {"_id": ObjectId(session_id), "messages": {"$exists": True}},
+        {"messages": 1, "user_id": 1, "updated_at": 1}
+    )
+    if not session:
+        return 0
+
+    messages = session["messages"]
+    if messages:
+        await db_conn[MESSAGES_COLLECTION].bulk_write([
+            UpdateOne(
+                {"session_id": session["_id"], "seq": seq},
+                {"$setOnInsert": {
+                    "user_id": session["user_id"],
+                    "role": message["role"],
+                    "content": message["content"],
+                    "created_at": session.get("updated_at")
+                }},
+                upsert=True
+            )
+            for seq, message in enumerate(messages)
+        ], ordered=False)
+
+    result = await db_conn.sessions.update_one(
+        {"_id": session["_id"], "messages": {"$size": len(messages)}},
+        {"$set": {"message_count": len(messages)}, "$unset": {"messages": ""}}
+    )
+    if result.matched_count == 0:
+        # Appended to (or migrated) meanwhile: start over from the current state
+        return await migrate_session(session_id)
+    return len(messages)
+
+async def migrate_all_sessions(batch_size: int = 100) -> Tuple[int, int]:
+    """Move every embedded array out; safe to re-run. Returns (sessions, messages) migrated."""
+    db_conn = get_db()
+    sessions_moved, messages_moved = 0, 0
+    while True:
+        batch = [doc["_id"] async for doc in db_conn.sessions.find({"messages": {"$exists": True}}, {"_id": 1}).limit(batch_size)]
+        if not batch:
+            return sessions_moved, messages_moved
+        for session_id in batch:
+            messages_moved += await migrate_session(session_id)
+            sessions_moved += 1
@@ -0,0 +1,44 @@
+import os
+from typing import Tuple
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest
+from prometheus_client import multiprocess
+
+# Latency buckets in seconds: HTTP and Mongo are mostly fast, LLM work runs for seconds
+FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0, 120.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response is fully sent",
+    ["method", "route", "status"], buckets=FAST_BUCKETS + (30.0, 60.0, 120.0)
+)
+AGENT_SECONDS = Histogram(
+    "review_agent_duration_seconds", "Review graph agent node latency",
+    ["agent", "outcome"], buckets=LLM_BUCKETS
+)
+LLM_CALLS = Counter("llm_calls_total", "LLM calls by model, task and outcome", ["model", "task", "outcome"])
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens by model, task and direction", ["model", "task", "direction"])
+LLM_SECONDS = Histogram("llm_call_duration_seconds", "LLM call latency", ["model", "task"], buckets=LLM_BUCKETS)
+LLM_COST = Counter("llm_cost_usd_total", "Estimated LLM spend from MODEL_PRICES", ["model", "task"])
+MONGO_SECONDS = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency",
+    ["command", "collection", "outcome"], buckets=FAST_BUCKETS
+)
+ANALYZER_FALLBACKS = Counter("code_analyzer_fallbacks_total", "Mock results returned by CodeAnalyzer after an error", ["kind"])
+
+def observe_llm_call(model: str, task: str, seconds: float, input_tokens: int, output_tokens: int, cost: float, error: bool):
+    LLM_CALLS.labels(model, task, "error" if error else "ok").inc()
+    LLM_SECONDS.labels(model, task).observe(seconds)
+    if input_tokens:
+        LLM_TOKENS.labels(model, task, "input").inc(input_tokens)
+    if output_tokens:
+        LLM_TOKENS.labels(model, task, "output").inc(output_tokens)
+    if cost:
+        LLM_COST.labels(model, task).inc(cost)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Exposition text; under gunicorn with PROMETHEUS_MULTIPROC_DIR set, aggregated across workers"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
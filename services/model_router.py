@@ -0,0 +1,128 @@
+import threading
+import time
+from typing import Any, Dict, List
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from config import settings
+from agents.registry import enabled_agents
+from agents.combined import COMBINED_REVIEWER
+from services.chat_history import estimate_tokens
+from services.metrics import observe_llm_call
+from services.tracing import current_span_id, current_trace
+
+def route_model(task: str, language: str = None, code_chars: int = 0) -> str:
+    """Model for one task: the first MODEL_ROUTES entry matching it, else GROQ_MODEL"""
+    language = (language or "").lower()
+    for route in settings.MODEL_ROUTES:
+        if route["task"] not in ("*", task):
+            continue
+        if route["language"] and route["language"] != language:
+            continue
+        if route["max_chars"] is not None and code_chars >= route["max_chars"]:
+            continue
+        return route["model"]
+    return settings.GROQ_MODEL
+
+def review_routes(language: str, code_chars: int, engine: str = None) -> Dict[str, str]:
+    """
+    Model per review graph node, in graph order: each enabled agent, or with the
+    "combined" engine (default REVIEW_ENGINE) the single node reviewing for all of them
+    """
+    if (engine or settings.REVIEW_ENGINE) == "combined":
+        return {COMBINED_REVIEWER: route_model(COMBINED_REVIEWER, language, code_chars)}
+    return {spec.name: route_model(spec.name, language, code_chars) for spec in enabled_agents(language)}
+
+def route_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    input_price, output_price = settings.MODEL_PRICES.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+class RouteStats:
+    """Calls, errors, latency, tokens and cost per (task, model) route since startup"""
+
+    def __init__(self):
+        self._routes: Dict[tuple, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, task: str, model: str, latency: float, input_tokens: int = 0, output_tokens: int = 0, error: bool = False):
+        with self._lock:
+            route = self._routes.setdefault((task, model), {
+                "calls": 0, "errors": 0, "latency_seconds": 0.0,
+                "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0
+            })
+            route["calls"] += 1
+            route["errors"] += int(error)
+            route["latency_seconds"] += latency
+            route["input_tokens"] += input_tokens
+            route["output_tokens"] += output_tokens
+            cost = route_cost(model, input_tokens, output_tokens)
+            route["cost_usd"] += cost
+        observe_llm_call(model, task, latency, input_tokens, output_tokens, cost, error)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "task": task,
+                    "model": model,
+                    **route,
+                    "avg_latency_ms": round(1000 * route["latency_seconds"] / route["calls"], 1) if route["calls"] else 0.0,
+                    "cost_usd": round(route["cost_usd"], 6)
+                }
+                for (task, model), route in sorted(self._routes.items())
+            ]
+
+route_stats = RouteStats()
+
+class RouteMetricsCallback(BaseCallbackHandler):
+    """
+    Attached to the model step of each routed chain. Token counts come from the
+    provider's usage report when there is one, otherwise from the local estimate.
+    """
+
+    run_inline = True
+
+    def __init__(self, task: str, model: str):
+        self.task = task
+        self.model = model
+        self._runs: Dict[UUID, tuple] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs):
+        prompt_tokens = sum(estimate_tokens(str(message.content)) for batch in messages for message in batch)
+        # Handlers run inline in the caller's context, so the request trace is visible here
+        self._runs[run_id] = (time.perf_counter(), prompt_tokens, current_trace(), current_span_id())
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        started, prompt_tokens, trace, parent = run
+        ended = time.perf_counter()
+        input_tokens, output_tokens = self._usage(response)
+        if input_tokens is None:
+            input_tokens = prompt_tokens
+        if output_tokens is None:
+            output_tokens = sum(estimate_tokens(generation.text) for generations in response.generations for generation in generations)
+        route_stats.record(self.task, self.model, ended - started, input_tokens, output_tokens)
+        if trace is not None:
+            trace.add_span("llm", started, ended, parent, model=self.model, input_tokens=input_tokens, output_tokens=output_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        started, _, trace, parent = run
+        ended = time.perf_counter()
+        route_stats.record(self.task, self.model, ended - started, error=True)
+        if trace is not None:
+            trace.add_span("llm", started, ended, parent, type(error).__name__, model=self.model)
+
+    @staticmethod
+    def _usage(response: LLMResult) -> tuple:
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    return usage.get("input_tokens"), usage.get("output_tokens")
+        token_usage = (response.llm_output or {}).get("token_usage") or {}
+        return token_usage.get("prompt_tokens"), token_usage.get("completion_tokens")
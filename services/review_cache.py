@@ -0,0 +1,108 @@
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Optional
+from config import settings
+from database import get_db
+from services.model_router import review_routes
+
+class ReviewCache:
+    """
+    Two-tier cache for review results, keyed by the content of the request.
+
+    The in-process LRU answers repeat submissions without a network hop, and the
+    shared Mongo collection (expired by its TTL index in database.INDEXES) lets
+    every worker reuse a review computed by any other.
+    """
+
+    COLLECTION = "review_cache"
+
+    def __init__(self, max_entries: int = None, ttl_seconds: int = None):
+        self.max_entries = max_entries if max_entries is not None else settings.REVIEW_CACHE_SIZE
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.REVIEW_CACHE_TTL_SECONDS
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.memory_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+    @staticmethod
+    def normalize_code(code: str) -> str:
+        """Ignore differences that never change a review: line endings and trailing whitespace"""
+        lines = code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+    def make_key(self, code: str, language: str, engine: str = None) -> str:
+        material = "\x00".join([
+            self.normalize_code(code),
+            language.lower(),
+            settings.REVIEW_PROMPT_VERSION,
+            # Agents (or the combined reviewer) and the model each is routed to
+            ",".join(f"{agent}={model}" for agent, model in review_routes(language, len(code), engine).items())
+        ])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not settings.REVIEW_CACHE_ENABLED:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, result = entry
+            if time.monotonic() - stored_at < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return dict(result)
+            del self._entries[key]
+
+        db_conn = get_db()
+        if db_conn is not None:
+            doc = await db_conn[self.COLLECTION].find_one({"_id": key})
+            if doc:
+                self.shared_hits += 1
+                self._remember(key, doc["result"])
+                return dict(doc["result"])
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, result: Dict[str, Any]):
+        # Mock-mode results describe an outage, not the code, and must never be replayed
+        if not settings.REVIEW_CACHE_ENABLED or result.get("fallback"):
+            return
+
+        self._remember(key, result)
+
+        db_conn = get_db()
+        if db_conn is not None:
+            await db_conn[self.COLLECTION].replace_one(
+                {"_id": key},
+                {"_id": key, "result": result, "created_at": datetime.utcnow()},
+                upsert=True
+            )
+
+    def record_bypass(self):
+        self.bypasses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.shared_hits + self.misses
+        hits = self.memory_hits + self.shared_hits
+        return {
+            "enabled": settings.REVIEW_CACHE_ENABLED,
+            "memory_entries": len(self._entries),
+            "memory_capacity": self.max_entries,
+            "memory_hits": self.memory_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+        }
+
+    def _remember(self, key: str, result: Dict[str, Any]):
+        self._entries[key] = (time.monotonic(), dict(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+review_cache = ReviewCache()
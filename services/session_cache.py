@@ -0,0 +1,56 @@
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from config import settings
+
+def mongo_now() -> datetime:
+    """utcnow() truncated to the millisecond precision Mongo stores, so cached and stored values compare equal"""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+class SessionContextCache:
+    """
+    Small LRU of hot chat sessions (code, review, history, summary) so a chat turn
+    does not reload a large session document. Entries carry the session's
+    updated_at; callers compare it with the stored value before trusting an entry,
+    so turns handled by other workers are never missed.
+    """
+
+    def __init__(self, max_entries: int = None, ttl_seconds: int = None):
+        self.max_entries = max_entries if max_entries is not None else settings.SESSION_CACHE_SIZE
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.SESSION_CACHE_TTL_SECONDS
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, session_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        stored_at, context = entry
+        if time.monotonic() - stored_at >= self.ttl_seconds or context["user_id"] != user_id:
+            del self._entries[session_id]
+            return None
+        self._entries.move_to_end(session_id)
+        return context
+
+    def put(self, session_id: str, context: Dict[str, Any]):
+        self._entries[session_id] = (time.monotonic(), context)
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def append_messages(self, session_id: str, messages: List[Dict[str, str]], updated_at: datetime):
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            entry[1]["messages"] = entry[1]["messages"] + messages
+            entry[1]["updated_at"] = updated_at
+
+    def update(self, session_id: str, **fields):
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            entry[1].update(fields)
+
+    def invalidate(self, session_id: str):
+        self._entries.pop(session_id, None)
+
+session_cache = SessionContextCache()
@@ -0,0 +1,159 @@
+import ast
+import re
+from typing import Any, Dict, List, Optional
+from config import settings
+
+# Credentials assigned to an obviously named variable, plus well-known key formats
+SECRET_PATTERNS = [
+    re.compile(r"""(?i)\b(api[_-]?key|secret(?:[_-]?key)?|passw(?:or)?d|pwd|token|access[_-]?key|private[_-]?key)\b["']?\s*[:=]\s*["'][^"'\s]{6,}["']"""),
+    re.compile(r"\bAKIA[0-9A-Z]{16}\b"),
+    re.compile(r"-----BEGIN (?:RSA |EC |DSA |OPENSSH )?PRIVATE KEY-----"),
+    re.compile(r"\b(?:sk|gsk|ghp|xox[baprs])[-_][A-Za-z0-9]{20,}\b")
+]
+
+# SQL text glued together with runtime values instead of bound parameters
+SQL_HINT = re.compile(r"(?i)\b(?:SELECT|INSERT|UPDATE|DELETE)\b")
+SQL_KEYWORDS = r"(?:SELECT\b[^\n]*?\bFROM|INSERT\s+INTO|UPDATE\s+\w+\s+SET|DELETE\s+FROM)"
+SQL_PATTERNS = [
+    re.compile(r"""(?i)"[^"\n]*""" + SQL_KEYWORDS + r"""[^"\n]*"\s*(?:\+|%|\.\s*format\s*\()"""),
+    re.compile(r"""(?i)'[^'\n]*""" + SQL_KEYWORDS + r"""[^'\n]*'\s*(?:\+|%|\.\s*format\s*\()"""),
+    re.compile(r"""(?i)\bf(?:"[^"\n]*""" + SQL_KEYWORDS + r"""[^"\n]*\{|'[^'\n]*""" + SQL_KEYWORDS + r"""[^'\n]*\{)"""),
+    re.compile(r"""(?i)`[^`\n]*""" + SQL_KEYWORDS + r"""[^`\n]*\$\{""")
+]
+
+SNAKE_CASE = re.compile(r"^_{0,2}[a-z][a-z0-9_]*_{0,2}$")
+PASCAL_CASE = re.compile(r"^_?[A-Z][A-Za-z0-9]*$")
+
+# AST nodes that add a branch to a function's control flow
+BRANCH_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.ExceptHandler, ast.IfExp, ast.comprehension, ast.Assert)
+LOOP_NODES = (ast.For, ast.AsyncFor, ast.While)
+
+def _finding(text: str, line: Optional[int] = None) -> Dict[str, Any]:
+    return {"text": f"{text} (line {line})" if line else text, "line": line}
+
+def run_static_analysis(code: str, language: str) -> Dict[str, Any]:
+    """
+    Cheap local checks run before any LLM call. Findings are grouped by the
+    ReviewState field of the agent they belong to, each with its source line.
+    """
+    report = {
+        "security_issues": [],
+        "performance_issues": [],
+        "style_issues": [],
+        "syntax_error": None,
+        "metrics": {"lines": code.count("\n") + 1, "max_complexity": None}
+    }
+    lines = code.split("\n")
+
+    for number, line in enumerate(lines, start=1):
+        if any(pattern.search(line) for pattern in SECRET_PATTERNS):
+            report["security_issues"].append(_finding("Possible hardcoded secret or credential", number))
+        # Cheap keyword test first: the full patterns only run on lines mentioning SQL verbs
+        if SQL_HINT.search(line) and any(pattern.search(line) for pattern in SQL_PATTERNS):
+            report["security_issues"].append(_finding("SQL query built from string formatting; use parameterized queries", number))
+
+    long_lines = [number for number, line in enumerate(lines, start=1) if len(line) > settings.STATIC_MAX_LINE_LENGTH]
+    if long_lines:
+        report["style_issues"].append(_finding(
+            f"{len(long_lines)} line(s) exceed {settings.STATIC_MAX_LINE_LENGTH} characters",
+            long_lines[0]
+        ))
+
+    if language.lower() == "python":
+        _analyze_python(code, report)
+
+    return report
+
+def _analyze_python(code: str, report: Dict[str, Any]):
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        report["syntax_error"] = f"Syntax error: {e.msg}"
+        report["style_issues"].insert(0, _finding(report["syntax_error"], e.lineno))
+        return
+
+    functions, classes = [], []
+    _scan(tree, functions, classes)
+
+    for function in functions:
+        node = function["node"]
+        if function["complexity"] > settings.STATIC_COMPLEXITY_THRESHOLD:
+            report["performance_issues"].append(_finding(
+                f"Function '{node.name}' has cyclomatic complexity {function['complexity']}; consider splitting it",
+                node.lineno
+            ))
+        if function["loop_depth"] >= 3:
+            report["performance_issues"].append(_finding(
+                f"Function '{node.name}' nests loops {function['loop_depth']} deep; check the algorithmic complexity",
+                node.lineno
+            ))
+        if not SNAKE_CASE.match(node.name):
+            report["style_issues"].append(_finding(f"Function name '{node.name}' is not snake_case", node.lineno))
+
+    for node in classes:
+        if not PASCAL_CASE.match(node.name):
+            report["style_issues"].append(_finding(f"Class name '{node.name}' is not PascalCase", node.lineno))
+
+    report["metrics"]["max_complexity"] = max((function["complexity"] for function in functions), default=0)
+
+def _scan(node, functions: List[Dict[str, Any]], classes: list, current: Dict[str, Any] = None, loop_depth: int = 0):
+    """
+    One pass over the tree collecting, per function, its cyclomatic complexity and
+    deepest loop nesting. Nested functions are measured on their own.
+    """
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            function = {"node": child, "complexity": 1, "loop_depth": 0}
+            functions.append(function)
+            _scan(child, functions, classes, function, 0)
+            continue
+        if isinstance(child, ast.ClassDef):
+            classes.append(child)
+
+        child_depth = loop_depth
+        if current is not None:
+            if isinstance(child, BRANCH_NODES):
+                current["complexity"] += 1
+            elif isinstance(child, ast.BoolOp):
+                current["complexity"] += len(child.values) - 1
+            if isinstance(child, LOOP_NODES):
+                child_depth += 1
+                current["loop_depth"] = max(current["loop_depth"], child_depth)
+        _scan(child, functions, classes, current, child_depth)
+
+def should_skip_llm(report: Dict[str, Any], code: str) -> bool:
+    """Unparseable or trivially small inputs are answered locally"""
+    return bool(report["syntax_error"]) or len(code.strip()) < settings.STATIC_MIN_LLM_CHARS
+
+def findings_text(findings: List[Dict[str, Any]]) -> List[str]:
+    return [finding["text"] for finding in findings]
+
+def all_findings_text(report: Dict[str, Any]) -> List[str]:
+    return [text for key in ("security_issues", "performance_issues", "style_issues") for text in findings_text(report[key])]
+
+def findings_in_range(findings: List[Dict[str, Any]], line_range) -> List[Dict[str, Any]]:
+    start, end = line_range
+    return [finding for finding in findings if finding["line"] is not None and start <= finding["line"] <= end]
+
+def local_review(report: Dict[str, Any], code: str, language: str) -> Dict[str, Any]:
+    """Builds a complete review result from static findings alone, without any LLM call"""
+    security = findings_text(report["security_issues"])
+    performance = findings_text(report["performance_issues"])
+    style = findings_text(report["style_issues"])
+
+    score = max(1, 10 - 3 * len(security) - len(performance) - len(style))
+    if report["syntax_error"]:
+        score = min(score, 3)
+        reasoning = "The code could not be parsed, so it was not sent for a full AI review. Fix the syntax error and resubmit."
+        suggestions = ["Fix the syntax error before requesting a full review."]
+    else:
+        reasoning = f"The snippet is too small for a full AI review ({len(code.strip())} characters); only local static checks were run."
+        suggestions = []
+
+    return {
+        "score": score,
+        "issues": security + performance + style,
+        "suggestions": suggestions,
+        "reasoning": reasoning,
+        "language": language.upper()
+    }
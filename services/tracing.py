@@ -0,0 +1,119 @@
+import itertools
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+from langchain_core.output_parsers import JsonOutputParser
+from config import settings
+from utils.log import get_logger, log_event
+
+trace_logger = get_logger("trace")
+
+class Trace:
+    """
+    Spans recorded while serving one request. Agent nodes run as separate asyncio
+    tasks, which copy the context, so they all append to the same Trace and each
+    sees its own enclosing span as parent.
+    """
+
+    def __init__(self, name: str, **attrs):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = attrs
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self._ids = itertools.count(1)
+
+    def new_span_id(self) -> str:
+        return f"s{next(self._ids)}"
+
+    def add_span(self, name: str, started: float, ended: float, parent: Optional[str] = None, error: str = None, span_id: str = None, **attrs) -> Dict[str, Any]:
+        span = {
+            "id": span_id or self.new_span_id(),
+            "name": name,
+            "parent": parent,
+            "start_ms": round((started - self.started) * 1000, 2),
+            "duration_ms": round((ended - started) * 1000, 2),
+            **attrs
+        }
+        if error:
+            span["error"] = error
+        self.spans.append(span)
+        return span
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            **self.attrs,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "spans": sorted(self.spans, key=lambda span: span["start_ms"])
+        }
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[str]] = ContextVar("current_span", default=None)
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+def current_span_id() -> Optional[str]:
+    return _current_span.get()
+
+@contextmanager
+def start_trace(name: str, **attrs) -> Iterator[Trace]:
+    trace = Trace(name, **attrs)
+    token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        yield trace
+    finally:
+        try:
+            _current_span.reset(span_token)
+            _current_trace.reset(token)
+        except ValueError:
+            # A streaming generator finalized from another context; nothing to restore there
+            pass
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Optional[Dict[str, Any]]]:
+    """
+    Time the enclosed block as a child of the current span. Yields a dict the block
+    may add attributes to (token counts...); a no-op outside a trace.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    # Allocated up front so nested spans can name it as their parent
+    span_id = trace.new_span_id()
+    parent = _current_span.get()
+    token = _current_span.set(span_id)
+    extra: Dict[str, Any] = {}
+    started, error = time.perf_counter(), None
+    try:
+        yield extra
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        trace.add_span(name, started, time.perf_counter(), parent, error, span_id, **attrs, **extra)
+
+def finish_trace(trace: Trace, **attrs):
+    """Emit the trace as one structured log line if it is slow enough to matter"""
+    if not settings.REVIEW_TRACE_LOG_ENABLED:
+        return
+    data = trace.to_dict()
+    if data["total_ms"] >= settings.REVIEW_TRACE_LOG_MIN_MS:
+        log_event(trace_logger, "trace", **data, **attrs)
+
+class TracedJsonOutputParser(JsonOutputParser):
+    """JsonOutputParser that records each final parse as a "parse" span"""
+
+    def parse_result(self, result, *, partial: bool = False):
+        if partial:
+            return super().parse_result(result, partial=partial)
+        with span("parse"):
+            return super().parse_result(result, partial=partial)
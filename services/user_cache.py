@@ -0,0 +1,93 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set
+from config import settings
+from database import get_db
+
+class UserCache:
+    """
+    TTL-bounded LRU of user documents keyed by token subject (the email), so
+    authenticated requests do not each cost a users lookup.
+
+    Local invalidation covers the worker that changed the user. With
+    USER_CACHE_SHARED_INVALIDATION enabled, invalidations are also written to a
+    small TTL-indexed Mongo collection that every worker checks at most once per
+    USER_CACHE_SYNC_SECONDS; otherwise other workers catch up within the TTL.
+    Invalidations are stamped with the writer's clock, so each check re-reads an
+    overlap window behind its watermark and skips the ones it already applied.
+    """
+
+    COLLECTION = "user_cache_invalidations"
+
+    def __init__(self, max_entries: int = None, ttl_seconds: int = None):
+        self.max_entries = max_entries if max_entries is not None else settings.USER_CACHE_SIZE
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.USER_CACHE_TTL_SECONDS
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._synced_at: Optional[datetime] = None
+        self._applied: Set[Any] = set()
+        self._next_sync = 0.0
+
+    def get(self, subject: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(subject)
+        if entry is None:
+            return None
+        stored_at, user = entry
+        if time.monotonic() - stored_at >= self.ttl_seconds:
+            del self._entries[subject]
+            return None
+        self._entries.move_to_end(subject)
+        # Callers get their own copy; route handlers are free to mutate it
+        return dict(user)
+
+    def set(self, subject: str, user: Dict[str, Any]):
+        if self.ttl_seconds <= 0:
+            return
+        self._entries[subject] = (time.monotonic(), dict(user))
+        self._entries.move_to_end(subject)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def invalidate(self, subject: str):
+        self._entries.pop(subject, None)
+        if not settings.USER_CACHE_SHARED_INVALIDATION:
+            return
+        try:
+            db_conn = get_db()
+            await db_conn[self.COLLECTION].insert_one({"subject": subject, "created_at": datetime.utcnow()})
+        except Exception as e:
+            # Other workers still converge once their entry's TTL runs out
+            print(f"User cache shared invalidation failed: {e}")
+
+    async def sync(self):
+        """Drop entries invalidated by other workers since the last check (rate limited)"""
+        if not settings.USER_CACHE_SHARED_INVALIDATION or time.monotonic() < self._next_sync:
+            return
+        self._next_sync = time.monotonic() + settings.USER_CACHE_SYNC_SECONDS
+
+        now = datetime.utcnow()
+        if self._synced_at is None:
+            # Nothing cached predates this process; only later invalidations matter
+            self._synced_at = now
+            return
+        try:
+            db_conn = get_db()
+            # A worker whose clock runs behind ours, or whose insert lands just after our
+            # last read, stamps its invalidation below the watermark: look back far enough
+            overlap = timedelta(seconds=settings.USER_CACHE_SYNC_SECONDS + settings.USER_CACHE_MAX_CLOCK_SKEW_SECONDS)
+            cursor = db_conn[self.COLLECTION].find({"created_at": {"$gt": self._synced_at - overlap}}, {"subject": 1})
+            seen = set()
+            async for doc in cursor:
+                seen.add(doc["_id"])
+                if doc["_id"] not in self._applied:
+                    self._entries.pop(doc["subject"], None)
+            # Everything in the next window was either seen now or is newer
+            self._applied = seen
+            self._synced_at = now
+        except Exception as e:
+            print(f"User cache sync failed: {e}")
+
+    def clear(self):
+        self._entries.clear()
+
+user_cache = UserCache()
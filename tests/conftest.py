@@ -0,0 +1,4 @@
+import os
+
+# config.Settings needs a provider key at import time; no test reaches the provider
+os.environ.setdefault("GROQ_API_KEY", "test")
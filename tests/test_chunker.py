@@ -0,0 +1,68 @@
+"""Splitting large inputs into reviewable chunks"""
+import ast
+import pytest
+from benchmarks.corpus import full_corpus
+from services.chunker import split_code
+
+def python_functions(count: int) -> str:
+    return "\n\n".join(f"def function_{n}(x):\n    y = x * {n}\n    return y + {n}" for n in range(count))
+
+def assert_covers(chunks, code: str):
+    """Chunks are contiguous, in order, and reproduce the input exactly"""
+    assert chunks[0].start_line == 1
+    for previous, following in zip(chunks, chunks[1:]):
+        assert following.start_line == previous.end_line + 1
+    assert "\n".join(chunk.text for chunk in chunks) == code
+
+def test_small_input_is_one_chunk():
+    code = python_functions(3)
+    assert split_code(code, "python", 10_000) == [(1, code.count("\n") + 1, code)]
+
+def test_python_chunks_cut_only_between_definitions():
+    code = python_functions(60)
+    chunks = split_code(code, "python", 400)
+    assert len(chunks) > 1
+    assert_covers(chunks, code)
+    for chunk in chunks:
+        assert len(chunk.text) <= 400
+        ast.parse(chunk.text)
+
+def test_decorators_stay_with_their_function():
+    code = "\n\n".join(f"@decorator_{n}\ndef function_{n}():\n    return {n}" for n in range(40))
+    for chunk in split_code(code, "python", 200):
+        assert chunk.text.lstrip().startswith("@")
+        ast.parse(chunk.text)
+
+def test_large_python_class_is_cut_between_methods():
+    methods = "\n\n".join(f"    def method_{n}(self):\n        return {n}" for n in range(50))
+    code = f"class Big:\n{methods}"
+    chunks = split_code(code, "python", 300)
+    assert len(chunks) > 1
+    assert_covers(chunks, code)
+    for chunk in chunks[1:]:
+        assert chunk.text.lstrip().startswith("def method_")
+
+def test_braced_languages_are_cut_between_top_level_blocks():
+    code = "\n\n".join(f"function f{n}(x) {{\n  if (x) {{\n    return {n};\n  }}\n}}" for n in range(40))
+    chunks = split_code(code, "javascript", 250)
+    assert_covers(chunks, code)
+    for chunk in chunks:
+        assert chunk.text.count("{") == chunk.text.count("}")
+
+def test_invalid_python_falls_back_to_the_heuristic():
+    code = python_functions(40) + "\n\ndef broken(:\n    pass"
+    chunks = split_code(code, "python", 300)
+    assert len(chunks) > 1
+    assert_covers(chunks, code)
+
+def test_overlong_line_is_sliced():
+    code = "var a=1;" * 500
+    chunks = split_code(code, "javascript", 700)
+    assert all(len(chunk.text) <= 700 and chunk.start_line == chunk.end_line == 1 for chunk in chunks)
+    assert "".join(chunk.text for chunk in chunks) == code
+
+@pytest.mark.parametrize("max_chars", [200, 1_000, 4_000])
+def test_no_chunk_exceeds_the_limit(max_chars):
+    for name, (language, code) in full_corpus().items():
+        for chunk in split_code(code, language, max_chars):
+            assert len(chunk.text) <= max_chars, name
@@ -0,0 +1,82 @@
+"""Re-review planning: diff hunks, line remapping and carried-forward findings"""
+from services.code_diff import carry_forward, diff_code, finding_span, remap_finding
+
+OLD = "\n".join(f"line {n}" for n in range(1, 21))
+
+def edit(code: str, replace=None, insert=None, delete=()) -> str:
+    """Apply 1-based line edits: replace {line: text}, insert {before_line: [texts]}, delete lines"""
+    lines = []
+    for number, line in enumerate(code.split("\n"), start=1):
+        lines += (insert or {}).get(number, [])
+        if number not in delete:
+            lines.append((replace or {}).get(number, line))
+    return "\n".join(lines)
+
+def test_identical_code_has_no_hunks():
+    plan = diff_code(OLD, OLD.replace("line 5", "line 5   "), context=3)
+    assert plan.hunks == []
+    assert plan.line_map == {n: n for n in range(1, 21)}
+
+def test_rewritten_line_is_reviewed_with_context():
+    plan = diff_code(OLD, edit(OLD, replace={10: "changed"}), context=2)
+    assert [(hunk.start_line, hunk.end_line) for hunk in plan.hunks] == [(8, 12)]
+    assert plan.hunks[0].text.split("\n")[2] == "changed"
+    assert (plan.changed_lines, plan.removed_lines, plan.total_lines) == (1, 1, 20)
+    assert 10 not in plan.line_map
+
+def test_insertion_shifts_the_lines_below():
+    plan = diff_code(OLD, edit(OLD, insert={5: ["new a", "new b"]}), context=0)
+    assert [(hunk.start_line, hunk.end_line) for hunk in plan.hunks] == [(5, 6)]
+    assert plan.line_map[4] == 4
+    assert plan.line_map[5] == 7
+    assert plan.line_map[20] == 22
+
+def test_deletion_reviews_the_lines_around_the_gap():
+    plan = diff_code(OLD, edit(OLD, delete={10, 11}), context=1)
+    assert [(hunk.start_line, hunk.end_line) for hunk in plan.hunks] == [(9, 11)]
+    assert plan.line_map[12] == 10
+    assert (plan.changed_lines, plan.removed_lines) == (0, 2)
+
+def test_nearby_edits_share_one_hunk():
+    plan = diff_code(OLD, edit(OLD, replace={5: "a", 9: "b", 18: "c"}), context=2)
+    assert [(hunk.start_line, hunk.end_line) for hunk in plan.hunks] == [(3, 11), (16, 20)]
+
+def test_finding_span_reads_every_reference_style():
+    assert finding_span("Line 12: unused variable") == (12, 12)
+    assert finding_span("Lines 3-7: nested loops") == (3, 7)
+    assert finding_span("[Lines 10-40] Line 12: unused variable") == (12, 12)
+    assert finding_span("eval() is dangerous (line 4)") == (4, 4)
+    assert finding_span("[Lines 10-40] Missing docstrings") == (10, 40)
+    assert finding_span("Missing docstrings") is None
+
+def test_remap_finding_renumbers_each_reference_style():
+    line_map = {n: n + 2 for n in range(1, 50)}
+    assert remap_finding("Line 12: unused variable", line_map) == "Line 14: unused variable"
+    assert remap_finding("Lines 3-7: nested loops", line_map) == "Lines 5-9: nested loops"
+    assert remap_finding("eval() is dangerous (line 4)", line_map) == "eval() is dangerous (line 6)"
+    assert remap_finding("[Lines 10-40] Line 12: unused variable", line_map) == "Line 14: unused variable"
+    assert remap_finding("[Lines 10-40] Missing docstrings", line_map) == "[Lines 12-42] Missing docstrings"
+
+def test_remap_finding_gives_up_when_any_referenced_line_changed():
+    line_map = {n: n for n in range(1, 50) if n != 5}
+    assert remap_finding("Line 5: unused variable", line_map) is None
+    assert remap_finding("Lines 3-7: nested loops", line_map) is None
+    assert remap_finding("Line 8: unused variable", line_map) == "Line 8: unused variable"
+
+def test_carry_forward_keeps_unchanged_findings_and_drops_changed_ones():
+    plan = diff_code(OLD, edit(OLD, replace={10: "changed"}, insert={2: ["new"]}), context=1)
+    carried, dropped = carry_forward(["Line 4: a", "Line 10: b", "Lines 9-11: c", "x is unused (line 15)"], plan, 0.2)
+    assert carried == [{"text": "Line 5: a", "line": 5}, {"text": "x is unused (line 16)", "line": 16}]
+    assert dropped == 2
+
+def test_unlocated_findings_are_carried_only_through_small_edits():
+    findings = ["Line 4: a", "Missing docstrings"]
+    small = diff_code(OLD, edit(OLD, replace={10: "changed"}), context=1)
+    carried, dropped = carry_forward(findings, small, 0.2)
+    assert carried == [{"text": "Line 4: a", "line": 4}, {"text": "Missing docstrings", "line": None}]
+    assert dropped == 0
+
+    large = diff_code(OLD, edit(OLD, replace={n: "changed" for n in range(10, 15)}), context=1)
+    carried, dropped = carry_forward(findings, large, 0.2)
+    assert carried == [{"text": "Line 4: a", "line": 4}]
+    assert dropped == 1
@@ -0,0 +1,30 @@
+"""Combined reviewer: splitting one JSON answer into the agents' state updates"""
+import pytest
+from agents.combined import agent_updates, split_response
+from agents.registry import enabled_agents
+
+SPECS = enabled_agents("python")
+
+def answer(**overrides):
+    res = {spec.name: {"issues": [f"Line 1: {spec.name}"], "score": 5 + index, "suggestions": [f"{spec.name} tip"]} for index, spec in enumerate(SPECS)}
+    res.update(overrides)
+    return res
+
+def test_each_agent_keeps_its_own_issues_score_and_suggestions():
+    streamed = dict(agent_updates(split_response(answer(), SPECS), SPECS))
+    assert list(streamed) == [spec.name for spec in SPECS]
+    for index, spec in enumerate(SPECS):
+        assert streamed[spec.name][spec.issues_key] == [f"Line 1: {spec.name}"]
+        assert streamed[spec.name]["scores"] == [5 + index]
+        if spec.emits_suggestions:
+            assert streamed[spec.name]["suggestions"] == [f"{spec.name} tip"]
+
+def test_merged_update_matches_what_the_agents_would_write():
+    update = split_response(answer(), SPECS)
+    assert update["scores"] == [5 + index for index in range(len(SPECS))]
+    assert update["suggestions"] == [f"{spec.name} tip" for spec in SPECS if spec.emits_suggestions]
+
+@pytest.mark.parametrize("res", [{"issues": ["Line 1: flat"], "score": 7}, answer(style_architect=["not an object"])])
+def test_missing_section_raises(res):
+    with pytest.raises(ValueError):
+        split_response(res, SPECS)
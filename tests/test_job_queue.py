@@ -0,0 +1,121 @@
+"""Review job queue: claiming, leases, retries and fencing, against mongomock"""
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from config import settings
+from database import db
+from services.job_queue import JOBS_COLLECTION, JobWorkerPool, QueueFullError, TransientJobError, claim_next_job, enqueue_job
+
+@pytest.fixture(autouse=True)
+def mock_db(monkeypatch):
+    monkeypatch.setattr(db, "db", AsyncMongoMockClient()["test"])
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(settings, "JOB_RETRY_BACKOFF_SECONDS", 10)
+    monkeypatch.setattr(settings, "JOB_MAX_QUEUE_DEPTH", 3)
+
+def jobs():
+    return db.db[JOBS_COLLECTION]
+
+async def expire_lease(job_id: str):
+    await jobs().update_one({"_id": job_id}, {"$set": {"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)}})
+
+def test_jobs_are_claimed_oldest_first_and_only_once():
+    async def scenario():
+        first = await enqueue_job({"n": 1}, "user")
+        second = await enqueue_job({"n": 2}, "user")
+        claimed = [await claim_next_job("w1"), await claim_next_job("w2"), await claim_next_job("w3")]
+        return first, second, claimed
+
+    first, second, claimed = asyncio.run(scenario())
+    assert [job["_id"] for job in claimed[:2]] == [first["_id"], second["_id"]]
+    assert claimed[2] is None
+    assert (claimed[0]["status"], claimed[0]["worker_id"], claimed[0]["attempts"]) == ("running", "w1", 1)
+
+def test_full_queue_refuses_new_jobs():
+    async def scenario():
+        for n in range(settings.JOB_MAX_QUEUE_DEPTH):
+            await enqueue_job({"n": n}, "user")
+        await enqueue_job({"n": "one too many"}, "user")
+
+    with pytest.raises(QueueFullError):
+        asyncio.run(scenario())
+
+def test_expired_lease_is_reclaimed_until_attempts_run_out():
+    async def scenario():
+        job = await enqueue_job({}, "user")
+        await claim_next_job("w1")
+        await expire_lease(job["_id"])
+        reclaimed = await claim_next_job("w2")
+        await expire_lease(job["_id"])
+        exhausted = await claim_next_job("w3")
+        return reclaimed, exhausted, await jobs().find_one({"_id": job["_id"]})
+
+    reclaimed, exhausted, stored = asyncio.run(scenario())
+    assert (reclaimed["worker_id"], reclaimed["attempts"]) == ("w2", 2)
+    assert exhausted is None
+    assert stored["status"] == "failed"
+    assert "lease_expires_at" not in stored
+
+def test_transient_failure_is_retried_with_backoff():
+    async def handler(job):
+        raise TransientJobError("throttled")
+
+    async def scenario():
+        job = await enqueue_job({}, "user")
+        await JobWorkerPool(handler, concurrency=1)._run_job(await claim_next_job("w1"))
+        stored = await jobs().find_one({"_id": job["_id"]})
+        return stored, await claim_next_job("w2")
+
+    stored, claimed = asyncio.run(scenario())
+    assert (stored["status"], stored["error"]) == ("queued", "throttled")
+    assert stored["available_at"] - stored["updated_at"] == timedelta(seconds=settings.JOB_RETRY_BACKOFF_SECONDS)
+    # Not runnable again until the backoff has passed
+    assert claimed is None
+
+def test_last_attempt_and_permanent_errors_fail_the_job():
+    async def transient(job):
+        raise TransientJobError("throttled")
+
+    async def broken(job):
+        raise ValueError("bad payload")
+
+    async def scenario():
+        retried = await enqueue_job({}, "user")
+        await jobs().update_one({"_id": retried["_id"]}, {"$set": {"attempts": settings.JOB_MAX_ATTEMPTS - 1}})
+        await JobWorkerPool(transient, concurrency=1)._run_job(await claim_next_job("w1"))
+        permanent = await enqueue_job({}, "user")
+        await JobWorkerPool(broken, concurrency=1)._run_job(await claim_next_job("w1"))
+        return [await jobs().find_one({"_id": job["_id"]}) for job in (retried, permanent)]
+
+    retried, permanent = asyncio.run(scenario())
+    assert (retried["status"], retried["error"]) == ("failed", "throttled")
+    assert (permanent["status"], permanent["error"]) == ("failed", "bad payload")
+
+def test_worker_that_lost_its_job_cannot_overwrite_it():
+    async def handler(job):
+        return {"score": 5}
+
+    async def scenario():
+        job = await enqueue_job({}, "user")
+        stale = await claim_next_job("w1")
+        await expire_lease(job["_id"])
+        await claim_next_job("w2")
+        await JobWorkerPool(handler, concurrency=1)._run_job(stale)
+        return await jobs().find_one({"_id": job["_id"]})
+
+    stored = asyncio.run(scenario())
+    assert (stored["status"], stored["worker_id"], stored["result"]) == ("running", "w2", None)
+
+def test_completed_job_stores_its_result():
+    async def handler(job):
+        return {"score": 9}
+
+    async def scenario():
+        job = await enqueue_job({}, "user")
+        await JobWorkerPool(handler, concurrency=1)._run_job(await claim_next_job("w1"))
+        return await jobs().find_one({"_id": job["_id"]})
+
+    stored = asyncio.run(scenario())
+    assert (stored["status"], stored["result"]) == ("completed", {"score": 9})
+    assert "lease_expires_at" not in stored
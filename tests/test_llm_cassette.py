@@ -0,0 +1,57 @@
+"""Recording LLM calls to a cassette and replaying them offline"""
+import asyncio
+import json
+import pytest
+from benchmarks.fakes import FakeChatModel
+from config import settings
+from services.llm_cassette import Cassette, CassetteChatModel, CassetteMissError
+
+@pytest.fixture(autouse=True)
+def instant_replay(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CASSETTE_LATENCY_SCALE", 0)
+
+def recorder(path, reply: str) -> CassetteChatModel:
+    return CassetteChatModel(inner=FakeChatModel(latency=0, reply=reply), cassette=Cassette(str(path)), model_name="fake", mode="record")
+
+def player(path) -> CassetteChatModel:
+    # A fresh Cassette reads what the recorder wrote, as a new process would
+    return CassetteChatModel(cassette=Cassette(str(path)), model_name="fake", mode="replay")
+
+def test_recorded_calls_replay_offline(tmp_path):
+    path = tmp_path / "nested" / "llm.jsonl"
+    recorded = asyncio.run(recorder(path, "first answer").ainvoke("hello"))
+    entry = json.loads(path.read_text(encoding="utf-8"))
+    assert (entry["model"], entry["content"]) == ("fake", "first answer")
+    assert entry["usage"]["output_tokens"] > 0
+
+    replayed = asyncio.run(player(path).ainvoke("hello"))
+    assert replayed.content == recorded.content
+    assert replayed.usage_metadata == entry["usage"]
+
+def test_sync_and_streamed_calls_are_recorded(tmp_path):
+    path = tmp_path / "llm.jsonl"
+    model = recorder(path, "streamed answer here")
+    model.invoke("sync")
+    streamed = asyncio.run(collect(model.astream("stream")))
+    assert "".join(streamed).strip() == "streamed answer here"
+
+    replay = player(path)
+    assert len(replay.cassette) == 2
+    assert replay.invoke("sync").content == "streamed answer here"
+    assert "".join(asyncio.run(collect(replay.astream("stream")))) == "".join(streamed)
+
+async def collect(stream):
+    return [chunk.content async for chunk in stream]
+
+def test_unknown_prompt_is_a_miss(tmp_path):
+    path = tmp_path / "llm.jsonl"
+    asyncio.run(recorder(path, "answer").ainvoke("hello"))
+    with pytest.raises(CassetteMissError):
+        asyncio.run(player(path).ainvoke("something else"))
+
+def test_repeated_prompt_replays_in_recorded_order_cycling(tmp_path):
+    path = tmp_path / "llm.jsonl"
+    for reply in ("one", "two"):
+        asyncio.run(recorder(path, reply).ainvoke("same prompt"))
+    model = player(path)
+    assert [asyncio.run(model.ainvoke("same prompt")).content for _ in range(3)] == ["one", "two", "one"]
@@ -0,0 +1,134 @@
+"""LLM guard: quotas, retries and circuit breaker, against FakeChatModel"""
+import asyncio
+import time
+import pytest
+from benchmarks.fakes import FakeAPIError, FakeChatModel
+from config import settings
+from services.llm_resilience import LLMGuard, LLMUnavailableError, ResilientChatModel, TokenBucket
+
+@pytest.fixture(autouse=True)
+def fast_policy(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 2)
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY", 0.01)
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_DELAY", 1.0)
+    monkeypatch.setattr(settings, "LLM_BREAKER_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(settings, "LLM_BREAKER_RESET_SECONDS", 0.2)
+
+def guarded(fake: FakeChatModel) -> ResilientChatModel:
+    # Quotas off: these tests are about failures, not throughput
+    return ResilientChatModel(inner=fake, guard=LLMGuard("test", 0, 0))
+
+def failing(status: int, seconds: float = 60.0, retry_after: float = None) -> FakeChatModel:
+    """Fails every call with `status` for the next `seconds`, then answers normally"""
+    return FakeChatModel(latency=0, error_status=status, retry_after=retry_after, outage_until=time.monotonic() + seconds)
+
+def test_token_bucket_queues_in_arrival_order_and_refuses_long_waits():
+    bucket = TokenBucket(60)
+    assert bucket.reserve(60, max_wait=5) == 0.0
+    first = bucket.reserve(1, max_wait=5)
+    second = bucket.reserve(1, max_wait=5)
+    assert 0.9 < first < second <= 2.0
+    with pytest.raises(LLMUnavailableError) as error:
+        bucket.reserve(10, max_wait=5)
+    assert error.value.retry_after > 5
+
+def test_token_bucket_without_quota_never_waits():
+    bucket = TokenBucket(0)
+    assert all(bucket.reserve(1000, max_wait=0) == 0.0 for _ in range(10))
+
+def test_429_retry_after_is_honoured():
+    fake = failing(429, seconds=0.05, retry_after=0.3)
+    started = time.perf_counter()
+    message = asyncio.run(guarded(fake).ainvoke("hi"))
+    assert time.perf_counter() - started >= 0.3
+    assert message.content == fake.reply
+    assert (fake.calls, fake.failures) == (2, 1)
+
+def test_retry_after_beyond_max_delay_gives_up_at_once():
+    fake = failing(429, retry_after=30)
+    with pytest.raises(LLMUnavailableError) as error:
+        asyncio.run(guarded(fake).ainvoke("hi"))
+    assert fake.calls == 1
+    assert error.value.retry_after == 30
+
+def test_exhausted_retries_raise_llm_unavailable(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_BREAKER_FAILURE_THRESHOLD", 10)
+    fake = failing(500)
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(guarded(fake).ainvoke("hi"))
+    assert fake.calls == settings.LLM_MAX_RETRIES + 1
+
+def test_client_errors_are_not_retried():
+    fake = failing(400)
+    model = guarded(fake)
+    with pytest.raises(FakeAPIError):
+        asyncio.run(model.ainvoke("hi"))
+    assert fake.calls == 1
+    assert model.guard.breaker.state == "closed"
+
+def test_breaker_opens_goes_half_open_and_reopens(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 0)
+    fake = failing(500)
+    model = guarded(fake)
+    breaker = model.guard.breaker
+
+    for _ in range(settings.LLM_BREAKER_FAILURE_THRESHOLD):
+        with pytest.raises(LLMUnavailableError):
+            asyncio.run(model.ainvoke("hi"))
+    assert breaker.state == "open"
+
+    # Open: fails fast without reaching the provider
+    calls = fake.calls
+    with pytest.raises(LLMUnavailableError, match="circuit open"):
+        asyncio.run(model.ainvoke("hi"))
+    assert fake.calls == calls
+
+    # Half-open: one failure re-opens it for another full period
+    time.sleep(settings.LLM_BREAKER_RESET_SECONDS)
+    assert breaker.state == "half_open"
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(model.ainvoke("hi"))
+    assert fake.calls == calls + 1
+    assert breaker.state == "open"
+
+    # Half-open again, provider healthy: the first success closes it
+    time.sleep(settings.LLM_BREAKER_RESET_SECONDS)
+    fake.outage_until = 0.0
+    asyncio.run(model.ainvoke("hi"))
+    assert breaker.state == "closed"
+
+class MidStreamFailure(FakeChatModel):
+    """Streams its first token, then fails with a server error"""
+
+    streams: int = 0
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.streams += 1
+        async for chunk in super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+            yield chunk
+            raise FakeAPIError(500)
+
+async def collect(stream):
+    chunks = []
+    try:
+        async for chunk in stream:
+            chunks.append(chunk.content)
+    except Exception as e:
+        return chunks, e
+    return chunks, None
+
+def test_stream_failure_before_first_chunk_is_retried():
+    fake = failing(429, seconds=0.02, retry_after=0.05)
+    chunks, error = asyncio.run(collect(guarded(fake).astream("hi")))
+    assert error is None
+    assert "".join(chunks).strip() == fake.reply
+    assert fake.failures == 1
+
+def test_stream_failure_after_first_chunk_is_not_replayed():
+    fake = MidStreamFailure(latency=0)
+    model = guarded(fake)
+    chunks, error = asyncio.run(collect(model.astream("hi")))
+    assert isinstance(error, FakeAPIError)
+    assert len(chunks) == 1
+    assert fake.streams == 1
+    assert model.guard.breaker.failures == 1
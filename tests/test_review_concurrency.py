@@ -0,0 +1,73 @@
+"""Review graph topology and analyzer concurrency, timed against a stub model with a fixed round-trip"""
+import asyncio
+import json
+import time
+import pytest
+from agents.registry import enabled_agents
+from benchmarks.corpus import SNIPPETS
+from benchmarks.fakes import FakeChatModel
+from config import settings
+from services.code_analyzer import CodeAnalyzer
+
+ROUND_TRIP = 0.2
+LANGUAGE, CODE = SNIPPETS["clean_python"]
+
+GENERATED = {"code": "def add(a, b):\n    return a + b", "explanation": "Returns the sum of its arguments.", "language": "python"}
+
+def stub_analyzer(model: FakeChatModel) -> CodeAnalyzer:
+    analyzer = CodeAnalyzer()
+    analyzer.llm = model
+    analyzer.model_factory = lambda model_name: model
+    analyzer.compile_chains()
+    return analyzer
+
+@pytest.fixture
+def analyzer():
+    return stub_analyzer(FakeChatModel(latency=ROUND_TRIP))
+
+def timed_review(analyzer: CodeAnalyzer, graph_mode: str, monkeypatch) -> float:
+    monkeypatch.setattr(settings, "REVIEW_GRAPH_MODE", graph_mode)
+    analyzer.compile_chains()
+    started = time.perf_counter()
+    result = asyncio.run(analyzer.aanalyze_code(CODE, LANGUAGE))
+    elapsed = time.perf_counter() - started
+    assert not result.get("fallback")
+    assert result["models"].keys() == {spec.name for spec in enabled_agents(LANGUAGE)}
+    return elapsed
+
+def test_parallel_graph_takes_about_one_round_trip(analyzer, monkeypatch):
+    assert timed_review(analyzer, "parallel", monkeypatch) < 2 * ROUND_TRIP
+
+def test_sequential_graph_takes_one_round_trip_per_agent(analyzer, monkeypatch):
+    agents = len(enabled_agents(LANGUAGE))
+    assert agents > 1
+    assert timed_review(analyzer, "sequential", monkeypatch) >= agents * ROUND_TRIP
+
+def test_parallel_graph_is_faster_than_sequential(analyzer, monkeypatch):
+    parallel = timed_review(analyzer, "parallel", monkeypatch)
+    sequential = timed_review(analyzer, "sequential", monkeypatch)
+    assert parallel < sequential / 2
+
+CONCURRENT_REQUESTS = 8
+
+async def timed_concurrently(make_call):
+    started = time.perf_counter()
+    results = await asyncio.gather(*[make_call() for _ in range(CONCURRENT_REQUESTS)])
+    return time.perf_counter() - started, results
+
+def test_concurrent_reviews_take_about_as_long_as_one(analyzer):
+    elapsed, results = asyncio.run(timed_concurrently(lambda: analyzer.aanalyze_code(CODE, LANGUAGE)))
+    assert not any(result.get("fallback") for result in results)
+    assert elapsed < 2 * ROUND_TRIP
+
+def test_concurrent_chats_take_about_as_long_as_one(analyzer):
+    messages = [{"role": "user", "content": "Why this score?"}]
+    elapsed, answers = asyncio.run(timed_concurrently(lambda: analyzer.achat(CODE, "Score 8", messages, LANGUAGE)))
+    assert answers == [FakeChatModel().reply] * CONCURRENT_REQUESTS
+    assert elapsed < 2 * ROUND_TRIP
+
+def test_concurrent_generations_take_about_as_long_as_one():
+    analyzer = stub_analyzer(FakeChatModel(latency=ROUND_TRIP, reply=json.dumps(GENERATED)))
+    elapsed, results = asyncio.run(timed_concurrently(lambda: analyzer.agenerate_code("A function adding two numbers", LANGUAGE)))
+    assert results == [GENERATED] * CONCURRENT_REQUESTS
+    assert elapsed < 2 * ROUND_TRIP
@@ -0,0 +1,49 @@
+"""Shared user cache invalidation across workers, against mongomock"""
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from config import settings
+from database import db
+from services.user_cache import UserCache
+
+@pytest.fixture(autouse=True)
+def shared_invalidation(monkeypatch):
+    monkeypatch.setattr(db, "db", AsyncMongoMockClient()["test"])
+    monkeypatch.setattr(settings, "USER_CACHE_SHARED_INVALIDATION", True)
+    monkeypatch.setattr(settings, "USER_CACHE_MAX_CLOCK_SKEW_SECONDS", 5)
+
+async def sync_now(cache: UserCache):
+    cache._next_sync = 0.0
+    await cache.sync()
+
+def test_invalidation_from_another_worker_evicts_the_entry():
+    async def scenario():
+        reader, writer = UserCache(), UserCache()
+        await sync_now(reader)
+        reader.set("a@b.co", {"username": "old"})
+        await writer.invalidate("a@b.co")
+        await sync_now(reader)
+        return reader.get("a@b.co")
+
+    assert asyncio.run(scenario()) is None
+
+def test_invalidation_stamped_by_a_slow_clock_is_not_missed():
+    async def scenario():
+        reader = UserCache()
+        await sync_now(reader)
+        reader.set("a@b.co", {"username": "old"})
+        await sync_now(reader)
+        # Written after the last sync by a worker whose clock is 3 seconds behind
+        await db.db[UserCache.COLLECTION].insert_one({"subject": "a@b.co", "created_at": datetime.utcnow() - timedelta(seconds=3)})
+        await sync_now(reader)
+        evicted = reader.get("a@b.co") is None
+
+        # Later syncs still see it inside the overlap window, but apply it only once
+        reader.set("a@b.co", {"username": "new"})
+        await sync_now(reader)
+        return evicted, reader.get("a@b.co")
+
+    evicted, cached = asyncio.run(scenario())
+    assert evicted
+    assert cached == {"username": "new"}
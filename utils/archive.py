@@ -0,0 +1,68 @@
+import io
+import tarfile
+import zipfile
+from pathlib import PurePosixPath
+from typing import List, Tuple
+from config import settings
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2")
+
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+class ArchiveLimitError(ValueError):
+    """Raised when an upload exceeds the batch member count or size limits"""
+
+class MemberBudget:
+    """Tracks member count and uncompressed bytes across every upload in one batch"""
+
+    def __init__(self, max_members: int = None, max_total_size: int = None):
+        self.max_members = max_members if max_members is not None else settings.BATCH_MAX_FILES
+        self.max_total_size = max_total_size if max_total_size is not None else settings.BATCH_MAX_TOTAL_SIZE
+        self.members = 0
+        self.total_size = 0
+
+    def reserve(self, size: int):
+        self.members += 1
+        self.total_size += size
+        if self.members > self.max_members:
+            raise ArchiveLimitError(f"Batch exceeds the maximum of {self.max_members} files")
+        if self.total_size > self.max_total_size:
+            raise ArchiveLimitError(f"Batch exceeds the maximum uncompressed size of {self.max_total_size / (1024 * 1024)}MB")
+
+def extract_archive(filename: str, content: bytes, budget: MemberBudget) -> List[Tuple[str, bytes]]:
+    """
+    Return (member_path, data) for every regular file in a zip or tar archive.
+    Sizes are checked against the budget before a member is decompressed, and
+    reads are capped so a lying header cannot inflate past the limit.
+    """
+    members = []
+    try:
+        if filename.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(content)) as archive:
+                for info in archive.infolist():
+                    if info.is_dir():
+                        continue
+                    budget.reserve(info.file_size)
+                    with archive.open(info) as handle:
+                        data = handle.read(info.file_size + 1)
+                    if len(data) > info.file_size:
+                        raise ArchiveLimitError(f"Archive member {info.filename} is larger than declared")
+                    members.append((_clean_name(info.filename), data))
+        else:
+            with tarfile.open(fileobj=io.BytesIO(content), mode="r:*") as archive:
+                for info in archive:
+                    # Links and devices are skipped; only regular files are reviewed
+                    if not info.isfile():
+                        continue
+                    budget.reserve(info.size)
+                    handle = archive.extractfile(info)
+                    members.append((_clean_name(info.name), handle.read(info.size)))
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        raise ValueError(f"Could not read archive {filename}: {e}")
+    return members
+
+def _clean_name(name: str) -> str:
+    # Member names are only used as labels, but never echo absolute or parent paths back
+    parts = [part for part in PurePosixPath(name).parts if part not in ("/", "..", ".")]
+    return "/".join(parts)
@@ -1,9 +1,14 @@
 from passlib.context import CryptContext
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+import asyncio
+import multiprocessing
 import jwt
 import os
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from dotenv import load_dotenv
+from config import settings
 
 load_dotenv()
 
@@ -12,7 +17,18 @@ SECRET_KEY = os.getenv("JWT_SECRET", "super-secret-key-12345")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 
 
-pwd_context = CryptContext(schemes=["sha256_crypt"], deprecated="auto")
+@lru_cache(maxsize=4)
+def password_context(rounds: int) -> CryptContext:
+    # min/max pinned to the target cost so hashes made with any other cost are flagged for rehash
+    return CryptContext(
+        schemes=["sha256_crypt"],
+        deprecated="auto",
+        sha256_crypt__default_rounds=rounds,
+        sha256_crypt__min_rounds=rounds,
+        sha256_crypt__max_rounds=rounds
+    )
+
+pwd_context = password_context(settings.PASSWORD_HASH_ROUNDS)
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -20,6 +36,50 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# Module-level so they can be shipped to a process pool
+def _hash_password(password: str, rounds: int) -> str:
+    return password_context(rounds).hash(password)
+
+def _verify_and_update(plain_password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return password_context(rounds).verify_and_update(plain_password, hashed_password)
+
+_password_executor: Optional[Executor] = None
+
+def _get_password_executor() -> Optional[Executor]:
+    """
+    Hashing is deliberately slow and the crypt backend holds the GIL, so by default
+    it runs in a small process pool; "thread" and "inline" exist for constrained hosts.
+    """
+    global _password_executor
+    if _password_executor is None and settings.PASSWORD_HASH_EXECUTOR != "inline":
+        if settings.PASSWORD_HASH_EXECUTOR == "thread":
+            _password_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+        else:
+            _password_executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+    return _password_executor
+
+async def _run_hashing(func, *args):
+    executor = _get_password_executor()
+    if executor is None:
+        return func(*args)
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+async def ahash_password(password: str) -> str:
+    return await _run_hashing(_hash_password, password, settings.PASSWORD_HASH_ROUNDS)
+
+async def averify_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Returns (valid, new_hash); new_hash is set when the stored hash should be upgraded to the current cost"""
+    return await _run_hashing(_verify_and_update, plain_password, hashed_password, settings.PASSWORD_HASH_ROUNDS)
+
+def shutdown_password_executor():
+    global _password_executor
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=False, cancel_futures=True)
+        _password_executor = None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
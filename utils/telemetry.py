@@ -0,0 +1,49 @@
+import time
+from services.metrics import HTTP_REQUEST_SECONDS
+from config import settings
+from utils.log import get_logger, log_event
+
+access_logger = get_logger("access")
+
+class RequestTelemetryMiddleware:
+    """
+    Plain ASGI middleware: times each request until its body is fully sent (so
+    SSE streams are measured end to end), records the latency histogram by route
+    template, and writes one JSON access log line.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            # Route templates ("/api/sessions/{session_id}") keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route, str(status)).observe(elapsed)
+            if settings.ACCESS_LOG_ENABLED:
+                headers = dict(scope.get("headers") or [])
+                log_event(
+                    access_logger, "request",
+                    method=scope["method"],
+                    path=scope["path"],
+                    route=route,
+                    status=status,
+                    duration_ms=round(elapsed * 1000, 2),
+                    origin=headers.get(b"origin", b"").decode("latin-1") or None
+                )
@@ -0,0 +1,23 @@
+"""
+Standalone review job worker. Run it next to (or instead of) the in-process
+workers so long reviews do not share CPU with the API:
+
+    python worker.py
+"""
+import asyncio
+from config import settings
+from database import connect_to_mongo, close_mongo_connection
+from services.job_queue import JobWorkerPool
+from controllers.job_controller import run_review_job
+
+async def main():
+    await connect_to_mongo()
+    pool = JobWorkerPool(run_review_job, concurrency=settings.JOB_WORKER_CONCURRENCY)
+    try:
+        await pool.run_forever()
+    finally:
+        await pool.stop()
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())